@@ -0,0 +1 @@
+"""Benchmarks for the trend engine. Run with ``PYTHONPATH=src python -m benchmarks.<name>``."""
@@ -0,0 +1,66 @@
+"""
+Full-bag tag comparison: a Python loop over bootstrap resamples vs ``compare_tag``.
+
+    PYTHONPATH=src python -m benchmarks.bench_bootstrap
+"""
+
+import random
+import time
+
+import numpy as np
+
+from benchmarks.bench_insights import _frame
+from models.frame import from_micros
+from models.models import METRICS
+from stats.bootstrap import DEFAULT_RESAMPLES, compare_tag, tag_segments
+
+
+LOOP_RESAMPLES = 200  # the loop is timed on fewer resamples and scaled up
+
+
+def _loop_bootstrap(before: np.ndarray, after: np.ndarray, n_resamples: int) -> None:
+    """One resample, and one NumPy call per statistic and metric, at a time"""
+    rng = np.random.default_rng(0)
+    for _ in range(n_resamples):
+        b = before[rng.integers(0, len(before), len(before))]
+        a = after[rng.integers(0, len(after), len(after))]
+        for j in range(before.shape[1]):
+            a[:, j].mean() - b[:, j].mean()
+            np.median(a[:, j]) - np.median(b[:, j])
+            a[:, j].std(ddof=1) - b[:, j].std(ddof=1)
+    pooled = np.concatenate((before, after))
+    for _ in range(n_resamples):
+        permuted = rng.permutation(pooled)
+        permuted[: len(after)].mean(axis=0) - permuted[len(after) :].mean(axis=0)
+
+
+def main() -> None:
+    frame = _frame(random.Random(0))
+    first = min(int(c["captured_at"][0]) for _, c in frame.items())
+    last = max(int(c["captured_at"][-1]) for _, c in frame.items())
+    at = from_micros((first + last) // 2)
+    print(f"{len(frame)} shots, {len(frame.clubs)} clubs, {DEFAULT_RESAMPLES} resamples")
+
+    for max_shots in (100, None):
+        segments = [tag_segments(columns, at, METRICS, max_shots) for _, columns in frame.items()]
+        start = time.perf_counter()
+        for before, after in segments:
+            _loop_bootstrap(before, after, LOOP_RESAMPLES)
+        loop = (time.perf_counter() - start) * DEFAULT_RESAMPLES / LOOP_RESAMPLES
+
+        start = time.perf_counter()
+        results = compare_tag(frame, at, max_shots=max_shots, seed=0)
+        vectorized = time.perf_counter() - start
+        shots = sum(r.n_before + r.n_after for r in results.values())
+        label = f"{max_shots} shots per side" if max_shots else "whole history"
+        print(
+            f"{label:<22} ({shots:5d} shots)  loop {loop:7.1f} s  compare_tag {vectorized:6.2f} s"
+        )
+
+    start = time.perf_counter()
+    compare_tag(frame, at, max_shots=100, seed=0, workers=4)
+    print(f"100 shots per side, 4 processes: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Full-bag insight refresh: SciPy tests per (club, metric, window) vs the batched engine,
+then live shots: a full refresh after each one vs ``InsightCache``.
+
+    PYTHONPATH=src python -m benchmarks.bench_insights
+"""
+
+import random
+import time
+from datetime import UTC, datetime
+
+import numpy as np
+
+from insights.batch import INSIGHT_METRICS, compute_insight_stats, generate_insights
+from insights.cache import InsightCache
+from models import TrendEngineConfig
+from models.frame import ShotFrame, from_micros, to_micros
+from stats.inference import compute_bias, compute_consistency, compute_step_change, compute_trend
+from stats.rollups import WindowSpec
+
+
+CLUBS = ("Dr", "3w", "5h", "4i", "5i", "6i", "7i", "8i", "9i", "PW", "GW", "SW", "LW")
+N_SHOTS = 20_000
+N_LIVE = 300
+REPEAT = 5
+
+
+def _add_shots(frame: ShotFrame, rng: random.Random, n: int, t: int) -> int:
+    """Append ``n`` shots after time ``t``, returns the time of the last"""
+    for _ in range(n):
+        t += int(rng.expovariate(1 / 3600) * 1_000_000)
+        club = rng.choice(CLUBS)
+        frame.club_index(club)
+        frame[club].append(
+            captured_at=t,
+            carry=rng.gauss(160, 8),
+            offline=rng.gauss(0, 6),
+            ball_speed=rng.gauss(118, 3),
+            spin=rng.gauss(6000, 400),
+            launch_angle=rng.gauss(18, 2),
+            launch_direction=rng.gauss(0, 2),
+            session=-1,
+            is_outlier=rng.random() < 0.03,
+        )
+    return t
+
+
+def _frame(rng: random.Random) -> ShotFrame:
+    frame = ShotFrame()
+    _add_shots(frame, rng, N_SHOTS, to_micros(datetime(2025, 1, 1, tzinfo=UTC)))
+    return frame
+
+
+def _live(cached: bool) -> tuple[float, int]:
+    """Seconds per live shot and insights emitted, refreshing after every shot"""
+    rng = random.Random(1)
+    frame = ShotFrame()
+    t = _add_shots(frame, rng, N_SHOTS, to_micros(datetime(2025, 1, 1, tzinfo=UTC)))
+    cache = InsightCache()
+    cache.update(frame)
+    emitted = 0
+    start = time.perf_counter()
+    for _ in range(N_LIVE):
+        t = _add_shots(frame, rng, 1, t)
+        emitted += len(cache.update(frame) if cached else generate_insights(frame))
+    return (time.perf_counter() - start) / N_LIVE, emitted
+
+
+def _per_club(frame: ShotFrame, config: TrendEngineConfig) -> int:
+    """The per-club path: one SciPy call per test and (club, metric, window)"""
+    tests = 0
+    for _, columns in frame.items():
+        keep = ~columns.is_outlier
+        times = columns.captured_at[keep]
+        now = from_micros(int(times[-1]))
+        for spec in map(WindowSpec.parse, config.windows):
+            for metric in INSIGHT_METRICS:
+                values = columns[metric][keep]
+                if spec.count is not None:
+                    current = values[-spec.count :]
+                    previous = values[-2 * spec.count : -spec.count]
+                else:
+                    assert spec.span is not None
+                    end, mid = to_micros(now), to_micros(now - spec.span)
+                    start = to_micros(now - 2 * spec.span)
+                    current = values[(times > mid) & (times <= end)]
+                    previous = values[(times > start) & (times <= mid)]
+                results = (
+                    compute_trend(current),
+                    compute_step_change(current, previous),
+                    compute_consistency(current, previous),
+                    compute_bias(current),
+                )
+                tests += sum(r is not None for r in results)
+    return tests
+
+
+def _time(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    frame = _frame(random.Random(0))
+    config = TrendEngineConfig()
+    tests = _per_club(frame, config)
+    groups = len(frame.clubs) * len(INSIGHT_METRICS) * len(config.windows)
+    s = compute_insight_stats(frame, config)
+    assert np.isfinite(s.slope[s.trend_ok]).all()
+
+    results = (
+        ("per-club scipy", _time(lambda: _per_club(frame, config))),
+        ("batch stats", _time(lambda: compute_insight_stats(frame, config))),
+        ("batch insights", _time(lambda: generate_insights(frame, config))),
+    )
+    print(
+        f"{N_SHOTS} shots, {len(frame.clubs)} clubs, {groups} (club, metric, window), {tests} tests"
+    )
+    for name, elapsed in results:
+        print(f"{name:<15} {elapsed * 1e3:8.1f} ms")
+
+    print(f"{N_LIVE} live shots")
+    for name, cached in (("full refresh", False), ("insight cache", True)):
+        elapsed, emitted = _live(cached)
+        print(f"{name:<15} {elapsed * 1e3:8.1f} ms/shot  {emitted:6d} insights emitted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Shot quality scoring: a whole session in one call, and a single live shot, both with
+the angle of attack inferred from launch and spin.
+
+    PYTHONPATH=src python -m benchmarks.bench_quality
+"""
+
+import time
+
+import numpy as np
+
+from insights.quality import score_shots
+
+
+SESSION = 500
+REPEAT = 20
+
+
+def _time(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    speed = rng.uniform(80, 200, SESSION)
+    launch = rng.uniform(5, 25, SESSION)
+    spin = rng.uniform(1500, 4000, SESSION)
+    carry = speed * 1.6
+
+    session = _time(lambda: score_shots(speed, launch, spin, carry))
+    single = _time(lambda: score_shots(speed[:1], launch[:1], spin[:1], carry[:1]))
+    print(f"session of {SESSION}  {session / SESSION * 1e6:8.1f} us/shot")
+    print(f"single shot     {single * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
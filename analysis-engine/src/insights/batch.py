@@ -0,0 +1,416 @@
+"""
+Insight statistics for every club, metric and window in one pass.
+
+Calling ``stats.inference`` per (club, metric, window) means hundreds of small SciPy
+calls after every shot. Here the windows of all clubs are gathered into padded
+``(metric, club x window, shot)`` arrays with a validity mask, and the OLS trend,
+Welch t-test, Cohen's d, variance-ratio F-test and bias t-test are evaluated for all of
+them with a handful of array operations and vectorized t / F distribution calls.
+Guardrails are masks over the results rather than branches.
+"""
+
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+from models.frame import ShotColumns, ShotFrame, from_micros, to_micros
+from models.models import Insight, InsightKind, TrendEngineConfig
+from stats.rollups import WindowSpec
+
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+BoolArray = npt.NDArray[np.bool_]
+
+# scipy.stats isn't typed, its distributions are only called through the wrappers below
+_stats: Any = stats
+
+INSIGHT_METRICS = ("carry", "offline", "ball_speed", "spin", "launch_angle")
+METRIC_LABELS = {
+    "carry": "carry",
+    "offline": "offline",
+    "ball_speed": "ball speed",
+    "spin": "spin",
+    "launch_angle": "launch",
+}
+METRIC_UNITS = {
+    "carry": "y",
+    "offline": "y",
+    "ball_speed": " mph",
+    "spin": " rpm",
+    "launch_angle": "°",
+}
+
+# thresholds of the spec not covered by TrendEngineConfig
+TREND_MIN_SLOPE = 0.1
+CONSISTENCY_P_THRESHOLD = 0.10
+CONSISTENCY_MIN_RATIO = 1.5
+BIAS_MIN_SHIFT = 2.0  # yards
+
+
+@dataclass(frozen=True)
+class InsightStats:
+    """
+    Test results indexed ``[club, metric, window]``. Entries whose window is too small
+    for a test are NaN, and ``*_ok`` tells which entries passed the sample guardrails.
+    Step change and consistency compare each window to the one right before it.
+    """
+
+    clubs: list[str]
+    metrics: tuple[str, ...]
+    windows: list[WindowSpec]
+    now: list[datetime]  # end of the time windows, per club
+
+    n_current: IntArray
+    n_previous: IntArray
+    mean_current: FloatArray
+    mean_previous: FloatArray
+    sd_current: FloatArray
+    sd_previous: FloatArray
+
+    slope: FloatArray
+    slope_ci: FloatArray  # [..., 2]
+    trend_p: FloatArray
+    r_squared: FloatArray
+
+    delta: FloatArray
+    delta_ci: FloatArray  # [..., 2]
+    step_p: FloatArray
+    cohens_d: FloatArray
+
+    sd_ratio: FloatArray
+    consistency_p: FloatArray
+
+    bias_ci: FloatArray  # [..., 2], of mean_current
+    bias_p: FloatArray
+
+    trend_ok: BoolArray
+    step_ok: BoolArray
+
+    def index(self, club: str, metric: str, window: str) -> tuple[int, int, int]:
+        return (
+            self.clubs.index(club),
+            self.metrics.index(metric),
+            [w.name for w in self.windows].index(window),
+        )
+
+
+def _included_rows(columns: ShotColumns, exclude_outliers: bool) -> IntArray:
+    if exclude_outliers:
+        return np.flatnonzero(~columns["is_outlier"])
+    return np.arange(len(columns))
+
+
+def _window_rows(
+    rows: IntArray, captured_at: IntArray, spec: WindowSpec, now_us: int
+) -> tuple[IntArray, IntArray]:
+    """Rows of the window and of the equally long window before it"""
+    if spec.count is not None:
+        n = spec.count
+        return rows[max(len(rows) - n, 0) :], rows[
+            max(len(rows) - 2 * n, 0) : max(len(rows) - n, 0)
+        ]
+    assert spec.span is not None
+    span_us = to_micros(from_micros(0) + spec.span)
+    times = captured_at[rows]
+    bounds = np.searchsorted(times, [now_us - 2 * span_us, now_us - span_us, now_us], side="right")
+    return rows[bounds[1] : bounds[2]], rows[bounds[0] : bounds[1]]
+
+
+def _pad(groups: list[IntArray]) -> tuple[IntArray, BoolArray]:
+    width = max((len(g) for g in groups), default=0)
+    idx = np.zeros((len(groups), max(width, 1)), dtype=np.int64)
+    mask = np.zeros(idx.shape, dtype=np.bool_)
+    for i, g in enumerate(groups):
+        idx[i, : len(g)] = g
+        mask[i, : len(g)] = True
+    return idx, mask
+
+
+def _moments(values: FloatArray, mask: BoolArray) -> tuple[FloatArray, FloatArray, FloatArray]:
+    """Count, mean and sample variance along the last axis, counting masked entries only"""
+    n = mask.sum(axis=-1).astype(np.float64)
+    mean = np.where(mask, values, 0.0).sum(axis=-1) / n
+    dev = np.where(mask, values - mean[..., None], 0.0)
+    var = np.where(n > 1, (dev * dev).sum(axis=-1) / (n - 1), np.nan)
+    return n, mean, var
+
+
+def _t_quantile(df: FloatArray) -> FloatArray:
+    return np.asarray(_stats.t.ppf(0.975, np.where(df > 0, df, np.nan)), dtype=np.float64)
+
+
+def _t_two_sided(t: FloatArray, df: FloatArray) -> FloatArray:
+    """p-value of a two-sided t-test, NaN where ``df`` isn't positive"""
+    return np.asarray(2 * _stats.t.sf(np.abs(t), np.where(df > 0, df, np.nan)), dtype=np.float64)
+
+
+def _f_two_sided(ratio: FloatArray, dfn: FloatArray, dfd: FloatArray) -> FloatArray:
+    """p-value of a two-sided F-test of equal variances"""
+    p = 2 * np.minimum(_stats.f.cdf(ratio, dfn, dfd), _stats.f.sf(ratio, dfn, dfd))
+    return np.minimum(np.asarray(p, dtype=np.float64), 1.0)
+
+
+def compute_insight_stats(
+    frame: ShotFrame,
+    config: TrendEngineConfig | None = None,
+    metrics: tuple[str, ...] = INSIGHT_METRICS,
+    now: datetime | None = None,
+    clubs: Sequence[str] | None = None,
+) -> InsightStats:
+    """
+    Run every insight test for every club, metric and configured window of ``frame``.
+
+    :param frame: shots, outliers are left out if ``config.exclude_outliers``
+    :param config: windows and sample guardrails
+    :param metrics: ``ShotFrame`` columns to test
+    :param now: end of the time windows, each club's most recent shot by default
+    :param clubs: only test these clubs (those of ``frame`` among them), all by default
+    """
+    config = config or TrendEngineConfig()
+    specs = [WindowSpec.parse(w) for w in config.windows]
+    clubs = list(frame.clubs) if clubs is None else [c for c in clubs if c in frame]
+
+    # every club's columns end to end, so a window is a set of global row numbers
+    partitions = [frame[club] for club in clubs]
+    offsets = np.cumsum([0, *(len(p) for p in partitions)])
+    values = np.stack(
+        [np.concatenate([p[m] for p in partitions] or [np.empty(0)]) for m in metrics]
+    ).astype(np.float64)
+
+    current_groups: list[IntArray] = []
+    previous_groups: list[IntArray] = []
+    club_now: list[datetime] = []
+    for offset, partition in zip(offsets, partitions, strict=False):
+        rows = _included_rows(partition, config.exclude_outliers)
+        captured_at = partition["captured_at"]
+        if now is not None:
+            now_us = to_micros(now)
+        elif len(rows):
+            now_us = int(captured_at[rows[-1]])
+        else:
+            now_us = 0
+        club_now.append(from_micros(now_us))
+        for spec in specs:
+            current, previous = _window_rows(rows, captured_at, spec, now_us)
+            current_groups.append(current + offset)
+            previous_groups.append(previous + offset)
+
+    cur_idx, cur_mask = _pad(current_groups)
+    prev_idx, prev_mask = _pad(previous_groups)
+    # (metric, group, shot)
+    cur = values[:, cur_idx] if values.shape[1] else np.zeros((len(metrics), *cur_idx.shape))
+    prev = values[:, prev_idx] if values.shape[1] else np.zeros((len(metrics), *prev_idx.shape))
+    cur_mask = cur_mask[None] & np.isfinite(cur)
+    prev_mask = prev_mask[None] & np.isfinite(prev)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_c, mean_c, var_c = _moments(cur, cur_mask)
+        n_p, mean_p, var_p = _moments(prev, prev_mask)
+
+        # OLS of value ~ position among the window's valid shots
+        x = np.cumsum(cur_mask, axis=-1) - 1.0
+        x_mean = (n_c - 1) / 2
+        dx = np.where(cur_mask, x - x_mean[..., None], 0.0)
+        dy = np.where(cur_mask, cur - mean_c[..., None], 0.0)
+        sxx = (dx * dx).sum(axis=-1)
+        sxy = (dx * dy).sum(axis=-1)
+        syy = (dy * dy).sum(axis=-1)
+        slope = sxy / sxx
+        df_trend = n_c - 2
+        slope_se = np.sqrt(np.maximum(syy - slope * sxy, 0.0) / df_trend / sxx)
+        t_trend = slope / slope_se
+        trend_p = _t_two_sided(t_trend, df_trend)
+        slope_half = _t_quantile(df_trend) * slope_se
+        r_squared = sxy * sxy / (sxx * syy)
+
+        # Welch t-test and Cohen's d of current vs previous
+        se2_c, se2_p = var_c / n_c, var_p / n_p
+        delta = mean_c - mean_p
+        delta_se = np.sqrt(se2_c + se2_p)
+        df_welch = (se2_c + se2_p) ** 2 / (se2_c**2 / (n_c - 1) + se2_p**2 / (n_p - 1))
+        step_p = _t_two_sided(delta / delta_se, df_welch)
+        delta_half = _t_quantile(df_welch) * delta_se
+        pooled_sd = np.sqrt(((n_c - 1) * var_c + (n_p - 1) * var_p) / (n_c + n_p - 2))
+        cohens_d = delta / pooled_sd
+
+        # two-sided F-test of equal variances
+        ratio = var_c / var_p
+        dfn, dfd = n_c - 1, n_p - 1
+        consistency_p = _f_two_sided(ratio, dfn, dfd)
+
+        # one-sample t-test of the current mean against 0
+        mean_se = np.sqrt(se2_c)
+        bias_p = _t_two_sided(mean_c / mean_se, n_c - 1)
+        bias_half = _t_quantile(n_c - 1) * mean_se
+
+    def shaped(a: FloatArray) -> FloatArray:
+        # (metric, club * window) -> (club, metric, window)
+        return a.reshape(len(metrics), len(clubs), len(specs)).transpose(1, 0, 2)
+
+    def interval(center: FloatArray, half: FloatArray) -> FloatArray:
+        return np.stack((shaped(center - half), shaped(center + half)), axis=-1)
+
+    n_current = shaped(n_c).astype(np.int64)
+    n_previous = shaped(n_p).astype(np.int64)
+    return InsightStats(
+        clubs=clubs,
+        metrics=metrics,
+        windows=specs,
+        now=club_now,
+        n_current=n_current,
+        n_previous=n_previous,
+        mean_current=shaped(mean_c),
+        mean_previous=shaped(mean_p),
+        sd_current=shaped(np.sqrt(var_c)),
+        sd_previous=shaped(np.sqrt(var_p)),
+        slope=shaped(slope),
+        slope_ci=interval(slope, slope_half),
+        trend_p=shaped(trend_p),
+        r_squared=shaped(r_squared),
+        delta=shaped(delta),
+        delta_ci=interval(delta, delta_half),
+        step_p=shaped(step_p),
+        cohens_d=shaped(cohens_d),
+        sd_ratio=shaped(np.sqrt(ratio)),
+        consistency_p=shaped(consistency_p),
+        bias_ci=interval(mean_c, bias_half),
+        bias_p=shaped(bias_p),
+        trend_ok=n_current >= config.min_samples_trend,
+        step_ok=(n_current >= config.min_samples_step) & (n_previous >= config.min_samples_step),
+    )
+
+
+def _window_text(spec: WindowSpec, previous: bool = False) -> str:
+    if spec.count is not None:
+        return f"your previous {spec.count} shots" if previous else f"your last {spec.count} shots"
+    assert spec.span is not None
+    days = spec.span.days
+    return f"the previous {days} days" if previous else f"the last {days} days"
+
+
+def _baseline(spec: WindowSpec) -> str:
+    return spec.name.replace("last_", "prev_", 1)
+
+
+def _insight_id(*parts: str) -> str:
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+
+
+def generate_insights(
+    frame: ShotFrame,
+    config: TrendEngineConfig | None = None,
+    now: datetime | None = None,
+    stats_: InsightStats | None = None,
+) -> list[Insight]:
+    """
+    Insights for every club, metric and window of ``frame`` that pass the spec's
+    thresholds (R-STAT-3, R-STAT-9).
+
+    :param frame: shots, outliers are left out if ``config.exclude_outliers``
+    :param config: windows, guardrails and thresholds
+    :param now: end of the time windows, each club's most recent shot by default
+    :param stats_: precomputed ``compute_insight_stats`` results to reuse
+    """
+    config = config or TrendEngineConfig()
+    s = stats_ or compute_insight_stats(frame, config, now=now)
+    p_max = config.p_value_threshold
+
+    with np.errstate(invalid="ignore"):
+        kinds: dict[InsightKind, BoolArray] = {
+            "trend": s.trend_ok & (s.trend_p < p_max) & (np.abs(s.slope) > TREND_MIN_SLOPE),
+            "step_change": s.step_ok
+            & (s.step_p < p_max)
+            & (np.abs(s.cohens_d) > config.effect_size_threshold),
+            "consistency": s.step_ok
+            & (s.consistency_p < CONSISTENCY_P_THRESHOLD)
+            & ((s.sd_ratio > CONSISTENCY_MIN_RATIO) | (s.sd_ratio < 1 / CONSISTENCY_MIN_RATIO)),
+        }
+        if "offline" in s.metrics:
+            bias = s.trend_ok & (s.bias_p < p_max) & (np.abs(s.mean_current) > BIAS_MIN_SHIFT)
+            bias[:, [m != "offline" for m in s.metrics], :] = False
+            kinds["bias_shift"] = bias
+
+    insights: list[Insight] = []
+    for kind, selected in kinds.items():
+        for c, m, w in np.argwhere(selected).tolist():
+            club, metric, spec = s.clubs[c], s.metrics[m], s.windows[w]
+            created_at = now or s.now[c]
+            label, unit = METRIC_LABELS.get(metric, metric), METRIC_UNITS.get(metric, "")
+            i = (c, m, w)
+            fields: dict[str, Any]
+            if kind == "trend":
+                slope, (lo, hi) = float(s.slope[i]), s.slope_ci[i].tolist()
+                fields = {
+                    "baseline": spec.name,
+                    "delta": slope * (int(s.n_current[i]) - 1),
+                    "slope": slope,
+                    "ci": (lo, hi),
+                    "p_value": float(s.trend_p[i]),
+                    "effect_size": float(s.r_squared[i]),
+                    "text": (
+                        f"{club} {label} is trending {'up' if slope > 0 else 'down'} "
+                        f"{slope:+.2f}{unit} per shot over {_window_text(spec)} "
+                        f"(95% CI {lo:+.2f} to {hi:+.2f})."
+                    ),
+                }
+            elif kind == "step_change":
+                delta, (lo, hi) = float(s.delta[i]), s.delta_ci[i].tolist()
+                fields = {
+                    "baseline": _baseline(spec),
+                    "delta": delta,
+                    "ci": (lo, hi),
+                    "p_value": float(s.step_p[i]),
+                    "effect_size": float(s.cohens_d[i]),
+                    "text": (
+                        f"{club} {label} is {'up' if delta > 0 else 'down'} {delta:+.1f}{unit} "
+                        f"vs {_window_text(spec, previous=True)} (95% CI {lo:+.1f} to {hi:+.1f})."
+                    ),
+                }
+            elif kind == "consistency":
+                ratio = float(s.sd_ratio[i])
+                change = ratio - 1
+                fields = {
+                    "baseline": _baseline(spec),
+                    "delta": float(s.sd_current[i] - s.sd_previous[i]),
+                    "ci": (float("nan"), float("nan")),
+                    "p_value": float(s.consistency_p[i]),
+                    "effect_size": ratio,
+                    "text": (
+                        f"{club} {label} consistency {'worsened' if change > 0 else 'improved'}: "
+                        f"dispersion {'up' if change > 0 else 'down'} {abs(change):.0%} "
+                        f"vs {_window_text(spec, previous=True)}."
+                    ),
+                }
+            else:
+                shift, (lo, hi) = float(s.mean_current[i]), s.bias_ci[i].tolist()
+                fields = {
+                    "baseline": "target_line",
+                    "delta": shift,
+                    "ci": (lo, hi),
+                    "p_value": float(s.bias_p[i]),
+                    "effect_size": shift / float(s.sd_current[i]),
+                    "text": (
+                        f"{club} {label} has shifted {abs(shift):.1f}{unit} "
+                        f"{'left' if shift < 0 else 'right'} over {_window_text(spec)} "
+                        f"(p={float(s.bias_p[i]):.2f})."
+                    ),
+                }
+            insights.append(
+                Insight(
+                    id=_insight_id(club, metric, kind, spec.name, created_at.isoformat()),
+                    club=club,
+                    metric=metric,
+                    kind=kind,
+                    window=spec.name,
+                    created_at=created_at,
+                    **fields,
+                )
+            )
+    return insights
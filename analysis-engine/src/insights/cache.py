@@ -0,0 +1,230 @@
+"""
+Change detection for insights (R-STAT-5).
+
+Insights are recomputed from a club's windows, so on their own the same "7i carry is up
++4.2y" would be computed again, and emitted again, after every following 7i shot.
+``InsightCache`` remembers, per (club, metric, kind, window, baseline), the state of the
+last insight emitted for it, and per club the rollup version it was last evaluated at:
+
+- a club whose version has not changed since is not evaluated at all;
+- an insight is emitted only if nothing was emitted for its key yet, or if since the
+  last one emitted for it its direction changed, or its p-value or magnitude moved by
+  a step. An insight that stops passing the thresholds and comes back unchanged, as
+  they do when a p-value hovers around the threshold, is not emitted again.
+
+Entries not evaluated for ``ttl`` seconds are dropped, and beyond ``max_entries`` the
+least recently evaluated ones are. A club whose last entry is dropped is forgotten too,
+and evaluated again on the next update.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from math import log10
+
+import numpy as np
+
+from insights.batch import compute_insight_stats, generate_insights
+from models.frame import ShotColumns, ShotFrame
+from models.models import Insight, TrendEngineConfig
+
+
+# an insight is emitted again once |delta| moved by its metric's step since last emitted
+MAGNITUDE_STEPS = {
+    "carry": 2.0,  # yards
+    "offline": 2.0,  # yards
+    "ball_speed": 1.0,  # mph
+    "spin": 100.0,  # rpm
+    "launch_angle": 0.5,  # degrees
+}
+# ... or once its p-value moved by this many orders of magnitude, down to 10^-CAP
+SIGNIFICANCE_STEP = 1.0
+SIGNIFICANCE_CAP = 3.0
+
+
+@dataclass(frozen=True)
+class InsightKey:
+    club: str
+    metric: str
+    kind: str
+    window: str
+    baseline: str
+
+    @classmethod
+    def of(cls, insight: Insight) -> "InsightKey":
+        return cls(insight.club, insight.metric, insight.kind, insight.window, insight.baseline)
+
+
+@dataclass(frozen=True)
+class InsightState:
+    """What has to change for an insight to be worth emitting again"""
+
+    direction: int  # sign of the delta
+    significance: float  # -log10(p_value), at most SIGNIFICANCE_CAP
+    magnitude: float  # |delta| in MAGNITUDE_STEPS
+
+    @classmethod
+    def of(cls, insight: Insight) -> "InsightState":
+        return cls(
+            direction=int(np.sign(insight.delta)),
+            significance=min(-log10(max(insight.p_value, 1e-300)), SIGNIFICANCE_CAP),
+            magnitude=abs(insight.delta) / MAGNITUDE_STEPS.get(insight.metric, 1.0),
+        )
+
+    def differs(self, other: "InsightState") -> bool:
+        # compared to each other rather than bucketed, so a value hovering around a
+        # bucket boundary does not flap
+        return (
+            self.direction != other.direction
+            or abs(self.significance - other.significance) >= SIGNIFICANCE_STEP
+            or abs(self.magnitude - other.magnitude) >= 1
+        )
+
+
+@dataclass
+class _Entry:
+    state: InsightState
+    insight: Insight  # the last one emitted
+    evaluated_at: float
+    passing: bool = True
+
+
+def _fingerprint(columns: ShotColumns) -> tuple[int, int, int]:
+    """Stands in for a rollup version: changes whenever shots are added or retagged"""
+    n = len(columns)
+    last = int(columns["captured_at"][-1]) if n else 0
+    # the flags themselves, so that swapping which shots are outliers is seen too
+    return n, last, hash(np.packbits(columns["is_outlier"]).tobytes())
+
+
+class InsightCache:
+    """
+    Emits each insight of a ``ShotFrame`` once, then again only when it changes.
+
+    :param config: windows, guardrails and thresholds of the insights
+    :param max_entries: insights remembered at most
+    :param ttl: seconds after which an insight not evaluated since is forgotten
+    :param clock: time source of ``ttl``, ``time.monotonic`` by default
+
+    Example:
+
+        cache = InsightCache(config)
+        engine.add(shot)
+        frame.append(shot)
+        new = cache.update(frame, versions={shot.club: engine.version(shot.club)})
+        hub.publish_insights([i.model_dump(mode="json") for i in new])
+
+    """
+
+    def __init__(
+        self,
+        config: TrendEngineConfig | None = None,
+        *,
+        max_entries: int = 4096,
+        ttl: float = 86_400.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or TrendEngineConfig()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evaluated = 0  # clubs evaluated
+        self.skipped = 0  # clubs skipped, unchanged since their last evaluation
+        self.suppressed = 0  # insights computed but not emitted, unchanged
+        self._clock = clock
+        self._entries: OrderedDict[InsightKey, _Entry] = OrderedDict()
+        self._keys: dict[str, set[InsightKey]] = {}
+        self._versions: dict[str, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(
+        self,
+        frame: ShotFrame,
+        now: datetime | None = None,
+        versions: Mapping[str, Hashable] | None = None,
+    ) -> list[Insight]:
+        """
+        Evaluate the clubs of ``frame`` whose inputs changed and return the insights to
+        emit.
+
+        :param frame: shots, outliers are left out if ``config.exclude_outliers``
+        :param now: end of the time windows, each club's most recent shot by default;
+            a different ``now`` re-evaluates every club
+        :param versions: per club, a value that changes whenever its rollups do, e.g.
+            ``RollupEngine.version``; derived from the frame for clubs left out
+        """
+        versions = versions or {}
+        self._expire()
+        stale: dict[str, Hashable] = {}
+        for club, columns in frame.items():
+            version = (versions[club] if club in versions else _fingerprint(columns), now)
+            if self._versions.get(club) != version:
+                stale[club] = version
+        self.skipped += len(frame.clubs) - len(stale)
+        self.evaluated += len(stale)
+        if not stale:
+            return []
+
+        stats_ = compute_insight_stats(frame, self.config, now=now, clubs=list(stale))
+        evaluated_at = self._clock()
+        emitted: list[Insight] = []
+        passing: set[InsightKey] = set()
+        for insight in generate_insights(frame, self.config, now, stats_):
+            key, state = InsightKey.of(insight), InsightState.of(insight)
+            passing.add(key)
+            entry = self._entries.get(key)
+            if entry is not None and not state.differs(entry.state):
+                self.suppressed += 1
+                entry.evaluated_at = evaluated_at
+                entry.passing = True
+                self._entries.move_to_end(key)
+                continue
+            self._entries[key] = _Entry(state, insight, evaluated_at)
+            self._entries.move_to_end(key)
+            self._keys.setdefault(key.club, set()).add(key)
+            emitted.append(insight)
+
+        for club, version in stale.items():
+            for key in self._keys.get(club, set()) - passing:
+                entry = self._entries[key]
+                entry.passing = False
+                entry.evaluated_at = evaluated_at
+                self._entries.move_to_end(key)
+            self._versions[club] = version
+        while len(self._entries) > self.max_entries:
+            self._forget(next(iter(self._entries)))
+        return emitted
+
+    def current(self, club: str | None = None) -> list[Insight]:
+        """The last insight emitted for every key still passing the thresholds"""
+        return [
+            entry.insight
+            for key, entry in self._entries.items()
+            if entry.passing and (club is None or key.club == club)
+        ]
+
+    def invalidate(self, club: str | None = None) -> None:
+        """Evaluate ``club`` (or every club) on the next update, e.g. after a retag"""
+        if club is None:
+            self._versions.clear()
+        else:
+            self._versions.pop(club, None)
+
+    def _forget(self, key: InsightKey) -> None:
+        del self._entries[key]
+        keys = self._keys[key.club]
+        keys.discard(key)
+        if not keys:
+            del self._keys[key.club]
+            self._versions.pop(key.club, None)
+
+    def _expire(self) -> None:
+        oldest = self._clock() - self.ttl
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.evaluated_at > oldest:
+                break
+            self._forget(key)
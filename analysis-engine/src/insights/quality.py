@@ -0,0 +1,191 @@
+"""
+Shot quality: how far a shot's launch, spin and carry are from the optimum for its
+ball speed and angle of attack, and what to change to get closer.
+"""
+
+from dataclasses import dataclass
+from functools import cache
+
+import numpy as np
+import numpy.typing as npt
+
+from models.chartgrid import Edge, Method
+from models.optimalshotchart import OPTIMAL_SHOT_CHART, OptimalShotChartModel
+
+
+FloatArray = npt.NDArray[np.float64]
+
+# carry as a fraction of the optimal carry needed for each grade, best first
+GRADES = ("A", "B", "C", "D")
+GRADE_THRESHOLDS = (0.97, 0.92, 0.85)
+
+# deviations from the optimum considered on target
+LAUNCH_TOLERANCE = 1.5  # degrees
+SPIN_TOLERANCE = 300.0  # rpm
+
+HINTS = (
+    "Launch and spin are on target.",
+    "Launch is too high, deloft or move the ball back.",
+    "Launch is too low, add loft or move the ball forward.",
+    "Spin is too high, swing shallower or use a lower spinning ball.",
+    "Spin is too low, strike lower on the face or add loft.",
+)
+HINT_ON_TARGET, HINT_LAUNCH_HIGH, HINT_LAUNCH_LOW, HINT_SPIN_HIGH, HINT_SPIN_LOW = range(5)
+
+# spacing of the candidate angles of attack tried across the chart when inferring a
+# missing one, and how a launch difference weighs against a spin difference (2 degrees
+# of AoA move launch ~1.4 deg, spin ~150 rpm)
+AOA_STEP = 0.25
+LAUNCH_SCALE = 1.0
+SPIN_SCALE = 100.0
+
+
+@dataclass(frozen=True)
+class ShotScores:
+    """
+    Per-shot scores, one entry per shot in every column.
+
+    Deltas are the shot's value minus the chart's optimum, so a positive
+    ``spin_delta`` means the shot spun more than optimal.
+    """
+
+    angle_of_attack: FloatArray
+    aoa_inferred: npt.NDArray[np.bool_]
+    optimal_launch: FloatArray
+    optimal_spin: FloatArray
+    optimal_carry: FloatArray
+    launch_delta: FloatArray
+    spin_delta: FloatArray
+    carry_delta: FloatArray
+    efficiency: FloatArray
+    grade: npt.NDArray[np.str_]
+    hint_code: npt.NDArray[np.intp]
+
+    def __len__(self) -> int:
+        return len(self.grade)
+
+    @property
+    def hint(self) -> list[str]:
+        return [HINTS[code] for code in self.hint_code.tolist()]
+
+
+@cache
+def _default_chart() -> OptimalShotChartModel:
+    return OptimalShotChartModel(OPTIMAL_SHOT_CHART)
+
+
+def _aoa_candidates(chart: OptimalShotChartModel) -> FloatArray:
+    """Every ``AOA_STEP`` across the chart's angles of attack, and the chart's own"""
+    angles = chart.grid.attack_angles
+    steps = np.arange(angles[0], angles[-1] + AOA_STEP / 2, AOA_STEP)
+    return np.union1d(steps[steps <= angles[-1]], angles)
+
+
+def infer_angle_of_attack(
+    ball_speed: FloatArray,
+    launch: FloatArray,
+    spin: FloatArray,
+    chart: OptimalShotChartModel | None = None,
+    method: Method = "bilinear",
+) -> FloatArray:
+    """
+    The angle of attack whose optimal launch and spin at each shot's ball speed are
+    nearest to the shot's launch and spin.
+    """
+    chart = chart or _default_chart()
+    candidates = _aoa_candidates(chart)
+    ball_speed = np.asarray(ball_speed, dtype=np.float64)
+    # (shots, candidates, fields)
+    optimum = chart.lookup(ball_speed[:, None], candidates[None, :], method=method)
+    distance = ((optimum[..., 0] - np.asarray(launch)[:, None]) / LAUNCH_SCALE) ** 2 + (
+        (optimum[..., 1] - np.asarray(spin)[:, None]) / SPIN_SCALE
+    ) ** 2
+    return candidates[np.argmin(distance, axis=1)]
+
+
+def score_shots(
+    ball_speed: npt.ArrayLike,
+    launch: npt.ArrayLike,
+    spin: npt.ArrayLike,
+    carry: npt.ArrayLike,
+    angle_of_attack: npt.ArrayLike | None = None,
+    *,
+    chart: OptimalShotChartModel | None = None,
+    method: Method = "bilinear",
+    edge: Edge = "clamp",
+) -> ShotScores:
+    """
+    Grade shots against the optimal shot chart.
+
+    Every shot is compared to the chart interpolated at its ball speed and angle of
+    attack. Where the angle of attack is missing (``None``, or NaN for individual shots)
+    it is inferred from the launch / spin pair.
+
+    :param ball_speed: ball speed of each shot in mph
+    :param launch: launch angle in degrees
+    :param spin: total spin in rpm
+    :param carry: carry distance in yards
+    :param angle_of_attack: angle of attack in degrees, if the launch monitor has it
+    :param chart: chart to grade against, the published optimal shot chart by default
+    :param method: chart interpolation, see ``ChartGrid.lookup``
+    :param edge: handling of shots outside the chart, see ``ChartGrid.lookup``
+
+    Example:
+
+        scores = score_shots(speeds, launches, spins, carries)
+        worst = np.argsort(scores.efficiency)[:5]
+
+    """
+    chart = chart or _default_chart()
+    ball_speed = np.atleast_1d(np.asarray(ball_speed, dtype=np.float64))
+    launch = np.atleast_1d(np.asarray(launch, dtype=np.float64))
+    spin = np.atleast_1d(np.asarray(spin, dtype=np.float64))
+    carry = np.atleast_1d(np.asarray(carry, dtype=np.float64))
+
+    if angle_of_attack is None:
+        aoa = np.full(len(ball_speed), np.nan)
+    else:
+        aoa = np.atleast_1d(np.array(angle_of_attack, dtype=np.float64))
+    missing = np.isnan(aoa)
+    if missing.any():
+        aoa[missing] = infer_angle_of_attack(
+            ball_speed[missing], launch[missing], spin[missing], chart, method
+        )
+
+    optimum = chart.lookup(ball_speed, aoa, method=method, edge=edge)
+    optimal_launch, optimal_spin, optimal_carry = optimum[:, 0], optimum[:, 1], optimum[:, 2]
+    launch_delta = launch - optimal_launch
+    spin_delta = spin - optimal_spin
+    efficiency = carry / optimal_carry
+
+    grade_index = np.searchsorted(-np.asarray(GRADE_THRESHOLDS), -efficiency, side="left")
+    grade = np.asarray(GRADES)[grade_index]
+
+    # the hint addresses whichever of launch and spin is further off, relative to tolerance
+    launch_off = launch_delta / LAUNCH_TOLERANCE
+    spin_off = spin_delta / SPIN_TOLERANCE
+    hint_code = np.select(
+        [
+            (np.abs(launch_off) <= 1) & (np.abs(spin_off) <= 1),
+            np.abs(launch_off) >= np.abs(spin_off),
+        ],
+        [
+            HINT_ON_TARGET,
+            np.where(launch_off > 0, HINT_LAUNCH_HIGH, HINT_LAUNCH_LOW),
+        ],
+        np.where(spin_off > 0, HINT_SPIN_HIGH, HINT_SPIN_LOW),
+    ).astype(np.intp)
+
+    return ShotScores(
+        angle_of_attack=aoa,
+        aoa_inferred=missing,
+        optimal_launch=optimal_launch,
+        optimal_spin=optimal_spin,
+        optimal_carry=optimal_carry,
+        launch_delta=launch_delta,
+        spin_delta=spin_delta,
+        carry_delta=carry - optimal_carry,
+        efficiency=efficiency,
+        grade=grade,
+        hint_code=hint_code,
+    )
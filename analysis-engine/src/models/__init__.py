@@ -1 +1,22 @@
 """Pydantic models for shots, insights, and rollups."""
+
+from .models import (
+    METRICS,
+    Insight,
+    Metric,
+    Rollup,
+    Shot,
+    ShotMetrics,
+    TrendEngineConfig,
+)
+
+
+__all__ = [
+    "METRICS",
+    "Insight",
+    "Metric",
+    "Rollup",
+    "Shot",
+    "ShotMetrics",
+    "TrendEngineConfig",
+]
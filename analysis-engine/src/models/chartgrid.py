@@ -0,0 +1,175 @@
+"""
+Dense grid form of the optimal shot chart with vectorized interpolation.
+"""
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+import numpy.typing as npt
+
+
+FIELDS = ("launch", "spin", "carry", "legend")
+
+Method = Literal["bilinear", "bicubic"]
+Edge = Literal["clamp", "extrapolate", "nan"]
+ArrayLike = float | Sequence[float] | npt.NDArray[np.floating]
+
+
+def _uniform_step(axis: npt.NDArray[np.float64]) -> float | None:
+    steps = np.diff(axis)
+    return float(steps[0]) if np.allclose(steps, steps[0]) else None
+
+
+def _fractional_index(
+    axis: npt.NDArray[np.float64], step: float | None, x: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Position of ``x`` along the sorted ``axis`` in units of cells, e.g. 1.5 halfway
+    between ``axis[1]`` and ``axis[2]``. Values outside the axis extend the first or
+    last cell linearly.
+    """
+    if step is not None:
+        # evenly spaced, as the published chart is
+        return (x - axis[0]) / step
+    i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+    return i + (x - axis[i]) / (axis[i + 1] - axis[i])
+
+
+def _cubic_weights(f: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Catmull-Rom weights of the samples at offsets -1, 0, 1, 2 from the cell start,
+    stacked on a new last axis.
+    """
+    f2 = f * f
+    f3 = f2 * f
+    return np.stack(
+        (
+            -0.5 * f3 + f2 - 0.5 * f,
+            1.5 * f3 - 2.5 * f2 + 1.0,
+            -1.5 * f3 + 2.0 * f2 + 0.5 * f,
+            0.5 * f3 - 0.5 * f2,
+        ),
+        axis=-1,
+    )
+
+
+@dataclass(frozen=True)
+class ChartGrid:
+    """
+    The optimal shot chart as one ``(field, speed, attack angle)`` array over sorted
+    ascending axes, so that any ball speed / angle of attack can be interpolated in
+    constant time, and whole arrays of shots in a single vectorized call.
+
+    :param speeds: ball speeds in mph, ascending
+    :param attack_angles: angles of attack in degrees, ascending
+    :param values: launch, spin, carry and legend value, shape ``(4, speeds, attack_angles)``
+    """
+
+    speeds: npt.NDArray[np.float64]
+    attack_angles: npt.NDArray[np.float64]
+    values: npt.NDArray[np.float64]
+    _speed_step: float | None = field(init=False, repr=False)
+    _aoa_step: float | None = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_speed_step", _uniform_step(self.speeds))
+        object.__setattr__(self, "_aoa_step", _uniform_step(self.attack_angles))
+
+    @classmethod
+    def from_chart(cls, chart: Mapping[tuple[float, float], Sequence[float]]) -> "ChartGrid":
+        """
+        Compile a ``{(ball speed, angle of attack): [launch, spin, carry, legend]}`` chart.
+        Every speed must have an entry for every angle of attack.
+        """
+        speeds = np.array(sorted({k[0] for k in chart}), dtype=np.float64)
+        attack_angles = np.array(sorted({k[1] for k in chart}), dtype=np.float64)
+        if len(speeds) < 2 or len(attack_angles) < 2:
+            raise ValueError("chart needs at least two ball speeds and two attack angles")
+        if len(chart) != len(speeds) * len(attack_angles):
+            raise ValueError(
+                f"chart has {len(chart)} entries, a full {len(speeds)}x{len(attack_angles)} "
+                "grid is needed"
+            )
+
+        speed_index = {s: i for i, s in enumerate(speeds.tolist())}
+        aoa_index = {a: j for j, a in enumerate(attack_angles.tolist())}
+        values = np.empty((len(FIELDS), len(speeds), len(attack_angles)), dtype=np.float64)
+        for (speed, aoa), entry in chart.items():
+            values[:, speed_index[speed], aoa_index[aoa]] = entry
+        return cls(speeds, attack_angles, values)
+
+    def field_grid(self, name: str) -> npt.NDArray[np.float64]:
+        """
+        The ``(speed, attack angle)`` grid of one of ``FIELDS``.
+        """
+        return self.values[FIELDS.index(name)]
+
+    def lookup(
+        self,
+        ball_speed: ArrayLike,
+        angle_of_attack: ArrayLike,
+        *,
+        method: Method = "bilinear",
+        edge: Edge = "clamp",
+    ) -> npt.NDArray[np.float64]:
+        """
+        Interpolate launch, spin, carry and legend value at each (speed, angle) pair.
+
+        :param ball_speed: ball speeds in mph, broadcast against ``angle_of_attack``
+        :param angle_of_attack: angles of attack in degrees
+        :param method: ``"bilinear"`` or ``"bicubic"`` (Catmull-Rom, passes through the
+            chart values like bilinear but with a continuous slope)
+        :param edge: what to do outside the chart: ``"clamp"`` to the nearest edge,
+            ``"extrapolate"`` from the edge cells, or return ``"nan"``
+        :return: array of shape ``broadcast(ball_speed, angle_of_attack).shape + (4,)``,
+            NaN wherever the speed or angle is NaN or infinite
+        """
+        if edge not in ("clamp", "extrapolate", "nan"):
+            raise ValueError(f"unknown edge mode {edge!r}")
+        speed = np.asarray(ball_speed, dtype=np.float64)
+        aoa = np.asarray(angle_of_attack, dtype=np.float64)
+        speed, aoa = np.broadcast_arrays(speed, aoa)
+        n_speeds, n_aoas = len(self.speeds), len(self.attack_angles)
+
+        ts: npt.NDArray[np.float64] = _fractional_index(self.speeds, self._speed_step, speed)
+        ta: npt.NDArray[np.float64] = _fractional_index(self.attack_angles, self._aoa_step, aoa)
+        # no reading, no cell: look those up at the first cell and blank them below
+        missing = ~(np.isfinite(ts) & np.isfinite(ta))
+        ts = np.where(missing, 0.0, ts)
+        ta = np.where(missing, 0.0, ta)
+        outside = (ts < 0) | (ts > n_speeds - 1) | (ta < 0) | (ta > n_aoas - 1)
+        if edge != "extrapolate":
+            ts = np.clip(ts, 0, n_speeds - 1)
+            ta = np.clip(ta, 0, n_aoas - 1)
+
+        # cell containing the point, the last cell for points on or past the far edge
+        i = np.clip(np.floor(ts), 0, n_speeds - 2).astype(np.intp)
+        j = np.clip(np.floor(ta), 0, n_aoas - 2).astype(np.intp)
+        fs = ts - i
+        fa = ta - j
+
+        if method == "bilinear":
+            # gather the four corners in one take over the flattened grid
+            v = self.values.reshape(len(FIELDS), -1)
+            k = i * n_aoas + j
+            corners = np.take(v, np.stack((k, k + n_aoas, k + 1, k + n_aoas + 1)), axis=1)
+            gs, ga = 1 - fs, 1 - fa
+            weights = np.stack((gs * ga, fs * ga, gs * fa, fs * fa))
+            result = (corners * weights).sum(axis=1)
+        elif method == "bicubic":
+            offsets = np.arange(-1, 3)
+            # 4x4 neighbourhood, repeating the edge samples past the border
+            ii = np.clip(i[..., None] + offsets, 0, n_speeds - 1)[..., :, None]
+            jj = np.clip(j[..., None] + offsets, 0, n_aoas - 1)[..., None, :]
+            weights = _cubic_weights(fs)[..., :, None] * _cubic_weights(fa)[..., None, :]
+            result = (self.values[:, ii, jj] * weights).sum(axis=(-2, -1))
+        else:
+            raise ValueError(f"unknown interpolation method {method!r}")
+
+        result = np.moveaxis(result, 0, -1)
+        if edge == "nan":
+            result[outside] = np.nan
+        result[missing] = np.nan
+        return result
@@ -0,0 +1,224 @@
+"""
+Headless rendering of the optimal shot chart to PNG / SVG bytes.
+
+matplotlib is only imported on the first render, so reading the chart data never pays
+for it, and rendering uses a plain ``Figure`` on the Agg canvas rather than pyplot so
+it is safe in a server. Rendered images are cached by the content of the chart and
+the overlay, so serving the same chart again costs a dict lookup.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from itertools import pairwise
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+    from models.optimalshotchart import OptimalShotChartModel
+
+
+Format = Literal["png", "svg"]
+
+CONTENT_TYPES: dict[str, str] = {"png": "image/png", "svg": "image/svg+xml"}
+
+# legend value (yards) -> cell colour
+COLOR_MAP = {
+    100: "#E06666",  # Dark Red
+    150: "#F4CCCC",  # Red
+    200: "#F9CB9C",  # Orange
+    225: "#FFE599",  # Light Orange
+    250: "#FFF2CC",  # Yellow
+    275: "#D9EAD3",  # Yellow-Green
+    300: "#93C47D",  # Light Green
+    325: "#6AA84F",  # Dark Green
+}
+
+TITLE = "Total Distance, Carry, Launch & Spin by Attack Angle"
+
+
+class Overlay(NamedTuple):
+    """
+    A player's shots drawn over the chart.
+    """
+
+    ball_speed: npt.NDArray[np.float64]
+    angle_of_attack: npt.NDArray[np.float64]
+
+    @classmethod
+    def of(cls, ball_speed: Sequence[float], angle_of_attack: Sequence[float]) -> "Overlay":
+        return cls(
+            np.asarray(ball_speed, dtype=np.float64), np.asarray(angle_of_attack, dtype=np.float64)
+        )
+
+    def digest(self) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(np.ascontiguousarray(self.ball_speed).tobytes())
+        h.update(np.ascontiguousarray(self.angle_of_attack).tobytes())
+        return h.hexdigest()
+
+
+class RenderedChart(NamedTuple):
+    data: bytes
+    content_type: str
+    etag: str
+
+
+def chart_digest(chart: "OptimalShotChartModel") -> str:
+    """
+    Content hash of a chart, equal for charts with the same entries.
+    """
+    grid = chart.grid
+    h = hashlib.blake2b(digest_size=16)
+    for array in (grid.speeds, grid.attack_angles, grid.values):
+        h.update(np.ascontiguousarray(array).tobytes())
+    return h.hexdigest()
+
+
+def draw_chart(ax: "Axes", chart: "OptimalShotChartModel", overlay: Overlay | None = None) -> None:
+    """
+    Draw the chart onto ``ax``: one mesh for all the cells, one label per cell.
+    """
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+    from matplotlib.patches import Patch
+
+    # matplotlib's stubs leave the plotting calls' **kwargs untyped
+    axes: Any = ax
+    grid = chart.grid
+    speeds, angles = grid.speeds, grid.attack_angles
+    launch, spin, carry, legend = grid.values
+
+    levels = sorted(COLOR_MAP)
+    cmap = ListedColormap([COLOR_MAP[v] for v in levels])
+    # a bin around each legend value so every cell maps to exactly its colour
+    bounds = [levels[0] - 1, *((a + b) / 2 for a, b in pairwise(levels)), levels[-1] + 1]
+    axes.pcolormesh(
+        np.arange(len(angles) + 1),
+        np.arange(len(speeds) + 1),
+        legend,
+        cmap=cmap,
+        norm=BoundaryNorm(bounds, cmap.N),
+        edgecolors="grey",
+        linewidth=0.5,
+    )
+
+    for i in range(len(speeds)):
+        for j in range(len(angles)):
+            axes.text(
+                j + 0.5,
+                i + 0.5,
+                f"{int(carry[i, j])}\n{launch[i, j]}°\n{int(spin[i, j])}",
+                ha="center",
+                va="center",
+                fontsize=7,
+                linespacing=1.3,
+            )
+
+    if overlay is not None and len(overlay.ball_speed):
+        # cell centres sit at index + 0.5, shots outside the chart are pinned to its edge
+        x = np.interp(overlay.angle_of_attack, angles, np.arange(len(angles))) + 0.5
+        y = np.interp(overlay.ball_speed, speeds, np.arange(len(speeds))) + 0.5
+        axes.scatter(x, y, s=24, c="black", edgecolors="white", linewidths=0.8, zorder=3)
+
+    axes.set_xticks(np.arange(len(angles)) + 0.5)
+    axes.set_xticklabels([f"{a:g}" for a in angles])
+    axes.set_yticks(np.arange(len(speeds)) + 0.5)
+    axes.set_yticklabels([f"{s:g}" for s in speeds])
+    axes.set_xlim(0, len(angles))
+    axes.set_ylim(0, len(speeds))
+    axes.set_title(TITLE, fontsize=14, pad=20)
+    axes.set_xlabel("Attack Angle", fontweight="bold")
+    axes.set_ylabel("Ball Speed (mph)", fontweight="bold")
+    axes.legend(
+        handles=[Patch(facecolor=COLOR_MAP[v], label=str(v)) for v in reversed(levels)],
+        title="LEGEND\nyards",
+        loc="upper left",
+        bbox_to_anchor=(1.01, 1.0),
+    )
+
+
+class ChartRenderer:
+    """
+    Renders charts to image bytes, keeping the ``maxsize`` most recently used images.
+
+    :param maxsize: number of rendered images kept
+    :param figsize: figure size in inches
+    :param dpi: resolution of PNG images
+
+    Example:
+
+        image = renderer.render(chart, "png", Overlay.of(speeds, angles))
+        return Response(image.data, media_type=image.content_type, headers={"ETag": image.etag})
+
+    """
+
+    def __init__(self, maxsize: int = 32, figsize: tuple[float, float] = (16, 10), dpi: int = 100):
+        self.maxsize = maxsize
+        self.figsize = figsize
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple[str, str, str], RenderedChart] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        chart: "OptimalShotChartModel",
+        fmt: Format = "png",
+        overlay: Overlay | None = None,
+    ) -> RenderedChart:
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f"unsupported format {fmt!r}")
+        key = (chart_digest(chart), overlay.digest() if overlay is not None else "", fmt)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        image = RenderedChart(
+            self._draw(chart, fmt, overlay), CONTENT_TYPES[fmt], f'"{"-".join(key)}"'
+        )
+        with self._lock:
+            self._cache[key] = image
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return image
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _draw(self, chart: "OptimalShotChartModel", fmt: Format, overlay: Overlay | None) -> bytes:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        figure: Any = Figure(figsize=self.figsize, dpi=self.dpi, layout="tight")  # see draw_chart
+        FigureCanvasAgg(figure)
+        draw_chart(figure.add_subplot(), chart, overlay)
+        buf = io.BytesIO()
+        options: dict[str, Any] = {"metadata": {"Date": None}} if fmt == "svg" else {}
+        figure.savefig(buf, format=fmt, **options)
+        return buf.getvalue()
+
+
+_default_renderer = ChartRenderer()
+
+
+def render_chart(
+    chart: "OptimalShotChartModel",
+    fmt: Format = "png",
+    overlay: Overlay | None = None,
+) -> RenderedChart:
+    """
+    Render ``chart`` with the shared, cached renderer.
+    """
+    return _default_renderer.render(chart, fmt, overlay)
@@ -0,0 +1,308 @@
+"""
+Columnar shot storage for vectorized statistics.
+
+A ``ShotFrame`` keeps the shots of each club in their own set of NumPy columns, in
+capture order, so that "the last 25 7i shots" or "the 7i shots of the past 30 days" are
+plain slices (views, no copies) and every statistic runs on contiguous arrays instead
+of looping over ``Shot`` models.
+"""
+
+import json
+import sqlite3
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from models.models import Shot
+
+
+# column -> dtype, captured_at is microseconds since the Unix epoch (UTC)
+COLUMNS: dict[str, np.dtype[Any]] = {
+    "captured_at": np.dtype(np.int64),
+    "carry": np.dtype(np.float64),
+    "offline": np.dtype(np.float64),
+    "ball_speed": np.dtype(np.float64),
+    "spin": np.dtype(np.float64),
+    "launch_angle": np.dtype(np.float64),
+    "launch_direction": np.dtype(np.float64),
+    "session": np.dtype(np.int32),
+    "is_outlier": np.dtype(np.bool_),
+}
+
+# layout of the rows ``ShotFrame.from_rows`` reads, e.g. from the server's shots table
+ROW_FIELDS = (
+    "captured_at",
+    "club",
+    "session_id",
+    "carry",
+    "offline",
+    "ball_speed",
+    "spin",
+    "launch_angle",
+    "launch_direction",
+    "is_outlier",
+)
+SELECT_ROWS_SQL = f"SELECT {', '.join(ROW_FIELDS)} FROM shots ORDER BY captured_at"
+
+NO_SESSION = -1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def to_micros(t: datetime) -> int:
+    """Microseconds since the epoch, naive datetimes are taken as UTC"""
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=UTC)
+    delta = t - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(us: int) -> datetime:
+    return datetime.fromtimestamp(us / 1_000_000, UTC)
+
+
+class ShotColumns:
+    """
+    The shots of one club as growable columns, in the order they were appended.
+
+    Appending doubles the capacity when it runs out, so it is amortized O(1). Slices
+    share memory with the columns they were taken from, and are themselves full, so
+    appending to a slice copies it rather than overwriting its parent.
+    """
+
+    def __init__(self, capacity: int = 64, columns: dict[str, npt.NDArray[Any]] | None = None):
+        if columns is None:
+            self._data = {name: np.empty(capacity, dtype) for name, dtype in COLUMNS.items()}
+            self._len = 0
+        else:
+            self._data = columns
+            self._len = len(columns["captured_at"])
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, name: str) -> npt.NDArray[Any]:
+        """A column, as a view of the shots appended so far"""
+        return self._data[name][: self._len]
+
+    def __getattr__(self, name: str) -> npt.NDArray[Any]:
+        if name in COLUMNS:
+            return self[name]
+        raise AttributeError(name)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data["captured_at"])
+
+    def _reserve(self, n: int) -> None:
+        if n <= self.capacity:
+            return
+        capacity = max(n, 2 * self.capacity, 16)
+        for name, column in self._data.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[: self._len] = column[: self._len]
+            self._data[name] = grown
+
+    def append(self, **values: Any) -> None:
+        """Append one shot, given as a value for every column of ``COLUMNS``"""
+        self._reserve(self._len + 1)
+        i = self._len
+        for name, column in self._data.items():
+            column[i] = values[name]
+        self._len += 1
+
+    def extend(self, columns: dict[str, npt.ArrayLike]) -> None:
+        """Append many shots at once, given as one array per column"""
+        n = len(np.asarray(columns["captured_at"]))
+        self._reserve(self._len + n)
+        for name, column in self._data.items():
+            column[self._len : self._len + n] = columns[name]
+        self._len += n
+
+    def slice(self, start: int, stop: int) -> "ShotColumns":
+        return ShotColumns(columns={name: self[name][start:stop] for name in COLUMNS})
+
+    def last(self, n: int) -> "ShotColumns":
+        """The ``n`` most recent shots, a view"""
+        return self.slice(max(self._len - n, 0), self._len)
+
+    def between(self, start: datetime | int, end: datetime | int) -> "ShotColumns":
+        """
+        Shots captured in ``(start, end]``, a view. Requires the shots to have been
+        appended in capture order, as ``ShotFrame`` does.
+        """
+        start_us = to_micros(start) if isinstance(start, datetime) else start
+        end_us = to_micros(end) if isinstance(end, datetime) else end
+        captured_at = self["captured_at"]
+        lo = int(np.searchsorted(captured_at, start_us, side="right"))
+        hi = int(np.searchsorted(captured_at, end_us, side="right"))
+        return self.slice(lo, hi)
+
+    def is_sorted(self) -> bool:
+        captured_at = self["captured_at"]
+        return bool(np.all(captured_at[1:] >= captured_at[:-1]))
+
+
+class ShotFrame:
+    """
+    Shots partitioned by club into ``ShotColumns``.
+
+    Clubs and sessions are stored as indexes into ``clubs`` / ``sessions``; a shot
+    without a session has session ``NO_SESSION``.
+
+    Example:
+
+        frame = ShotFrame.from_rows(conn.execute(SELECT_ROWS_SQL))
+        recent = frame["7i"].last(25)
+        recent.carry.mean(), recent.offline.std()
+
+    """
+
+    def __init__(self) -> None:
+        self.clubs: list[str] = []
+        self.sessions: list[str] = []
+        self._partitions: list[ShotColumns] = []
+        self._club_index: dict[str, int] = {}
+        self._session_index: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self._partitions)
+
+    def __contains__(self, club: str) -> bool:
+        return club in self._club_index
+
+    def __getitem__(self, club: str) -> ShotColumns:
+        return self._partitions[self._club_index[club]]
+
+    def items(self) -> Iterator[tuple[str, ShotColumns]]:
+        return zip(self.clubs, self._partitions, strict=True)
+
+    def club_index(self, club: str) -> int:
+        i = self._club_index.get(club)
+        if i is None:
+            i = self._club_index[club] = len(self.clubs)
+            self.clubs.append(club)
+            self._partitions.append(ShotColumns())
+        return i
+
+    def session_index(self, session_id: str | None) -> int:
+        if session_id is None:
+            return NO_SESSION
+        i = self._session_index.get(session_id)
+        if i is None:
+            i = self._session_index[session_id] = len(self.sessions)
+            self.sessions.append(session_id)
+        return i
+
+    def append(self, shot: Shot) -> None:
+        """Append a shot, which must not be older than the club's latest shot"""
+        partition = self._partitions[self.club_index(shot.club)]
+        captured_at = to_micros(shot.captured_at)
+        if len(partition) and captured_at < partition["captured_at"][-1]:
+            raise ValueError(f"shot {shot.id} is older than the latest {shot.club} shot")
+        m = shot.metrics
+        partition.append(
+            captured_at=captured_at,
+            carry=m.carry,
+            offline=m.offline,
+            ball_speed=m.ball_speed,
+            spin=m.spin,
+            launch_angle=np.nan if m.launch_angle is None else m.launch_angle,
+            launch_direction=np.nan if m.launch_direction is None else m.launch_direction,
+            session=self.session_index(shot.session_id),
+            is_outlier=shot.is_outlier,
+        )
+
+    @classmethod
+    def from_shots(cls, shots: Iterable[Shot]) -> "ShotFrame":
+        frame = cls()
+        for shot in sorted(shots, key=lambda s: s.captured_at):
+            frame.append(shot)
+        return frame
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[Any, ...]] | sqlite3.Cursor) -> "ShotFrame":
+        """
+        Build a frame from rows laid out as ``ROW_FIELDS``, e.g. straight from a
+        ``SELECT_ROWS_SQL`` cursor. ``captured_at`` is in microseconds since the epoch,
+        missing launch values are NULL.
+
+        The rows are read in one pass into a structured array and then split per club
+        with one gather per column, no Python object is kept per shot.
+        """
+        frame = cls()
+        dtype = np.dtype(
+            [
+                ("captured_at", np.int64),
+                ("club", np.int32),
+                ("session", np.int32),
+                *((name, np.float64) for name in ROW_FIELDS[3:9]),
+                ("is_outlier", np.bool_),
+            ]
+        )
+
+        def _encoded(row: tuple[Any, ...]) -> tuple[Any, ...]:
+            captured_at, club, session_id, *metrics, is_outlier = row
+            return (
+                captured_at,
+                frame.club_index(club),
+                frame.session_index(session_id),
+                *(np.nan if v is None else v for v in metrics),
+                bool(is_outlier),
+            )
+
+        records = np.fromiter(map(_encoded, rows), dtype=dtype)
+        if not len(records):
+            return frame
+
+        # stable, so each club keeps capture order
+        order = np.argsort(records["club"], kind="stable")
+        bounds = np.searchsorted(records["club"][order], np.arange(len(frame.clubs) + 1))
+        for i, partition in enumerate(frame._partitions):
+            rows_of_club = order[bounds[i] : bounds[i + 1]]
+            if not np.all(np.diff(records["captured_at"][rows_of_club]) >= 0):
+                rows_of_club = rows_of_club[
+                    np.argsort(records["captured_at"][rows_of_club], kind="stable")
+                ]
+            partition.extend({name: records[name][rows_of_club] for name in COLUMNS})
+        return frame
+
+    def save(self, path: str | Path) -> None:
+        """
+        Write the frame to the directory ``path``, one ``.npy`` file per club and column.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for i, partition in enumerate(self._partitions):
+            club_dir = path / str(i)
+            club_dir.mkdir(exist_ok=True)
+            for name in COLUMNS:
+                np.save(club_dir / f"{name}.npy", partition[name])
+        meta = {"clubs": self.clubs, "sessions": self.sessions}
+        (path / "frame.json").write_text(json.dumps(meta))
+
+    @classmethod
+    def load(cls, path: str | Path, mmap_mode: str | None = "r") -> "ShotFrame":
+        """
+        Open a frame written by ``save``. By default the columns are memory-mapped, so
+        only the pages a computation touches are read; appending to a club copies its
+        columns into memory.
+        """
+        path = Path(path)
+        meta = json.loads((path / "frame.json").read_text())
+        frame = cls()
+        for i, club in enumerate(meta["clubs"]):
+            columns = {
+                name: np.load(path / str(i) / f"{name}.npy", mmap_mode=mmap_mode)  # type: ignore[arg-type]
+                for name in COLUMNS
+            }
+            frame.clubs.append(club)
+            frame._club_index[club] = i
+            frame._partitions.append(ShotColumns(columns=columns))
+        for session_id in meta["sessions"]:
+            frame.session_index(session_id)
+        return frame
@@ -0,0 +1,71 @@
+"""
+Pydantic models of the trend engine, as laid out in spec/trend-engine.spec.md.
+"""
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+METRICS = ("carry", "offline", "ball_speed", "spin")
+Metric = Literal["carry", "offline", "ball_speed", "spin"]
+InsightKind = Literal["trend", "step_change", "consistency", "bias_shift"]
+
+
+class ShotMetrics(BaseModel):
+    carry: float  # Carry distance in yards
+    offline: float  # Offline distance (negative = left)
+    ball_speed: float  # Ball speed in mph
+    spin: int  # Spin rate in rpm
+    launch_angle: float | None = None
+    launch_direction: float | None = None
+
+
+class Shot(BaseModel):
+    id: str
+    captured_at: datetime
+    club: str
+    metrics: ShotMetrics
+    session_id: str | None = None
+    is_outlier: bool = False
+    outlier_reason: str | None = None
+
+
+class Rollup(BaseModel):
+    club: str
+    window: str  # "last_10", "last_25", "last_50", "last_7d", "last_30d"
+    metric: str  # "carry", "offline", "ball_speed", "spin"
+    mean: float
+    sd: float  # Standard deviation
+    median: float
+    iqr: float  # Interquartile range
+    n: int  # Sample size
+    updated_at: datetime
+
+
+class Insight(BaseModel):
+    id: str
+    club: str
+    metric: str
+    kind: InsightKind
+    window: str
+    baseline: str
+    delta: float
+    slope: float | None = None
+    ci: tuple[float, float]
+    p_value: float
+    effect_size: float
+    text: str
+    created_at: datetime
+
+
+class TrendEngineConfig(BaseModel):
+    windows: list[str] = ["last_10", "last_25", "last_50", "last_7d", "last_30d"]
+    baseline_window: str = "last_30d"
+    min_samples_trend: int = 20
+    min_samples_step: int = 10
+    p_value_threshold: float = 0.05
+    effect_size_threshold: float = 0.3
+    exclude_outliers: bool = True
+    outlier_mad_threshold: float = 3.0
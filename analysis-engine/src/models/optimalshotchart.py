@@ -1,6 +1,7 @@
 import numpy as np
 from typing import Dict, Tuple, List, Union
-import matplotlib.pyplot as plt
+
+from models.chartgrid import ChartGrid, Edge, Method
 
 # Type alias for the optimal shot chart data structure
 OptimalShotChart = Dict[Tuple[float, float], List[Union[float, int]]]
@@ -122,6 +123,13 @@ class OptimalShotChartModel:
     """
     def __init__(self, chart: OptimalShotChart):
         self.chart = chart
+        # compiled once, every lookup below is then a dict probe or array arithmetic
+        self.grid = ChartGrid.from_chart(chart)
+        self._rows_by_speed: Dict[float, OptimalShotChart] = {}
+        self._rows_by_angle: Dict[float, OptimalShotChart] = {}
+        for k, v in chart.items():
+            self._rows_by_speed.setdefault(k[0], {})[k] = v
+            self._rows_by_angle.setdefault(k[1], {})[k] = v
 
     def get_chart(self) -> OptimalShotChart:
         return self.chart
@@ -130,25 +138,25 @@ class OptimalShotChartModel:
         """
         Get all unique ball speeds in the chart.
         """
-        return sorted(set(k[0] for k in self.chart.keys()), reverse=True)
+        return self.grid.speeds[::-1].tolist()
     
     def get_attack_angles(self) -> List[float]:
         """
         Get all unique angle of attack values in the chart.
         """
-        return sorted(set(k[1] for k in self.chart.keys()))
+        return self.grid.attack_angles.tolist()
     
     def get_row_by_ball_speed(self, ball_speed: float) -> Dict[Tuple[float, float], List[Union[float, int]]]:
         """
         Get all entries for a specific ball speed.
         """
-        return {k: v for k, v in self.chart.items() if k[0] == ball_speed}
+        return dict(self._rows_by_speed.get(ball_speed, {}))
     
     def get_row_by_angle_of_attack(self, angle_of_attack: float) -> Dict[Tuple[float, float], List[Union[float, int]]]:
         """
         Get all entries for a specific angle of attack.
         """
-        return {k: v for k, v in self.chart.items() if k[1] == angle_of_attack}
+        return dict(self._rows_by_angle.get(angle_of_attack, {}))
     
     def get_entry(self, ball_speed: float, angle_of_attack: float) -> List[Union[float, int]]:
         """
@@ -156,6 +164,32 @@ class OptimalShotChartModel:
         """
         return self.chart.get((ball_speed, angle_of_attack), None)
 
+    def interpolate_entry(
+        self,
+        ball_speed: float,
+        angle_of_attack: float,
+        method: Method = "bilinear",
+        edge: Edge = "clamp",
+    ) -> List[float]:
+        """
+        Get the entry for any ball speed and angle of attack, interpolated between the
+        surrounding chart entries, e.g. for a 163.4 mph / -1.7° shot.
+        """
+        return self.grid.lookup(ball_speed, angle_of_attack, method=method, edge=edge).tolist()
+
+    def lookup(
+        self,
+        ball_speeds: np.ndarray,
+        angles_of_attack: np.ndarray,
+        method: Method = "bilinear",
+        edge: Edge = "clamp",
+    ) -> np.ndarray:
+        """
+        Interpolate the entries of many shots at once.
+        Returns an array of [Launch Angle, Spin Rate, Carry Distance, Color Legend Value] rows.
+        """
+        return self.grid.lookup(ball_speeds, angles_of_attack, method=method, edge=edge)
+
     def get_optimal_score_from_entry(self, ball_speed: float, angle_of_attack: float) -> int:
         """
         Get the optimal score (color legend value) from a specific entry.
@@ -168,73 +202,18 @@ class OptimalShotChartModel:
 
 def plot_optimal_shot_chart(data: OptimalShotChartModel):
     """
-    Plot the optimal shot chart.
-    Points are colored green if carry_distance >= color_legend_value (good/optimal), red otherwise (bad).
+    Plot the optimal shot chart in an interactive matplotlib window.
+    Cells are colored by their color legend value (carry band in yards).
+
+    Servers should use models.chartrender instead, which renders headless and caches.
     """
+    import matplotlib.pyplot as plt
 
-    color_map = {
-        100: "#E06666",  # Dark Red
-        150: "#F4CCCC",  # Red
-        200: "#F9CB9C",  # Orange
-        225: "#FFE599",  # Light Orange
-        250: "#FFF2CC",  # Yellow
-        275: "#D9EAD3",  # Yellow-Green
-        300: "#93C47D",  # Light Green
-        325: "#6AA84F"   # Dark Green
-    }
-
-    # Define the axes from the image
-
-
-    ball_speeds = data.get_ball_speeds()
-    attack_angles = data.get_attack_angles()
-
-    _, ax = plt.subplots(figsize=(16, 10))
-    chart = data.get_chart()
-
-    # Create the grid
-    for i, speed in enumerate(ball_speeds):
-        for j, angle in enumerate(attack_angles):
-            entry = data.get_entry(speed, angle)
-            if entry:
-                launch, spin, carry, color_val = entry
-                
-                # Draw the background color for the cell
-                rect = plt.Rectangle((j, len(ball_speeds) - 1 - i), 1, 1, 
-                                    facecolor=color_map.get(color_val, "white"), 
-                                    edgecolor="grey")
-                ax.add_patch(rect)
-                
-                # Add text labels inside each cell (Carry, Launch, Spin)
-                # Note: Total distance is omitted as it wasn't in the provided list structure
-                plt.text(j + 0.5, len(ball_speeds) - 1 - i + 0.7, f"{int(carry)}", 
-                        ha='center', va='center', fontweight='bold', fontsize=9)
-                plt.text(j + 0.5, len(ball_speeds) - 1 - i + 0.4, f"{launch}°", 
-                        ha='center', va='center', fontsize=8)
-                plt.text(j + 0.5, len(ball_speeds) - 1 - i + 0.15, f"{int(spin)}", 
-                        ha='center', va='center', fontsize=8)
-
-    # Configure Axis Labels and Titles
-    ax.set_xticks(np.arange(len(attack_angles)) + 0.5)
-    ax.set_xticklabels(attack_angles)
-    ax.set_yticks(np.arange(len(ball_speeds)) + 0.5)
-    ax.set_yticklabels(ball_speeds[::-1])
-
-    plt.title("Total Distance, Carry, Launch & Spin by Attack Angle", fontsize=14, pad=20)
-    plt.xlabel("Attack Angle", fontweight='bold')
-    plt.ylabel("Ball Speed (mph)", fontweight='bold')
-
-    # Add Legend simulation
-    plt.text(len(attack_angles) + 0.2, len(ball_speeds) - 1, "LEGEND\nyards", fontweight='bold')
-    for idx, (val, color) in enumerate(sorted(color_map.items())):
-        plt.Rectangle((len(attack_angles) + 0.2, idx), 0.5, 0.5, facecolor=color)
-        plt.text(len(attack_angles) + 0.8, idx + 0.25, str(val))
-
-    plt.xlim(0, len(attack_angles))
-    plt.ylim(0, len(ball_speeds))
-    plt.grid(False)
-    plt.show()
+    from models.chartrender import draw_chart
 
+    _, ax = plt.subplots(figsize=(16, 10), layout="tight")
+    draw_chart(ax, data)
+    plt.show()
 
 
 if __name__ == "__main__":
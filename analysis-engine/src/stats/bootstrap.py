@@ -0,0 +1,258 @@
+"""
+Before / after comparisons of tag segments (R-STAT-7).
+
+Segments around a tag ("lesson", "new shaft") are small and rarely normal, so the
+differences of their means, medians and SDs get percentile bootstrap intervals, and the
+difference of means a permutation test. Each comparison draws one index matrix per
+segment, ``[resample, shot]``, and turns it into a count matrix: every metric's
+resampled sums are then a single matrix product, and its resampled medians a cumulative
+sum over the counts in sorted order, instead of a Python loop over resamples.
+
+``compare_tag`` runs a comparison per club, optionally over a process pool; each club
+gets its own child of the ``seed`` sequence, so results do not depend on the pool.
+"""
+
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from math import isqrt
+
+import numpy as np
+import numpy.typing as npt
+
+from models.frame import ShotColumns, ShotFrame, to_micros
+from models.models import METRICS, TrendEngineConfig
+
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+Seed = int | np.random.SeedSequence | None
+
+DEFAULT_RESAMPLES = 10_000
+CONFIDENCE = 0.95
+_BLOCK_CELLS = 1 << 17  # resamples x shots drawn at once
+
+
+@dataclass(frozen=True)
+class SegmentComparison:
+    """
+    After minus before, one entry per metric; ``*_ci`` are ``[metric, 2]`` percentile
+    bootstrap intervals and ``p_value`` the two-sided permutation test of the means.
+    """
+
+    metrics: tuple[str, ...]
+    n_before: int
+    n_after: int
+    mean_diff: FloatArray
+    mean_ci: FloatArray
+    median_diff: FloatArray
+    median_ci: FloatArray
+    sd_diff: FloatArray
+    sd_ci: FloatArray
+    p_value: FloatArray
+
+
+def _resample_counts(rng: np.random.Generator, n: int, size: int) -> FloatArray:
+    """How many times each of ``n`` shots is drawn, per resample: ``[shot, size]``"""
+    idx = rng.integers(0, n, size=(n, size))
+    idx *= size
+    idx += np.arange(size)
+    return np.bincount(idx.ravel(), minlength=n * size).reshape(n, size).astype(np.float64)
+
+
+def _weighted_stats(
+    counts: FloatArray, values: FloatArray, order: IntArray
+) -> tuple[FloatArray, FloatArray, FloatArray]:
+    """
+    Mean, median and SD (``ddof=1``) of every resample ``[size, metric]``, given the
+    count matrix of the resamples and each metric's sort order ``[shot, metric]``.
+    """
+    n, n_metrics = values.shape
+    # centered, so that the sums of squares do not cancel
+    center = values.mean(axis=0)
+    centered = values - center
+    sums = (np.hstack((centered, centered * centered)).T @ counts).T / n
+    offset, squares = np.split(sums, 2, axis=1)
+    mean = center + offset
+    sd = np.sqrt(np.maximum(squares - offset * offset, 0.0) * n / (n - 1))
+
+    # the median of a resample is the value where the counts, summed in sorted order,
+    # reach n / 2. That is nearly always within a few sqrt(n) of the middle rank, so
+    # the counts below that band are summed with one product and only the band with
+    # cumulative sums; resamples whose median falls outside it take the long way.
+    lo, hi = (n - 1) // 2, n // 2
+    band = 3 * isqrt(n) // 2 + 2  # 3 SDs of the rank of the resampled median
+    first, last = max(lo - band, 0), min(hi + band + 1, n)
+    below = np.zeros((n_metrics, n))
+    for j in range(n_metrics):
+        below[j, order[:first, j]] = 1.0
+    counted = below @ counts
+    median = np.empty_like(mean)
+    for j in range(n_metrics):
+        sorted_values = values[order[:, j], j]
+        cumulative = np.cumsum(counts[order[first:last, j]], axis=0)
+        cumulative += counted[j]
+        # position in sorted order of the lo-th / hi-th smallest resampled value
+        at_lo = first + np.count_nonzero(cumulative <= lo, axis=0)
+        at_hi = at_lo if hi == lo else first + np.count_nonzero(cumulative <= hi, axis=0)
+        missed = (counted[j] > lo) | (cumulative[-1] <= hi)
+        if missed.any():
+            cumulative = np.cumsum(counts[order[:, j]][:, missed], axis=0)
+            at_lo[missed] = np.count_nonzero(cumulative <= lo, axis=0)
+            if hi != lo:
+                at_hi[missed] = np.count_nonzero(cumulative <= hi, axis=0)
+        median[:, j] = (sorted_values[at_lo] + sorted_values[at_hi]) / 2
+    return mean, median, sd
+
+
+def _percentile_ci(samples: FloatArray, confidence: float) -> FloatArray:
+    alpha = (1 - confidence) / 2
+    return np.quantile(samples, [alpha, 1 - alpha], axis=0).T
+
+
+def bootstrap_compare(
+    before: FloatArray,
+    after: FloatArray,
+    metrics: Sequence[str] = METRICS,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    seed: Seed = None,
+) -> SegmentComparison:
+    """
+    Compare two segments of shots, given as ``[shot, metric]`` arrays without NaNs.
+
+    :param before: the segment before the tag
+    :param after: the segment after the tag
+    :param metrics: names of the metric columns
+    :param n_resamples: bootstrap resamples, and permutations
+    :param confidence: level of the intervals
+    :param seed: seeds the resampling, for reproducible results
+    """
+    before = np.asarray(before, dtype=np.float64)
+    after = np.asarray(after, dtype=np.float64)
+    n_b, n_a = len(before), len(after)
+    if n_b < 2 or n_a < 2:
+        raise ValueError(f"need at least 2 shots per segment, got {n_b} and {n_a}")
+    if any(x.ndim != 2 or x.shape[1] != len(metrics) for x in (before, after)):
+        raise ValueError(
+            f"need {len(metrics)} metric columns, got shapes {before.shape} and {after.shape}"
+        )
+    rng = np.random.default_rng(seed)
+    order_b, order_a = np.argsort(before, axis=0), np.argsort(after, axis=0)
+
+    mean_b, median_b, sd_b = before.mean(0), np.median(before, 0), before.std(0, ddof=1)
+    mean_a, median_a, sd_a = after.mean(0), np.median(after, 0), after.std(0, ddof=1)
+
+    diffs = np.empty((3, n_resamples, len(metrics)))
+    block = max(_BLOCK_CELLS // (n_b + n_a), 1)
+    for start in range(0, n_resamples, block):
+        size = min(block, n_resamples - start)
+        stats_b = _weighted_stats(_resample_counts(rng, n_b, size), before, order_b)
+        stats_a = _weighted_stats(_resample_counts(rng, n_a, size), after, order_a)
+        for k in range(3):
+            diffs[k, start : start + size] = stats_a[k] - stats_b[k]
+
+    # permutations: the shots with the n_a smallest of a row of random keys go "after"
+    pooled = np.concatenate((before, after))
+    total = pooled.sum(axis=0)
+    observed_diff = np.abs(mean_a - mean_b)
+    extreme = np.zeros(len(metrics))
+    for start in range(0, n_resamples, block):
+        size = min(block, n_resamples - start)
+        keys = rng.random((size, n_b + n_a), dtype=np.float32)
+        selected = (keys <= np.partition(keys, n_a - 1, axis=1)[:, n_a - 1 : n_a]).astype(
+            np.float64
+        )
+        # a tie of keys selects one shot more, so divide by the actual sizes
+        chosen = selected.sum(axis=1, keepdims=True)
+        sum_a = selected @ pooled
+        diff = sum_a / chosen - (total - sum_a) / (n_b + n_a - chosen)
+        # a relative tolerance so that ties with the observed difference count
+        extreme += (np.abs(diff) >= observed_diff * (1 - 1e-12)).sum(axis=0)
+
+    return SegmentComparison(
+        metrics=tuple(metrics),
+        n_before=n_b,
+        n_after=n_a,
+        mean_diff=mean_a - mean_b,
+        mean_ci=_percentile_ci(diffs[0], confidence),
+        median_diff=median_a - median_b,
+        median_ci=_percentile_ci(diffs[1], confidence),
+        sd_diff=sd_a - sd_b,
+        sd_ci=_percentile_ci(diffs[2], confidence),
+        p_value=(extreme + 1) / (n_resamples + 1),
+    )
+
+
+def tag_segments(
+    columns: ShotColumns,
+    at: datetime,
+    metrics: Sequence[str] = METRICS,
+    max_shots: int | None = None,
+    exclude_outliers: bool = True,
+) -> tuple[FloatArray, FloatArray]:
+    """
+    The shots of ``columns`` captured before ``at`` and from ``at`` on, as ``[shot,
+    metric]`` arrays; shots missing a metric are left out, and each segment is limited
+    to the ``max_shots`` closest to ``at``.
+    """
+    values = np.stack([columns[m] for m in metrics], axis=1).astype(np.float64)
+    keep: npt.NDArray[np.bool_] = np.all(np.isfinite(values), axis=1)
+    if exclude_outliers:
+        keep &= ~columns["is_outlier"]
+    split = int(np.searchsorted(columns["captured_at"], to_micros(at), side="left"))
+    before, after = values[:split][keep[:split]], values[split:][keep[split:]]
+    if max_shots is not None:
+        before, after = before[len(before) - min(max_shots, len(before)) :], after[:max_shots]
+    return before, after
+
+
+def _compare(
+    args: tuple[FloatArray, FloatArray, tuple[str, ...], int, float, np.random.SeedSequence],
+) -> SegmentComparison:
+    return bootstrap_compare(*args)
+
+
+def compare_tag(
+    frame: ShotFrame,
+    at: datetime,
+    config: TrendEngineConfig | None = None,
+    metrics: Sequence[str] = METRICS,
+    max_shots: int | None = None,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    seed: Seed = None,
+    workers: int = 0,
+) -> dict[str, SegmentComparison]:
+    """
+    Before / after comparison of every club of ``frame`` around a tag at ``at``.
+
+    :param frame: shots, outliers are left out if ``config.exclude_outliers``
+    :param at: when the tag took effect, e.g. the start of the first session after a
+        lesson
+    :param config: ``min_samples_step`` is the least shots per segment to compare a club
+    :param metrics: ``ShotFrame`` columns to compare
+    :param max_shots: shots per segment at most, the closest to ``at``
+    :param n_resamples: bootstrap resamples, and permutations
+    :param seed: seeds the resampling, for reproducible results
+    :param workers: processes to spread the clubs over, 0 to compare in this process
+    """
+    config = config or TrendEngineConfig()
+    jobs: dict[str, tuple[FloatArray, FloatArray]] = {}
+    for club, columns in frame.items():
+        before, after = tag_segments(columns, at, metrics, max_shots, config.exclude_outliers)
+        if min(len(before), len(after)) >= max(config.min_samples_step, 2):
+            jobs[club] = (before, after)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = root.spawn(len(jobs))
+    args = [
+        (before, after, tuple(metrics), n_resamples, CONFIDENCE, child)
+        for (before, after), child in zip(jobs.values(), seeds, strict=True)
+    ]
+    results: list[SegmentComparison]
+    if workers and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_compare, args))
+    else:
+        results = [_compare(a) for a in args]
+    return dict(zip(jobs, results, strict=True))
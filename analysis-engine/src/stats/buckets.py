@@ -0,0 +1,325 @@
+"""
+Time-bucketed statistics for the ``last_Nd`` and lifetime windows.
+
+Each club keeps, per metric, one ``Summary`` per UTC day, per month of the current year
+and per earlier year. A summary holds mergeable sufficient statistics: the count, means
+and (co)moments of time and value, from which the mean, SD and least-squares slope of
+any union of buckets follow exactly, and a fixed-width histogram for the median and
+IQR. A ``last_30d`` rollup then merges at most 30 day buckets and the lifetime one at
+most 12 month buckets plus one per year, however many shots they hold.
+
+Day buckets older than the longest configured window are dropped as new days begin,
+and months are folded into their year once the next year begins.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from math import floor, nan, sqrt
+
+from models.frame import to_micros
+from models.models import METRICS, Rollup, Shot, TrendEngineConfig
+from stats.rollups import WindowSpec
+
+
+# histogram bin width per metric, the median and IQR are exact to half a bin
+BIN_WIDTHS = {"carry": 0.25, "offline": 0.25, "ball_speed": 0.1, "spin": 10.0}
+LIFETIME = "lifetime"
+
+_MICROS_PER_DAY = 86_400_000_000
+_EPOCH_DAY = date(1970, 1, 1)
+
+
+@dataclass
+class Moments:
+    """
+    Count, means and central (co)moments of time ``t`` and value ``x``, updated with
+    Welford's method and merged with Chan et al.'s pairwise formulas.
+    """
+
+    n: int = 0
+    mean_t: float = 0.0
+    mean_x: float = 0.0
+    m2_t: float = 0.0
+    m2_x: float = 0.0
+    c_tx: float = 0.0
+
+    def add(self, t: float, x: float) -> None:
+        self.n += 1
+        dt = t - self.mean_t
+        self.mean_t += dt / self.n
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        self.m2_t += dt * (t - self.mean_t)
+        self.m2_x += dx * (x - self.mean_x)
+        self.c_tx += dt * (x - self.mean_x)
+
+    def merge(self, other: "Moments") -> None:
+        if not other.n:
+            return
+        n = self.n + other.n
+        dt = other.mean_t - self.mean_t
+        dx = other.mean_x - self.mean_x
+        w = self.n * other.n / n
+        self.mean_t += dt * other.n / n
+        self.mean_x += dx * other.n / n
+        self.m2_t += other.m2_t + dt * dt * w
+        self.m2_x += other.m2_x + dx * dx * w
+        self.c_tx += other.c_tx + dt * dx * w
+        self.n = n
+
+    @property
+    def sd(self) -> float:
+        """Population standard deviation of ``x``"""
+        return sqrt(max(self.m2_x, 0.0) / self.n) if self.n else nan
+
+    @property
+    def slope(self) -> float:
+        """Least-squares slope of ``x`` over ``t``, NaN if all ``t`` are equal"""
+        return self.c_tx / self.m2_t if self.m2_t > 0 else nan
+
+
+@dataclass
+class Histogram:
+    """Counts of values in bins ``[k * width, (k + 1) * width)``, only non-empty bins kept"""
+
+    width: float
+    counts: dict[int, int] = field(default_factory=dict[int, int])
+
+    def add(self, x: float) -> None:
+        k = floor(x / self.width)
+        self.counts[k] = self.counts.get(k, 0) + 1
+
+    def merge(self, other: "Histogram") -> None:
+        for k, c in other.counts.items():
+            self.counts[k] = self.counts.get(k, 0) + c
+
+    def quantile(self, q: float) -> float:
+        """
+        Linear interpolation between order statistics as ``np.quantile`` does, each
+        taken at the center of its bin
+        """
+        keys = sorted(self.counts)
+        if not keys:
+            return nan
+        cumulative = list(accumulate(self.counts[k] for k in keys))
+        pos = q * (cumulative[-1] - 1)
+        lo = int(pos)
+
+        def value(rank: int) -> float:
+            return (keys[bisect_right(cumulative, rank)] + 0.5) * self.width
+
+        if pos == lo:
+            return value(lo)
+        return value(lo) + (pos - lo) * (value(lo + 1) - value(lo))
+
+
+@dataclass
+class Summary:
+    """Mergeable statistics of one metric over one bucket or a union of buckets"""
+
+    moments: Moments
+    histogram: Histogram
+
+    @classmethod
+    def empty(cls, metric: str) -> "Summary":
+        return cls(Moments(), Histogram(BIN_WIDTHS.get(metric, 1.0)))
+
+    def add(self, t: float, x: float) -> None:
+        self.moments.add(t, x)
+        self.histogram.add(x)
+
+    def merge(self, other: "Summary") -> None:
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+
+    @property
+    def n(self) -> int:
+        return self.moments.n
+
+    @property
+    def slope(self) -> float:
+        """Change of the metric per day"""
+        return self.moments.slope
+
+    def rollup(self, club: str, window: str, metric: str, updated_at: datetime) -> Rollup:
+        q1, median, q3 = (self.histogram.quantile(q) for q in (0.25, 0.5, 0.75))
+        return Rollup(
+            club=club,
+            window=window,
+            metric=metric,
+            mean=self.moments.mean_x,
+            sd=self.moments.sd,
+            median=median,
+            iqr=q3 - q1,
+            n=self.n,
+            updated_at=updated_at,
+        )
+
+
+Buckets = dict[str, Summary]  # metric -> summary
+
+
+def _new_buckets() -> Buckets:
+    return {metric: Summary.empty(metric) for metric in METRICS}
+
+
+def _merge_into(target: Buckets, other: Buckets) -> None:
+    for metric, summary in other.items():
+        target[metric].merge(summary)
+
+
+def _utc_day(t: datetime) -> date:
+    return _EPOCH_DAY + timedelta(days=to_micros(t) // _MICROS_PER_DAY)
+
+
+@dataclass
+class _ClubBuckets:
+    days: dict[date, Buckets] = field(default_factory=dict[date, Buckets])
+    months: dict[tuple[int, int], Buckets] = field(default_factory=dict[tuple[int, int], Buckets])
+    years: dict[int, Buckets] = field(default_factory=dict[int, Buckets])
+    today: date = date.min
+    latest: datetime | None = None
+
+
+class TimeBuckets:
+    """
+    Rollups of the time windows of ``config`` (``last_7d``, ``last_30d``, ...) and of a
+    club's whole history, from day / month / year buckets.
+
+    Time windows are whole UTC days: ``last_7d`` is the day of ``now`` and the 6 days
+    before it. Medians and IQRs are exact to half a ``BIN_WIDTHS`` bin, everything else
+    is exact.
+
+    :param config: windows and outlier handling
+
+    Example:
+
+        buckets = TimeBuckets(config)
+        for shot in new_shots:
+            buckets.add(shot)
+        buckets.rollups("7i")  # every time window and lifetime
+        buckets.window("7i", "carry", days=30).slope  # yards per day
+
+    """
+
+    def __init__(self, config: TrendEngineConfig | None = None):
+        self.config = config or TrendEngineConfig()
+        self._specs = [
+            spec for spec in map(WindowSpec.parse, self.config.windows) if spec.span is not None
+        ]
+        baseline = WindowSpec.parse(self.config.baseline_window)
+        self.retention_days = max(
+            (spec.span.days for spec in (*self._specs, baseline) if spec.span is not None),
+            default=1,
+        )
+        self._clubs: dict[str, _ClubBuckets] = {}
+
+    @property
+    def clubs(self) -> list[str]:
+        return list(self._clubs)
+
+    def _advance(self, club: _ClubBuckets, today: date) -> None:
+        """Expire days and fold months into years once ``today`` is reached"""
+        if today <= club.today:
+            return
+        first_kept = today - timedelta(days=self.retention_days - 1)
+        for day in [d for d in club.days if d < first_kept]:
+            del club.days[day]
+        if today.year > club.today.year:
+            for year, month in [m for m in club.months if m[0] < today.year]:
+                year_buckets = club.years.setdefault(year, _new_buckets())
+                _merge_into(year_buckets, club.months.pop((year, month)))
+        club.today = today
+
+    def add(self, shot: Shot) -> None:
+        """Add a shot; outliers are left out if ``config.exclude_outliers``"""
+        if self.config.exclude_outliers and shot.is_outlier:
+            return
+        club = self._clubs.get(shot.club)
+        if club is None:
+            club = self._clubs[shot.club] = _ClubBuckets()
+        day = _utc_day(shot.captured_at)
+        self._advance(club, day)
+        if club.latest is None or shot.captured_at > club.latest:
+            club.latest = shot.captured_at
+
+        # a late shot goes to the finest bucket still open for its date
+        targets: list[Buckets] = []
+        if day > club.today - timedelta(days=self.retention_days):
+            targets.append(club.days.setdefault(day, _new_buckets()))
+        if day.year == club.today.year:
+            targets.append(club.months.setdefault((day.year, day.month), _new_buckets()))
+        else:
+            targets.append(club.years.setdefault(day.year, _new_buckets()))
+        t = to_micros(shot.captured_at) / _MICROS_PER_DAY
+        for metric in METRICS:
+            x = float(getattr(shot.metrics, metric))
+            for buckets in targets:
+                buckets[metric].add(t, x)
+
+    def _today(self, club: _ClubBuckets, now: datetime | None) -> date:
+        """The day windows end on: the day of ``now``, the club's latest day by default"""
+        if now is None:
+            return club.today
+        day = _utc_day(now)
+        self._advance(club, day)
+        return day
+
+    def window(self, club: str, metric: str, days: int, now: datetime | None = None) -> Summary:
+        """
+        Merged statistics of the ``days`` UTC days up to the day of ``now`` (by default
+        the day of the club's most recent shot). A ``now`` before the club's latest day
+        leaves out the days after it, as long as the window's days are still kept.
+        """
+        if days > self.retention_days:
+            raise ValueError(f"only the last {self.retention_days} days are kept, not {days}")
+        summary = Summary.empty(metric)
+        buckets = self._clubs.get(club)
+        if buckets is None:
+            return summary
+        today = self._today(buckets, now)
+        first_kept = buckets.today - timedelta(days=self.retention_days - 1)
+        if today - timedelta(days=days - 1) < first_kept:
+            raise ValueError(
+                f"the {days} days up to {today} are not all kept, only those from {first_kept}"
+            )
+        for offset in range(days):
+            day = buckets.days.get(today - timedelta(days=offset))
+            if day is not None:
+                summary.merge(day[metric])
+        return summary
+
+    def lifetime(self, club: str, metric: str) -> Summary:
+        """Merged statistics of every shot of ``club``"""
+        summary = Summary.empty(metric)
+        buckets = self._clubs.get(club)
+        if buckets is not None:
+            for bucket in (*buckets.years.values(), *buckets.months.values()):
+                summary.merge(bucket[metric])
+        return summary
+
+    def rollups(self, club: str, now: datetime | None = None) -> list[Rollup]:
+        """
+        Rollups of every time window of ``config`` and of the whole history, in the
+        layout of ``compute_rollups``; windows without shots are left out.
+        """
+        buckets = self._clubs.get(club)
+        if buckets is None or buckets.latest is None:
+            return []
+        updated_at = max(now or buckets.latest, buckets.latest)
+        windows = [
+            (spec.name, [self.window(club, metric, spec.span.days, now) for metric in METRICS])
+            for spec in self._specs
+            if spec.span is not None
+        ]
+        windows.append((LIFETIME, [self.lifetime(club, metric) for metric in METRICS]))
+        result: list[Rollup] = []
+        for name, summaries in windows:
+            if summaries[0].n:
+                result.extend(
+                    summary.rollup(club, name, metric, updated_at)
+                    for metric, summary in zip(METRICS, summaries, strict=True)
+                )
+        return result
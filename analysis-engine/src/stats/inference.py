@@ -0,0 +1,139 @@
+"""
+The statistical tests behind insights, for a single series of values.
+
+These follow the spec one call at a time with SciPy. ``insights.batch`` computes the
+same results for every club, metric and window at once.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+
+FloatArray = npt.NDArray[np.float64]
+
+# scipy.stats isn't typed, its results are converted to floats as they come out
+_stats: Any = stats
+
+MIN_SAMPLES_TREND = 20
+MIN_SAMPLES_STEP = 10
+
+
+@dataclass(frozen=True)
+class TrendResult:
+    slope: float  # change per shot
+    ci: tuple[float, float]  # 95% confidence interval of the slope
+    p_value: float  # significance of slope != 0
+    r_squared: float
+    n: int
+
+
+@dataclass(frozen=True)
+class StepChangeResult:
+    delta: float  # current mean - previous mean
+    ci: tuple[float, float]  # 95% confidence interval of delta (Welch)
+    p_value: float  # Welch t-test
+    effect_size: float  # Cohen's d, pooled SD
+    n: tuple[int, int]
+
+
+@dataclass(frozen=True)
+class ConsistencyResult:
+    sd_ratio: float  # current SD / previous SD
+    p_value: float  # two-sided F-test of equal variances
+    n: tuple[int, int]
+
+
+@dataclass(frozen=True)
+class BiasResult:
+    shift: float  # mean offline, negative is left
+    ci: tuple[float, float]
+    p_value: float  # one-sample t-test against 0
+    effect_size: float  # shift / SD
+    n: int
+
+
+def compute_trend(
+    values: npt.ArrayLike, min_samples: int = MIN_SAMPLES_TREND
+) -> TrendResult | None:
+    """
+    OLS fit of ``value ~ shot index``, ``None`` with fewer than ``min_samples`` values.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    if len(y) < min_samples:
+        return None
+    fit = _stats.linregress(np.arange(len(y), dtype=np.float64), y)
+    half = _stats.t.ppf(0.975, len(y) - 2) * fit.stderr
+    return TrendResult(
+        slope=float(fit.slope),
+        ci=(float(fit.slope - half), float(fit.slope + half)),
+        p_value=float(fit.pvalue),
+        r_squared=float(fit.rvalue**2),
+        n=len(y),
+    )
+
+
+def compute_step_change(
+    current: npt.ArrayLike, previous: npt.ArrayLike, min_samples: int = MIN_SAMPLES_STEP
+) -> StepChangeResult | None:
+    """
+    Welch t-test of the difference in means, ``None`` with fewer than ``min_samples``
+    values in either window.
+    """
+    a = np.asarray(current, dtype=np.float64)
+    b = np.asarray(previous, dtype=np.float64)
+    if len(a) < min_samples or len(b) < min_samples:
+        return None
+    test = _stats.ttest_ind(a, b, equal_var=False)
+    ci = test.confidence_interval(0.95)
+    var_a, var_b = a.var(ddof=1), b.var(ddof=1)
+    pooled = np.sqrt(((len(a) - 1) * var_a + (len(b) - 1) * var_b) / (len(a) + len(b) - 2))
+    delta = float(a.mean() - b.mean())
+    return StepChangeResult(
+        delta=delta,
+        ci=(float(ci.low), float(ci.high)),
+        p_value=float(test.pvalue),
+        effect_size=float(delta / pooled),
+        n=(len(a), len(b)),
+    )
+
+
+def compute_consistency(
+    current: npt.ArrayLike, previous: npt.ArrayLike, min_samples: int = MIN_SAMPLES_STEP
+) -> ConsistencyResult | None:
+    """
+    F-test of the ratio of variances, ``None`` with fewer than ``min_samples`` values in
+    either window.
+    """
+    a = np.asarray(current, dtype=np.float64)
+    b = np.asarray(previous, dtype=np.float64)
+    if len(a) < min_samples or len(b) < min_samples:
+        return None
+    ratio = a.var(ddof=1) / b.var(ddof=1)
+    dfn, dfd = len(a) - 1, len(b) - 1
+    p_value = 2 * min(_stats.f.cdf(ratio, dfn, dfd), _stats.f.sf(ratio, dfn, dfd))
+    return ConsistencyResult(
+        sd_ratio=float(np.sqrt(ratio)), p_value=float(min(p_value, 1.0)), n=(len(a), len(b))
+    )
+
+
+def compute_bias(values: npt.ArrayLike, min_samples: int = MIN_SAMPLES_TREND) -> BiasResult | None:
+    """
+    One-sample t-test of the mean against 0 (unbiased), ``None`` with fewer than
+    ``min_samples`` values.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if len(x) < min_samples:
+        return None
+    test = _stats.ttest_1samp(x, 0.0)
+    ci = test.confidence_interval(0.95)
+    return BiasResult(
+        shift=float(x.mean()),
+        ci=(float(ci.low), float(ci.high)),
+        p_value=float(test.pvalue),
+        effect_size=float(x.mean() / x.std(ddof=1)),
+        n=len(x),
+    )
@@ -0,0 +1,225 @@
+"""
+MAD outlier tagging (R-STAT-8).
+
+A shot is an outlier when, for any metric, ``|x - median| / (MAD_SCALE * MAD)`` is
+above the threshold. Scaling the MAD by ``MAD_SCALE`` makes it estimate the SD of
+normally distributed values, so the default threshold of 3 means about 3 SDs rather
+than 2. The median and MAD are taken over the club's previous ``window`` shots rather
+than its whole history. ``OutlierTagger`` keeps those windows as sorted blocks, so
+tagging a new shot costs O(log n) per metric; ``retag_frame`` recomputes every tag of a
+``ShotFrame`` with sliding-window arrays, e.g. after the threshold changed. Both derive
+the tag from the scores alone, overwriting any previous one, and give the same tags.
+"""
+
+from collections import deque
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from models.frame import ShotColumns, ShotFrame
+from models.models import METRICS, Shot, TrendEngineConfig
+from stats.rollups import SortedBlocks
+
+
+FloatArray = npt.NDArray[np.float64]
+
+MAD_SCALE = 1.4826  # MAD * MAD_SCALE estimates the SD of a normal distribution
+DEFAULT_WINDOW = 200
+MIN_SAMPLES = 10  # no tagging until a club has this many shots
+_CHUNK = 4096  # rows per sliding-window block in retag_frame
+
+
+def detect_outliers(values: Sequence[float], threshold: float = 3.0) -> list[bool]:
+    """
+    Mark values where ``|x - median| / (MAD_SCALE * MAD) > threshold`` as outliers.
+    Nothing is marked when the MAD is 0, i.e. when more than half of the values are equal.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if not len(x):
+        return []
+    median = np.median(x)
+    mad = MAD_SCALE * np.median(np.abs(x - median))
+    if mad == 0:
+        return [False] * len(x)
+    return (np.abs(x - median) / mad > threshold).tolist()
+
+
+class MadWindow:
+    """
+    Median and (unscaled) MAD of the last ``size`` values added.
+
+    The MAD is the median of the distances to the median; the distances below and above
+    the median form two sorted sequences, so their k-th smallest is found by bisection
+    instead of sorting all of them.
+    """
+
+    def __init__(self, size: int = DEFAULT_WINDOW):
+        self.size = size
+        self._order: deque[float] = deque()
+        self._sorted = SortedBlocks()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, value: float) -> None:
+        self._order.append(value)
+        self._sorted.add(value)
+        if len(self._order) > self.size:
+            self._sorted.remove(self._order.popleft())
+
+    def median(self) -> float:
+        return self._sorted.quantile(0.5)
+
+    def _kth_distance(self, median: float, split: int, k: int) -> float:
+        """k-th smallest (0-based) of ``|x - median|``, ``split`` values being below it"""
+        s, n = self._sorted, len(self._sorted)
+
+        def below(i: int) -> float:  # i-th smallest distance below the median
+            return median - s[split - 1 - i]
+
+        def above(j: int) -> float:  # j-th smallest distance above the median
+            return s[split + j] - median
+
+        # take i distances from below and k + 1 - i from above
+        lo, hi = max(0, k + 1 - (n - split)), min(k + 1, split)
+        while lo < hi:
+            i = (lo + hi) // 2
+            if below(i) < above(k - i):
+                lo = i + 1
+            else:
+                hi = i
+        i, j = lo, k + 1 - lo
+        return max(below(i - 1) if i else -np.inf, above(j - 1) if j else -np.inf)
+
+    def mad(self) -> float:
+        n = len(self._sorted)
+        median = self.median()
+        split = self._sorted.bisect_left(median)
+        mad = self._kth_distance(median, split, (n - 1) // 2)
+        if n % 2 == 0:
+            mad = (mad + self._kth_distance(median, split, n // 2)) / 2
+        return float(mad)
+
+    def score(self, value: float) -> float:
+        """``|value - median| / (MAD_SCALE * MAD)``, 0 if the MAD is 0"""
+        mad = MAD_SCALE * self.mad()
+        return abs(value - self.median()) / mad if mad else 0.0
+
+
+def _reason(scores: dict[str, float], threshold: float) -> str | None:
+    flagged = [f"{metric} {score:.1f} MAD" for metric, score in scores.items() if score > threshold]
+    return ", ".join(flagged) or None
+
+
+class OutlierTagger:
+    """
+    Tags shots as they arrive against each club's previous ``window`` shots.
+
+    :param config: ``outlier_mad_threshold`` is the threshold
+    :param window: number of previous shots per club the median and MAD are taken over
+    :param min_samples: shots a club needs before any of its shots is tagged
+
+    Example:
+
+        tagger = OutlierTagger(config)
+        engine = RollupEngine(config, tagger=tagger)  # tags, then skips outliers
+        rollups = engine.add(shot)
+        shot.is_outlier, shot.outlier_reason
+
+    """
+
+    def __init__(
+        self,
+        config: TrendEngineConfig | None = None,
+        window: int = DEFAULT_WINDOW,
+        min_samples: int = MIN_SAMPLES,
+        metrics: Sequence[str] = METRICS,
+    ):
+        self.threshold = (config or TrendEngineConfig()).outlier_mad_threshold
+        self.window = window
+        self.min_samples = min_samples
+        self.metrics = tuple(metrics)
+        self._windows: dict[str, list[MadWindow]] = {}
+
+    def scores(self, shot: Shot) -> dict[str, float]:
+        """MAD scores of the shot's metrics against its club's window, without adding it"""
+        windows = self._windows.get(shot.club)
+        if windows is None or len(windows[0]) < self.min_samples:
+            return dict.fromkeys(self.metrics, 0.0)
+        return {
+            metric: window.score(float(getattr(shot.metrics, metric)))
+            for metric, window in zip(self.metrics, windows, strict=True)
+        }
+
+    def tag(self, shot: Shot) -> Shot:
+        """
+        Set ``is_outlier`` / ``outlier_reason`` of ``shot`` in place from its scores, as
+        ``retag_frame`` would, and add it to its club's window.
+        """
+        reason = _reason(self.scores(shot), self.threshold)
+        shot.is_outlier = reason is not None
+        shot.outlier_reason = reason
+
+        windows = self._windows.get(shot.club)
+        if windows is None:
+            windows = self._windows[shot.club] = [MadWindow(self.window) for _ in self.metrics]
+        for metric, window in zip(self.metrics, windows, strict=True):
+            window.add(float(getattr(shot.metrics, metric)))
+        return shot
+
+
+def mad_scores(
+    columns: ShotColumns,
+    metric: str,
+    window: int = DEFAULT_WINDOW,
+    min_samples: int = MIN_SAMPLES,
+) -> FloatArray:
+    """
+    MAD score of every shot of ``columns`` against the ``window`` shots before it, as
+    ``OutlierTagger`` computes them one at a time; 0 where fewer than ``min_samples``
+    shots precede it or the MAD is 0.
+    """
+    values = columns[metric].astype(np.float64)
+    n = len(values)
+    scores = np.zeros(n)
+    # row i of the sliding view is values[i - window : i], NaN-padded at the start
+    padded = np.concatenate((np.full(window, np.nan), values[:-1]))
+    previous = np.lib.stride_tricks.sliding_window_view(padded, window)
+    first = max(min_samples, 1)
+    # blocks of at most _CHUNK rows, split where the padding ends
+    starts = sorted({*range(first, n, _CHUNK), *([window] if first < window < n else [])})
+    for start, stop in zip(starts, [*starts[1:], n], strict=True):
+        block = previous[start:stop]
+        # np.median is much faster, rows past the padding need no NaN handling
+        median_of = np.nanmedian if start < window else np.median
+        median = median_of(block, axis=1)
+        mad = MAD_SCALE * median_of(np.abs(block - median[:, None]), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = np.abs(values[start:stop] - median) / mad
+        scores[start:stop] = np.where(mad > 0, score, 0.0)
+    return scores
+
+
+def retag_frame(
+    frame: ShotFrame,
+    config: TrendEngineConfig | None = None,
+    window: int = DEFAULT_WINDOW,
+    min_samples: int = MIN_SAMPLES,
+    metrics: Sequence[str] = METRICS,
+) -> int:
+    """
+    Recompute ``is_outlier`` of every shot of ``frame`` in place, returning the number of
+    shots whose tag changed. A frame opened with ``ShotFrame.load`` must be opened with
+    ``mmap_mode="r+"`` (write back) or ``"c"`` (in memory only) to be retagged.
+    """
+    threshold = (config or TrendEngineConfig()).outlier_mad_threshold
+    changed = 0
+    for _, columns in frame.items():
+        flagged = np.zeros(len(columns), dtype=np.bool_)
+        for metric in metrics:
+            flagged |= mad_scores(columns, metric, window, min_samples) > threshold
+        is_outlier = columns["is_outlier"]
+        changed += int(np.count_nonzero(is_outlier != flagged))
+        is_outlier[:] = flagged
+    return changed
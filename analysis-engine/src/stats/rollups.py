@@ -0,0 +1,381 @@
+"""
+Rolling statistics per club and window (R-STAT-1, R-STAT-4).
+
+``compute_rollups`` recomputes every window from a list of shots. ``RollupEngine``
+keeps the same statistics up to date one shot at a time: each (club, window) holds the
+shots currently in the window, and each of its metrics a running mean / variance and a
+sorted block list for the median and quartiles. Adding a shot, and evicting the ones it
+pushes out of the window, costs O(log n) per metric however long the history is (plus
+a walk over the block sizes, one per 256-512 values, to find the quartiles).
+"""
+
+import re
+from bisect import bisect_left, insort
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from models.models import METRICS, Rollup, Shot, TrendEngineConfig
+
+
+if TYPE_CHECKING:
+    from stats.outliers import OutlierTagger
+
+
+_WINDOW_PATTERN = re.compile(r"^last_(\d+)(d?)$")
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """
+    ``last_25`` is the 25 most recent shots, ``last_7d`` the shots of the 7 days up to
+    the most recent one.
+    """
+
+    name: str
+    count: int | None = None
+    span: timedelta | None = None
+
+    @classmethod
+    def parse(cls, name: str) -> "WindowSpec":
+        match = _WINDOW_PATTERN.match(name)
+        if match is None or int(match[1]) <= 0:
+            raise ValueError(f"unknown window {name!r}, expected e.g. 'last_25' or 'last_7d'")
+        if match[2]:
+            return cls(name, span=timedelta(days=int(match[1])))
+        return cls(name, count=int(match[1]))
+
+
+def _quantile(sorted_values: "Sequence[float] | SortedBlocks", q: float) -> float:
+    """Linear interpolation between order statistics, as ``np.quantile`` does"""
+    pos = q * (len(sorted_values) - 1)
+    lo = int(pos)
+    frac = pos - lo
+    if frac == 0.0:
+        return float(sorted_values[lo])
+    return float(sorted_values[lo] + frac * (sorted_values[lo + 1] - sorted_values[lo]))
+
+
+def _metric_values(shots: Sequence[Shot], metric: str) -> np.ndarray:
+    return np.fromiter(
+        (getattr(s.metrics, metric) for s in shots), dtype=np.float64, count=len(shots)
+    )
+
+
+def compute_rollups(
+    club: str,
+    shots: Iterable[Shot],
+    config: TrendEngineConfig | None = None,
+    now: datetime | None = None,
+) -> list[Rollup]:
+    """
+    Mean, population SD, median, IQR and size of every metric in every configured
+    window, recomputed from scratch. Windows without shots are left out (R-STAT-9).
+
+    :param club: club to compute rollups for, shots of other clubs are ignored
+    :param shots: shots in any order
+    :param config: windows and outlier handling
+    :param now: end of the time windows, the most recent shot by default
+    """
+    config = config or TrendEngineConfig()
+    club_shots = sorted(
+        (s for s in shots if s.club == club and not (config.exclude_outliers and s.is_outlier)),
+        key=lambda s: s.captured_at,
+    )
+    if not club_shots:
+        return []
+    now = now or club_shots[-1].captured_at
+
+    rollups = []
+    for window in map(WindowSpec.parse, config.windows):
+        if window.count is not None:
+            in_window = club_shots[-window.count :]
+        else:
+            assert window.span is not None
+            start = now - window.span
+            in_window = [s for s in club_shots if start < s.captured_at <= now]
+        if not in_window:
+            continue
+        for metric in METRICS:
+            values = _metric_values(in_window, metric)
+            q1, median, q3 = np.quantile(values, (0.25, 0.5, 0.75))
+            rollups.append(
+                Rollup(
+                    club=club,
+                    window=window.name,
+                    metric=metric,
+                    mean=float(values.mean()),
+                    sd=float(values.std()),
+                    median=float(median),
+                    iqr=float(q3 - q1),
+                    n=len(values),
+                    updated_at=now,
+                )
+            )
+    return rollups
+
+
+class SortedBlocks:
+    """
+    A sorted multiset of floats kept as a list of sorted blocks of at most
+    ``2 * load`` values, so insertions and removals shift one small block instead of
+    the whole sequence.
+    """
+
+    def __init__(self, load: int = 256):
+        self.load = load
+        self._blocks: list[list[float]] = []
+        self._maxes: list[float] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, value: float) -> None:
+        if not self._blocks:
+            self._blocks.append([value])
+            self._maxes.append(value)
+        else:
+            i = min(bisect_left(self._maxes, value), len(self._blocks) - 1)
+            block = self._blocks[i]
+            insort(block, value)
+            self._maxes[i] = block[-1]
+            if len(block) > 2 * self.load:
+                self._blocks[i : i + 1] = [block[: self.load], block[self.load :]]
+                self._maxes[i : i + 1] = [block[self.load - 1], block[-1]]
+        self._len += 1
+
+    def remove(self, value: float) -> None:
+        i = bisect_left(self._maxes, value)
+        if i < len(self._blocks):
+            block = self._blocks[i]
+            j = bisect_left(block, value)
+            if j < len(block) and block[j] == value:
+                del block[j]
+                self._len -= 1
+                if block:
+                    self._maxes[i] = block[-1]
+                else:
+                    del self._blocks[i], self._maxes[i]
+                return
+        raise ValueError(f"{value!r} not in SortedBlocks")
+
+    def __iter__(self) -> Iterator[float]:
+        for block in self._blocks:
+            yield from block
+
+    def __getitem__(self, k: int) -> float:
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError(k)
+        if k == self._len - 1:
+            return self._maxes[-1]
+        for block in self._blocks:
+            if k < len(block):
+                return block[k]
+            k -= len(block)
+        raise AssertionError("unreachable")
+
+    def bisect_left(self, value: float) -> int:
+        """Number of values less than ``value``"""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return sum(len(b) for b in self._blocks[:i]) + bisect_left(self._blocks[i], value)
+
+    def quantile(self, q: float) -> float:
+        return _quantile(self, q)
+
+
+@dataclass
+class RunningStats:
+    """
+    Statistics of a multiset of values supporting insertion and removal.
+
+    Mean and variance are updated with Welford's method. Removals can slowly
+    accumulate rounding error, so the sums are recomputed exactly from the sorted
+    values after every ``resync_every`` removals.
+    """
+
+    resync_every: int = 4096
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    values: SortedBlocks = field(default_factory=SortedBlocks)
+    _removals: int = 0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.values.add(x)
+
+    def remove(self, x: float) -> None:
+        self.values.remove(x)
+        if self.n == 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = self.mean
+        self.n -= 1
+        self.mean = mean - (x - mean) / self.n
+        self.m2 -= (x - mean) * (x - self.mean)
+        self._removals += 1
+        if self.n == 1:
+            # exact, a leftover rounding error would show up as sqrt(error) in sd
+            self.mean, self.m2 = self.values[0], 0.0
+        elif self._removals >= self.resync_every:
+            self._resync()
+
+    def _resync(self) -> None:
+        values = np.fromiter(self.values, np.float64, count=len(self.values))
+        self.mean = float(values.mean())
+        self.m2 = float(((values - self.mean) ** 2).sum())
+        self._removals = 0
+
+    @property
+    def sd(self) -> float:
+        """Population standard deviation"""
+        if not self.n or self.values[0] == self.values[-1]:
+            # exactly 0 for constant values rather than sqrt of a rounding error
+            return 0.0
+        return (max(self.m2, 0.0) / self.n) ** 0.5
+
+
+class _WindowState:
+    def __init__(self, spec: WindowSpec):
+        self.spec = spec
+        self.shots: deque[tuple[datetime, tuple[float, ...]]] = deque()
+        self.stats = {metric: RunningStats() for metric in METRICS}
+
+    def add(self, captured_at: datetime, values: tuple[float, ...]) -> None:
+        self.shots.append((captured_at, values))
+        for stats, value in zip(self.stats.values(), values, strict=True):
+            stats.add(value)
+        if self.spec.count is not None and len(self.shots) > self.spec.count:
+            self._evict_oldest()
+
+    def advance(self, now: datetime) -> bool:
+        """Evict shots that fell out of a time window ending at ``now``, True if any did"""
+        evicted = False
+        if self.spec.span is not None:
+            start = now - self.spec.span
+            while self.shots and self.shots[0][0] <= start:
+                self._evict_oldest()
+                evicted = True
+        return evicted
+
+    def _evict_oldest(self) -> None:
+        _, values = self.shots.popleft()
+        for stats, value in zip(self.stats.values(), values, strict=True):
+            stats.remove(value)
+
+    def rollups(self, club: str, updated_at: datetime) -> list[Rollup]:
+        if not self.shots:
+            return []
+        rollups = []
+        for metric, stats in self.stats.items():
+            q1 = stats.values.quantile(0.25)
+            rollups.append(
+                Rollup(
+                    club=club,
+                    window=self.spec.name,
+                    metric=metric,
+                    mean=stats.mean,
+                    sd=stats.sd,
+                    median=stats.values.quantile(0.5),
+                    iqr=stats.values.quantile(0.75) - q1,
+                    n=stats.n,
+                    updated_at=updated_at,
+                )
+            )
+        return rollups
+
+
+class RollupEngine:
+    """
+    Keeps ``compute_rollups`` up to date as shots are persisted, in O(log n) per shot.
+
+    Shots of each club must be added in ``captured_at`` order, as they are captured.
+
+    :param config: windows and outlier handling
+    :param tagger: tags each shot before it is added, so outliers are left out as they
+        arrive
+
+    Example:
+
+        engine = RollupEngine()
+        for shot in new_shots:
+            rollups = engine.add(shot)  # the shot's club, every window and metric
+
+    """
+
+    def __init__(
+        self, config: TrendEngineConfig | None = None, tagger: "OutlierTagger | None" = None
+    ):
+        self.config = config or TrendEngineConfig()
+        self.tagger = tagger
+        self._specs = [WindowSpec.parse(w) for w in self.config.windows]
+        self._windows: dict[str, list[_WindowState]] = {}
+        self._latest: dict[str, datetime] = {}
+        self._versions: dict[str, int] = {}
+
+    def version(self, club: str) -> int:
+        """
+        Incremented whenever a window of ``club`` changes, so anything derived from its
+        rollups (e.g. ``InsightCache``) only needs recomputing when this does.
+        """
+        return self._versions.get(club, 0)
+
+    def add(self, shot: Shot) -> list[Rollup]:
+        """
+        Add a shot and return the updated rollups of its club.
+        """
+        latest = self._latest.get(shot.club)
+        if latest is not None and shot.captured_at < latest:
+            raise ValueError(
+                f"shot {shot.id} captured at {shot.captured_at} is older than the latest "
+                f"{shot.club} shot ({latest})"
+            )
+        if self.tagger is not None:
+            self.tagger.tag(shot)
+        if self.config.exclude_outliers and shot.is_outlier:
+            return self.rollups(shot.club)
+
+        self._latest[shot.club] = shot.captured_at
+        windows = self._windows.get(shot.club)
+        if windows is None:
+            windows = self._windows[shot.club] = [_WindowState(spec) for spec in self._specs]
+        values = tuple(float(getattr(shot.metrics, metric)) for metric in METRICS)
+        for window in windows:
+            window.add(shot.captured_at, values)
+            window.advance(shot.captured_at)
+        self._versions[shot.club] = self.version(shot.club) + 1
+        return self.rollups(shot.club)
+
+    def rollups(self, club: str, now: datetime | None = None) -> list[Rollup]:
+        """
+        Current rollups of ``club``, with time windows ending at ``now`` (by default the
+        club's most recent shot). Once asked about ``now``, shots captured before it can
+        no longer be added.
+        """
+        latest = self._latest.get(club)
+        if latest is None:
+            return []
+        now = max(now or latest, latest)
+        self._latest[club] = now
+        result = []
+        for window in self._windows[club]:
+            if window.advance(now):
+                self._versions[club] = self.version(club) + 1
+            result.extend(window.rollups(club, now))
+        return result
+
+    @property
+    def clubs(self) -> list[str]:
+        return list(self._windows)
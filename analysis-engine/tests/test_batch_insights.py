@@ -0,0 +1,210 @@
+"""Batched insight statistics tests."""
+
+import random
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from insights.batch import compute_insight_stats, generate_insights
+from models import Shot, ShotMetrics, TrendEngineConfig
+from models.frame import ShotFrame, to_micros
+from stats.inference import (
+    compute_bias,
+    compute_consistency,
+    compute_step_change,
+    compute_trend,
+)
+from stats.rollups import WindowSpec
+
+
+START = datetime(2025, 1, 1, tzinfo=UTC)
+CLUBS = ("Dr", "5i", "7i", "PW")
+
+
+def _frame(n: int, seed: int = 0, drift: float = 0.0) -> ShotFrame:
+    rng = random.Random(seed)
+    shots = []
+    t = START
+    for i in range(n):
+        t += timedelta(hours=rng.expovariate(1 / 4))
+        shots.append(
+            Shot(
+                id=str(i),
+                captured_at=t,
+                club=rng.choice(CLUBS),
+                metrics=ShotMetrics(
+                    carry=rng.gauss(165, 8) + drift * i,
+                    offline=rng.gauss(1, 6),
+                    ball_speed=rng.gauss(118, 3),
+                    spin=rng.randint(5000, 7500),
+                    launch_angle=None if rng.random() < 0.1 else rng.gauss(18, 2),
+                ),
+                is_outlier=rng.random() < 0.05,
+            )
+        )
+    return ShotFrame.from_shots(shots)
+
+
+def _windows(frame: ShotFrame, club: str, spec: WindowSpec, metric: str):
+    columns = frame[club]
+    keep = ~columns.is_outlier
+    values, times = columns[metric][keep], columns.captured_at[keep]
+    if spec.count is not None:
+        n = spec.count
+        current = values[max(len(values) - n, 0) :]
+        previous = values[max(len(values) - 2 * n, 0) : max(len(values) - n, 0)]
+    else:
+        now = int(times[-1])
+        span = to_micros(START + spec.span) - to_micros(START)  # type: ignore[operator]
+        current = values[(times > now - span) & (times <= now)]
+        previous = values[(times > now - 2 * span) & (times <= now - span)]
+    return current[np.isfinite(current)], previous[np.isfinite(previous)]
+
+
+def test_batch_matches_per_series_tests() -> None:
+    """Test that every batched result matches the SciPy test of the same series."""
+    frame = _frame(1500)
+    config = TrendEngineConfig()
+    s = compute_insight_stats(frame, config)
+    assert s.slope.shape == (len(frame.clubs), 5, len(config.windows))
+
+    checked = 0
+    for c, club in enumerate(s.clubs):
+        for m, metric in enumerate(s.metrics):
+            for w, spec in enumerate(s.windows):
+                current, previous = _windows(frame, club, spec, metric)
+                assert (s.n_current[c, m, w], s.n_previous[c, m, w]) == (
+                    len(current),
+                    len(previous),
+                )
+
+                trend = compute_trend(current)
+                assert s.trend_ok[c, m, w] == (trend is not None)
+                if trend is not None:
+                    np.testing.assert_allclose(
+                        [s.slope[c, m, w], *s.slope_ci[c, m, w], s.r_squared[c, m, w]],
+                        [trend.slope, *trend.ci, trend.r_squared],
+                        rtol=1e-7,
+                        atol=1e-12,
+                    )
+                    np.testing.assert_allclose(s.trend_p[c, m, w], trend.p_value, rtol=1e-6)
+
+                step = compute_step_change(current, previous)
+                consistency = compute_consistency(current, previous)
+                assert s.step_ok[c, m, w] == (step is not None)
+                if step is not None and consistency is not None:
+                    np.testing.assert_allclose(
+                        [s.delta[c, m, w], *s.delta_ci[c, m, w], s.cohens_d[c, m, w]],
+                        [step.delta, *step.ci, step.effect_size],
+                        rtol=1e-7,
+                        atol=1e-12,
+                    )
+                    np.testing.assert_allclose(s.step_p[c, m, w], step.p_value, rtol=1e-6)
+                    np.testing.assert_allclose(
+                        [s.sd_ratio[c, m, w], s.consistency_p[c, m, w]],
+                        [consistency.sd_ratio, consistency.p_value],
+                        rtol=1e-6,
+                    )
+                    checked += 1
+
+                bias = compute_bias(current)
+                if bias is not None:
+                    np.testing.assert_allclose(
+                        [s.mean_current[c, m, w], *s.bias_ci[c, m, w]],
+                        [bias.shift, *bias.ci],
+                        rtol=1e-7,
+                    )
+                    np.testing.assert_allclose(s.bias_p[c, m, w], bias.p_value, rtol=1e-6)
+    assert checked > 50
+
+
+def test_guardrails_mask_small_windows() -> None:
+    """Test that windows below the minimum sample sizes yield no insights."""
+    frame = _frame(60, drift=1.0)
+    config = TrendEngineConfig(windows=["last_10", "last_50"])
+    s = compute_insight_stats(frame, config)
+    assert not s.trend_ok[:, :, 0].any()
+    assert ((s.n_current >= 20) == s.trend_ok).all()
+
+    insights = generate_insights(frame, config, stats_=s)
+    for insight in insights:
+        c, m, w = s.index(insight.club, insight.metric, insight.window)
+        if insight.kind in ("trend", "bias_shift"):
+            assert s.n_current[c, m, w] >= 20
+        else:
+            assert min(s.n_current[c, m, w], s.n_previous[c, m, w]) >= 10
+
+
+def test_empty_frame() -> None:
+    """Test that a frame without shots has no statistics and no insights."""
+    s = compute_insight_stats(ShotFrame())
+    assert s.slope.shape == (0, 5, 5)
+    assert generate_insights(ShotFrame()) == []
+
+
+def test_generate_insights_finds_step_change() -> None:
+    """Test that a jump in carry is reported as a step change with the spec's text."""
+    rng = random.Random(1)
+    shots = [
+        Shot(
+            id=str(i),
+            captured_at=START + timedelta(minutes=i),
+            club="7i",
+            metrics=ShotMetrics(
+                carry=rng.gauss(160 if i < 25 else 168, 3),
+                offline=rng.gauss(0, 4),
+                ball_speed=rng.gauss(118, 3),
+                spin=rng.randint(6000, 7000),
+            ),
+        )
+        for i in range(50)
+    ]
+    config = TrendEngineConfig(windows=["last_25"])
+    insights = generate_insights(ShotFrame.from_shots(shots), config)
+
+    step = next(i for i in insights if i.kind == "step_change" and i.metric == "carry")
+    assert step.baseline == "prev_25"
+    assert step.delta == pytest.approx(8, abs=3)
+    assert step.ci[0] < step.delta < step.ci[1]
+    assert step.text.startswith("7i carry is up +")
+    assert "vs your previous 25 shots (95% CI +" in step.text
+    assert step.created_at == shots[-1].captured_at
+    # deterministic ids
+    assert [i.id for i in insights] == [
+        i.id for i in generate_insights(ShotFrame.from_shots(shots), config)
+    ]
+
+
+def test_generate_insights_kinds() -> None:
+    """Test that drift, a dispersion change and an offline bias are each reported."""
+    rng = random.Random(2)
+    shots = [
+        Shot(
+            id=str(i),
+            captured_at=START + timedelta(days=i / 4),
+            club="Dr",
+            metrics=ShotMetrics(
+                carry=240 + 0.5 * i + rng.gauss(0, 2),
+                offline=rng.gauss(-6, 3),
+                ball_speed=rng.gauss(160, 1 if i < 25 else 4),
+                spin=rng.randint(2500, 2700),
+            ),
+        )
+        for i in range(50)
+    ]
+    insights = generate_insights(
+        ShotFrame.from_shots(shots), TrendEngineConfig(windows=["last_25", "last_7d"])
+    )
+    by_kind = {(i.kind, i.metric, i.window): i for i in insights}
+
+    trend = by_kind["trend", "carry", "last_25"]
+    assert trend.slope == pytest.approx(0.5, abs=0.2)
+    assert trend.text.startswith("Dr carry is trending up +0.")
+    consistency = by_kind["consistency", "ball_speed", "last_25"]
+    assert consistency.effect_size > 1.5
+    assert "Dr ball speed consistency worsened: dispersion up" in consistency.text
+    bias = by_kind["bias_shift", "offline", "last_7d"]
+    assert bias.delta == pytest.approx(-6, abs=2)
+    assert "shifted" in bias.text
+    assert "left over the last 7 days" in bias.text
@@ -0,0 +1,153 @@
+"""Bootstrap comparison tests."""
+
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from models import TrendEngineConfig
+from models.frame import COLUMNS, ShotFrame, to_micros
+from stats.bootstrap import (
+    _resample_counts,  # pyright: ignore[reportPrivateUsage]
+    _weighted_stats,  # pyright: ignore[reportPrivateUsage]
+    bootstrap_compare,
+    compare_tag,
+    tag_segments,
+)
+
+
+# scipy.stats isn't typed
+_stats: Any = stats
+
+START = datetime(2025, 1, 1, tzinfo=UTC)
+TAG = START + timedelta(days=10)
+
+
+def _segment(rng: np.random.Generator, n: int, carry: float) -> np.ndarray:
+    # skewed carry, as mishits make it
+    return np.column_stack(
+        (
+            carry - rng.gamma(2, 4, n),
+            rng.normal(0, 6, n),
+            rng.normal(118, 3, n),
+            rng.normal(6500, 400, n),
+        )
+    )
+
+
+def _frame(rng: np.random.Generator, clubs: dict[str, float]) -> ShotFrame:
+    """20 days of shots per club, whose carry moves by ``clubs[club]`` at ``TAG``"""
+    frame = ShotFrame()
+    for club, shift in clubs.items():
+        n = 120
+        values = np.concatenate((_segment(rng, n // 2, 160), _segment(rng, n // 2, 160 + shift)))
+        captured_at = to_micros(START) + np.arange(n) * (20 * 86_400_000_000 // n)
+        frame.club_index(club)
+        frame[club].extend(
+            {
+                "captured_at": captured_at,
+                "carry": values[:, 0],
+                "offline": values[:, 1],
+                "ball_speed": values[:, 2],
+                "spin": values[:, 3],
+                "launch_angle": np.full(n, np.nan),
+                "launch_direction": np.full(n, np.nan),
+                "session": np.full(n, -1),
+                "is_outlier": rng.random(n) < 0.05,
+            }
+        )
+    return frame
+
+
+def test_resampled_statistics() -> None:
+    """Test that statistics from count matrices match those of the resamples."""
+    rng = np.random.default_rng(0)
+    for n in (7, 8):
+        values = _segment(rng, n, 160)
+        values[:3, 3] = 6500.0  # ties
+        idx_rng = np.random.default_rng(1)
+        counts = _resample_counts(idx_rng, n, 50)
+        idx = np.random.default_rng(1).integers(0, n, size=(n, 50)).T
+        mean, median, sd = _weighted_stats(counts, values, np.argsort(values, axis=0))
+        resamples = values[idx]
+        np.testing.assert_allclose(mean, resamples.mean(axis=1))
+        np.testing.assert_allclose(median, np.median(resamples, axis=1))
+        np.testing.assert_allclose(sd, resamples.std(axis=1, ddof=1), atol=1e-8)
+
+    # resamples whose median is far from the middle rank
+    values = _segment(rng, 400, 160)
+    counts = np.zeros((400, 2))
+    counts[np.argmin(values[:, 0]), 0] = counts[np.argmax(values[:, 0]), 1] = 400
+    _, median, _ = _weighted_stats(counts, values, np.argsort(values, axis=0))
+    assert median[:, 0].tolist() == [values[:, 0].min(), values[:, 0].max()]
+
+
+def test_bootstrap_compare_matches_scipy() -> None:
+    """Test the intervals and p-values against scipy's bootstrap and permutation test."""
+    rng = np.random.default_rng(2)
+    before, after = _segment(rng, 40, 160), _segment(rng, 30, 165)
+    result = bootstrap_compare(before, after, seed=3)
+    assert (result.n_before, result.n_after) == (40, 30)
+    np.testing.assert_allclose(result.mean_diff, after.mean(0) - before.mean(0))
+    np.testing.assert_allclose(result.median_diff, np.median(after, 0) - np.median(before, 0))
+
+    def mean_diff(b: np.ndarray, a: np.ndarray, axis: int) -> np.ndarray:
+        return np.mean(a, axis=axis) - np.mean(b, axis=axis)
+
+    for j in range(4):
+        data = (before[:, j], after[:, j])
+        reference = _stats.bootstrap(
+            data, mean_diff, n_resamples=10_000, method="percentile", random_state=4
+        ).confidence_interval
+        spread = reference.high - reference.low
+        assert result.mean_ci[j] == pytest.approx(reference, abs=0.05 * spread)
+        p = _stats.permutation_test(data, mean_diff, n_resamples=40_000, random_state=5).pvalue
+        assert result.p_value[j] == pytest.approx(p, abs=0.02)
+    assert result.p_value[0] < 0.01
+    assert result.mean_ci[0, 0] > 0 and result.median_ci[0, 0] > 0
+
+
+def test_bootstrap_compare_is_reproducible() -> None:
+    """Test that a seed gives the same results, and that bad segments are refused."""
+    rng = np.random.default_rng(6)
+    before, after = _segment(rng, 25, 160), _segment(rng, 25, 160)
+    a = bootstrap_compare(before, after, n_resamples=500, seed=7)
+    b = bootstrap_compare(before, after, n_resamples=500, seed=7)
+    np.testing.assert_array_equal(a.sd_ci, b.sd_ci)
+    np.testing.assert_array_equal(a.p_value, b.p_value)
+    with pytest.raises(ValueError, match="at least 2"):
+        bootstrap_compare(before, after[:1])
+    with pytest.raises(ValueError, match="metric columns"):
+        bootstrap_compare(before, after, metrics=("carry", "offline"))
+    with pytest.raises(ValueError, match="metric columns"):
+        bootstrap_compare(before[:, 0], after[:, 0], metrics=("carry",))
+
+
+def test_compare_tag() -> None:
+    """Test the segments around a tag, the guardrail, and that a pool gives the same results."""
+    frame = _frame(np.random.default_rng(8), {"7i": 8.0, "Dr": 0.0})
+    frame.club_index("PW")
+    frame["PW"].extend({name: frame["Dr"][name][:30] for name in COLUMNS})
+
+    before, after = tag_segments(frame["7i"], TAG)
+    columns = frame["7i"]
+    keep = ~columns.is_outlier
+    assert len(before) == np.count_nonzero(keep[:60])
+    assert len(after) == np.count_nonzero(keep[60:])
+    before, after = tag_segments(frame["7i"], TAG, max_shots=10)
+    assert len(before) == len(after) == 10
+
+    config = TrendEngineConfig()
+    results = compare_tag(frame, TAG, config, n_resamples=2000, seed=9)
+    assert set(results) == {"7i", "Dr"}  # PW has no shots after the tag
+    assert results["7i"].p_value[0] < 0.01 < results["Dr"].p_value[0]
+    assert results["7i"].mean_ci[0, 0] > 0
+
+    seeded = compare_tag(frame, TAG, config, n_resamples=2000, seed=np.random.SeedSequence(9))
+    np.testing.assert_array_equal(seeded["7i"].mean_ci, results["7i"].mean_ci)
+
+    pooled = compare_tag(frame, TAG, config, n_resamples=2000, seed=9, workers=2)
+    for club, result in results.items():
+        np.testing.assert_array_equal(pooled[club].median_ci, result.median_ci)
@@ -0,0 +1,150 @@
+"""Time bucket tests."""
+
+import random
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from models import Shot, ShotMetrics, TrendEngineConfig
+from stats.buckets import BIN_WIDTHS, LIFETIME, Histogram, Moments, TimeBuckets
+
+
+START = datetime(2024, 11, 20, tzinfo=UTC)
+
+
+def _shots(n: int, seed: int = 0, hours: float = 6) -> list[Shot]:
+    rng = random.Random(seed)
+    shots: list[Shot] = []
+    t = START
+    for i in range(n):
+        t += timedelta(hours=rng.expovariate(1 / hours))
+        shots.append(
+            Shot(
+                id=str(i),
+                captured_at=t,
+                club=rng.choice(("7i", "Dr")),
+                metrics=ShotMetrics(
+                    carry=rng.gauss(165, 8) + i * 0.01,
+                    offline=rng.gauss(0, 6),
+                    ball_speed=rng.gauss(118, 3),
+                    spin=rng.randint(5000, 7500),
+                ),
+                is_outlier=rng.random() < 0.05,
+            )
+        )
+    return shots
+
+
+def _expected(shots: list[Shot], metric: str) -> dict[str, float]:
+    t = np.array([s.captured_at.timestamp() / 86_400 for s in shots])
+    x = np.array([float(getattr(s.metrics, metric)) for s in shots])
+    q1, median, q3 = np.quantile(x, (0.25, 0.5, 0.75))
+    return {
+        "n": len(x),
+        "mean": x.mean(),
+        "sd": x.std(),
+        "slope": np.polyfit(t, x, 1)[0],
+        "median": median,
+        "iqr": q3 - q1,
+    }
+
+
+def test_moments_merge_matches_sequential() -> None:
+    """Test that merging moments of parts equals adding every value to one."""
+    rng = random.Random(1)
+    points = [(rng.uniform(0, 30), rng.gauss(160, 8)) for _ in range(500)]
+    whole, parts = Moments(), [Moments() for _ in range(7)]
+    for i, (t, x) in enumerate(points):
+        whole.add(t, x)
+        parts[i % 7].add(t, x)
+    merged = Moments()
+    for part in parts:
+        merged.merge(part)
+    assert merged.n == whole.n
+    np.testing.assert_allclose(
+        [merged.mean_x, merged.sd, merged.slope], [whole.mean_x, whole.sd, whole.slope]
+    )
+    assert np.isnan(Moments().sd)
+
+
+def test_histogram_quantile() -> None:
+    """Test that histogram quantiles are within half a bin of the exact ones."""
+    rng = random.Random(2)
+    values = [rng.gauss(0, 6) for _ in range(999)]
+    histogram = Histogram(0.25)
+    for value in values:
+        histogram.add(value)
+    for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+        assert histogram.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.125)
+    assert np.isnan(Histogram(1.0).quantile(0.5))
+
+
+def test_windows_match_exact_statistics() -> None:
+    """Test that bucketed time windows match statistics over the same UTC days."""
+    shots = _shots(2000)
+    buckets = TimeBuckets()
+    for shot in shots:
+        buckets.add(shot)
+
+    for club in buckets.clubs:
+        kept = [s for s in shots if s.club == club and not s.is_outlier]
+        today = kept[-1].captured_at.date()
+        rollups = {(r.window, r.metric): r for r in buckets.rollups(club)}
+        for window, days in (("last_7d", 7), ("last_30d", 30), (LIFETIME, None)):
+            in_window = [
+                s for s in kept if days is None or (today - s.captured_at.date()).days < days
+            ]
+            for metric in ("carry", "spin"):
+                expected = _expected(in_window, metric)
+                rollup = rollups[window, metric]
+                assert rollup.n == expected["n"]
+                assert rollup.updated_at == kept[-1].captured_at
+                np.testing.assert_allclose(
+                    [rollup.mean, rollup.sd], [expected["mean"], expected["sd"]], rtol=1e-9
+                )
+                half_bin = BIN_WIDTHS[metric] / 2
+                assert rollup.median == pytest.approx(expected["median"], abs=half_bin)
+                assert rollup.iqr == pytest.approx(expected["iqr"], abs=2 * half_bin)
+                summary = (
+                    buckets.lifetime(club, metric)
+                    if days is None
+                    else buckets.window(club, metric, days)
+                )
+                assert summary.slope == pytest.approx(expected["slope"], rel=1e-6)
+
+        # a window ending before the latest day leaves out the days after it
+        day = today - timedelta(days=3)
+        earlier = [s for s in kept if 0 <= (day - s.captured_at.date()).days < 7]
+        end = datetime(day.year, day.month, day.day, 12, tzinfo=UTC)
+        assert buckets.window(club, "carry", 7, now=end).n == len(earlier)
+
+
+def test_buckets_expire_and_roll_over() -> None:
+    """Test that old days are dropped and past months are folded into years."""
+    shots = _shots(1500, hours=12)
+    buckets = TimeBuckets(TrendEngineConfig(windows=["last_7d"], baseline_window="last_14d"))
+    for shot in shots:
+        buckets.add(shot)
+    assert buckets.retention_days == 14
+    club = buckets._clubs["7i"]  # pyright: ignore[reportPrivateUsage]
+    assert len(club.days) <= 14
+    assert all(year < club.today.year for year in club.years)
+    assert all(year == club.today.year for year, _ in club.months)
+    assert len(club.years) >= 1
+
+    # a query in the future rolls over without a new shot
+    later = shots[-1].captured_at + timedelta(days=10)
+    assert buckets.window("7i", "carry", 7, now=later).n == 0
+    assert len(club.days) <= 4
+    kept = [s for s in shots if s.club == "7i" and not s.is_outlier]
+    assert buckets.lifetime("7i", "carry").n == len(kept)
+
+    with pytest.raises(ValueError, match="14 days"):
+        buckets.window("7i", "carry", 30)
+    # an earlier day, as long as its window is still kept
+    assert buckets.window("7i", "carry", 2, now=later - timedelta(days=2)).n == 0
+    with pytest.raises(ValueError, match="not all kept"):
+        buckets.window("7i", "carry", 7, now=later - timedelta(days=10))
+    assert buckets.rollups("PW") == []
+    assert buckets.window("PW", "carry", 7).n == 0
@@ -0,0 +1,116 @@
+"""Optimal shot chart grid interpolation tests."""
+
+import numpy as np
+import pytest
+
+from models.chartgrid import ChartGrid, Edge, Method
+from models.optimalshotchart import OPTIMAL_SHOT_CHART, OptimalShotChartModel
+
+
+@pytest.fixture(scope="module")
+def model() -> OptimalShotChartModel:
+    return OptimalShotChartModel(OPTIMAL_SHOT_CHART)
+
+
+@pytest.mark.parametrize("method", ["bilinear", "bicubic"])
+def test_lookup_reproduces_chart(model: OptimalShotChartModel, method: str) -> None:
+    """Test that interpolating at the chart's own points returns its entries."""
+    keys = list(OPTIMAL_SHOT_CHART)
+    speeds = np.array([k[0] for k in keys])
+    angles = np.array([k[1] for k in keys])
+    expected = np.array([OPTIMAL_SHOT_CHART[k] for k in keys], dtype=float)
+    np.testing.assert_allclose(model.lookup(speeds, angles, method=method), expected)
+
+
+def test_bilinear_between_entries(model: OptimalShotChartModel) -> None:
+    """Test an off-grid shot against a hand-computed bilinear interpolation."""
+    launch, spin, carry, _ = model.interpolate_entry(163.4, -1.7)
+    # 34% of the way from 160 to 170 mph, 15% of the way from -2 to 0 degrees
+    low = np.array([10.3, 2750.0, 266.0]) * 0.85 + np.array([11.7, 2600.0, 269.0]) * 0.15
+    high = np.array([9.6, 2750.0, 284.0]) * 0.85 + np.array([11.0, 2600.0, 288.0]) * 0.15
+    np.testing.assert_allclose([launch, spin, carry], low * 0.66 + high * 0.34)
+    assert model.get_entry(163.4, -1.7) is None
+
+
+def test_bicubic_is_smooth(model: OptimalShotChartModel) -> None:
+    """Test that bicubic stays close to bilinear inside the chart."""
+    rng = np.random.default_rng(0)
+    speeds = rng.uniform(80, 200, 1000)
+    angles = rng.uniform(-10, 10, 1000)
+    bilinear = model.lookup(speeds, angles)
+    bicubic = model.lookup(speeds, angles, method="bicubic")
+    assert bicubic.shape == (1000, 4)
+    np.testing.assert_allclose(bicubic[:, 2], bilinear[:, 2], atol=3.0)
+
+
+def test_edges(model: OptimalShotChartModel) -> None:
+    """Test clamping, extrapolating and NaN outside the chart."""
+    speeds = np.array([210.0, 70.0, 150.0])
+    angles = np.array([0.0, 0.0, 12.0])
+    clamped = model.lookup(speeds, angles)
+    np.testing.assert_allclose(clamped[:, 2], [343.0, 101.0, 262.0])
+
+    extrapolated = model.lookup(speeds, angles, edge="extrapolate")
+    np.testing.assert_allclose(extrapolated[:, 2], [343.0 + 19.0, 101.0 - 20.0, 264.0])
+
+    nan = model.lookup(speeds, angles, edge="nan")
+    assert np.isnan(nan).all()
+    assert not np.isnan(model.lookup(200.0, 10.0, edge="nan")).any()
+
+
+@pytest.mark.parametrize("edge", ["clamp", "extrapolate", "nan"])
+@pytest.mark.parametrize("method", ["bilinear", "bicubic"])
+def test_missing_readings(model: OptimalShotChartModel, method: Method, edge: Edge) -> None:
+    """Test that a NaN or infinite speed or angle gives NaN, leaving the other shots."""
+    speeds = np.array([np.nan, 150.0, np.inf, 150.0])
+    angles = np.array([0.0, np.nan, 0.0, 10.0])
+    result = model.grid.lookup(speeds, angles, method=method, edge=edge)
+    assert np.isnan(result[:3]).all()
+    assert result[3, 2] == 262.0
+
+
+def test_broadcasting(model: OptimalShotChartModel) -> None:
+    """Test that scalar speeds broadcast against arrays of angles."""
+    result = model.lookup(150.0, np.array([[-10.0, 10.0]]))
+    assert result.shape == (1, 2, 4)
+    assert result[0, 1, 2] == 262.0
+
+
+def test_uneven_axes() -> None:
+    """Test interpolation over unevenly spaced axes."""
+    chart = {
+        (speed, aoa): [speed + aoa, 0.0, speed * 10 + aoa, 0.0]
+        for speed in (100.0, 110.0, 140.0)
+        for aoa in (-4.0, 0.0, 1.0)
+    }
+    grid = ChartGrid.from_chart(chart)
+    result = grid.lookup([105.0, 125.0, 150.0], [-2.0, 0.5, 2.0], edge="extrapolate")
+    np.testing.assert_allclose(result[:, 0], [103.0, 125.5, 152.0])
+    np.testing.assert_allclose(grid.field_grid("carry")[:, 0], [996.0, 1096.0, 1396.0])
+
+
+def test_invalid() -> None:
+    """Test that incomplete charts and unknown options are rejected."""
+    chart = dict(OPTIMAL_SHOT_CHART)
+    del chart[(200.0, 0.0)]
+    with pytest.raises(ValueError, match="full 13x11 grid"):
+        ChartGrid.from_chart(chart)
+    with pytest.raises(ValueError, match="two ball speeds"):
+        ChartGrid.from_chart({(100.0, 0.0): [1.0, 2.0, 3.0, 4.0]})
+
+    grid = ChartGrid.from_chart(OPTIMAL_SHOT_CHART)
+    with pytest.raises(ValueError, match="method"):
+        grid.lookup(150.0, 0.0, method="nearest")  # type: ignore[arg-type]
+    with pytest.raises(ValueError, match="edge"):
+        grid.lookup(150.0, 0.0, edge="wrap")  # type: ignore[arg-type]
+
+
+def test_rows(model: OptimalShotChartModel) -> None:
+    """Test the indexed row accessors."""
+    row = model.get_row_by_ball_speed(150.0)
+    assert len(row) == 11
+    assert all(k[0] == 150.0 for k in row)
+    column = model.get_row_by_angle_of_attack(-2.0)
+    assert len(column) == 13
+    assert column[(90.0, -2.0)] == OPTIMAL_SHOT_CHART[(90.0, -2.0)]
+    assert model.get_row_by_ball_speed(151.0) == {}
@@ -0,0 +1,63 @@
+"""Headless optimal shot chart rendering tests."""
+
+import subprocess
+import sys
+
+import pytest
+
+from models.chartrender import ChartRenderer, Overlay, chart_digest, render_chart
+from models.optimalshotchart import OPTIMAL_SHOT_CHART, OptimalShotChartModel
+
+
+@pytest.fixture(scope="module")
+def model() -> OptimalShotChartModel:
+    return OptimalShotChartModel(OPTIMAL_SHOT_CHART)
+
+
+def test_render_png_and_svg(model: OptimalShotChartModel) -> None:
+    """Test rendering both formats without a display."""
+    png = render_chart(model, "png")
+    assert png.data.startswith(b"\x89PNG")
+    assert png.content_type == "image/png"
+
+    svg = render_chart(model, "svg", Overlay.of([163.4, 250.0], [-1.7, 0.0]))
+    assert b"<svg" in svg.data
+    assert svg.content_type == "image/svg+xml"
+    assert svg.etag != png.etag
+
+
+def test_render_cache(model: OptimalShotChartModel) -> None:
+    """Test that equal charts and overlays are served from the cache, LRU first out."""
+    renderer = ChartRenderer(maxsize=2, figsize=(4, 3), dpi=20)
+    first = renderer.render(model, overlay=Overlay.of([150.0], [0.0]))
+    # a different but equal chart and overlay hit the same entry
+    again = renderer.render(
+        OptimalShotChartModel(dict(OPTIMAL_SHOT_CHART)), overlay=Overlay.of([150.0], [0.0])
+    )
+    assert again is first
+    assert (renderer.hits, renderer.misses) == (1, 1)
+
+    renderer.render(model)
+    renderer.render(model, "svg")
+    renderer.render(model, overlay=Overlay.of([150.0], [0.0]))
+    assert (renderer.hits, renderer.misses) == (1, 4)
+
+    renderer.clear()
+    with pytest.raises(ValueError, match="format"):
+        renderer.render(model, "gif")  # type: ignore[arg-type]
+
+
+def test_chart_digest(model: OptimalShotChartModel) -> None:
+    """Test that the digest changes with the chart's entries."""
+    chart = dict(OPTIMAL_SHOT_CHART)
+    chart[(200.0, 0.0)] = [9.5, 2550.0, 344.0, 325]
+    assert chart_digest(OptimalShotChartModel(chart)) != chart_digest(model)
+
+
+def test_import_does_not_load_matplotlib() -> None:
+    """Test that the chart data is usable without importing matplotlib."""
+    code = (
+        "import sys, models.optimalshotchart, models.chartrender;"
+        "assert 'matplotlib' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd="src")
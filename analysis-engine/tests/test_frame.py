@@ -0,0 +1,146 @@
+"""Columnar shot frame tests."""
+
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from models import Shot, ShotMetrics
+from models.frame import (
+    COLUMNS,
+    NO_SESSION,
+    ROW_FIELDS,
+    SELECT_ROWS_SQL,
+    ShotColumns,
+    ShotFrame,
+    from_micros,
+    to_micros,
+)
+
+
+START = datetime(2025, 3, 1, tzinfo=UTC)
+
+
+def _shot(i: int, club: str = "7i", session_id: str | None = "s1") -> Shot:
+    return Shot(
+        id=str(i),
+        captured_at=START + timedelta(minutes=i),
+        club=club,
+        metrics=ShotMetrics(
+            carry=150.0 + i,
+            offline=-1.0 * i,
+            ball_speed=110.0,
+            spin=6000 + i,
+            launch_angle=None if i % 2 else 18.0,
+        ),
+        session_id=session_id,
+        is_outlier=i == 3,
+    )
+
+
+@pytest.fixture
+def shots() -> list[Shot]:
+    return [_shot(i, "7i" if i % 3 else "driver", None if i > 8 else "s1") for i in range(12)]
+
+
+def test_append_and_slice(shots: list[Shot]) -> None:
+    """Test appending past the initial capacity and slicing without copies."""
+    frame = ShotFrame()
+    for i in range(100):
+        frame.append(_shot(i))
+    irons = frame["7i"]
+    assert len(irons) == 100 and irons.capacity >= 100
+    np.testing.assert_array_equal(irons.carry, 150.0 + np.arange(100))
+    assert np.isnan(irons.launch_angle[1]) and irons.launch_angle[0] == 18.0
+
+    last = irons.last(10)
+    assert np.shares_memory(last.carry, irons.carry)
+    np.testing.assert_array_equal(last.spin, 6090 + np.arange(10))
+
+    window = irons.between(START + timedelta(minutes=9), START + timedelta(minutes=12))
+    assert np.shares_memory(window.carry, irons.carry)
+    assert [from_micros(int(t)).minute for t in window.captured_at] == [10, 11, 12]
+
+    # appending to a view copies it instead of overwriting the frame
+    last.append(**dict.fromkeys(COLUMNS, 0))
+    assert len(last) == 11 and irons.carry[90] == 240.0
+    assert not np.shares_memory(last.carry, irons.carry)
+
+    with pytest.raises(ValueError, match="older"):
+        frame.append(_shot(5))
+    with pytest.raises(AttributeError):
+        _ = irons.club
+
+
+def test_sessions_and_clubs(shots: list[Shot]) -> None:
+    """Test club partitions and session indexes."""
+    frame = ShotFrame.from_shots(reversed(shots))
+    assert frame.clubs == ["driver", "7i"]
+    assert len(frame) == 12 and "driver" in frame and "5i" not in frame
+    assert frame.sessions == ["s1"]
+    assert frame["7i"].is_sorted()
+    assert set(frame["driver"].session.tolist()) == {0, NO_SESSION}
+    assert frame["driver"].is_outlier.tolist() == [False, True, False, False]
+    assert dict(frame.items()).keys() == {"7i", "driver"}
+
+
+def test_from_sqlite_rows(shots: list[Shot]) -> None:
+    """Test building a frame from shots table rows."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE shots ({', '.join(ROW_FIELDS)})")
+    rows = [
+        (
+            to_micros(s.captured_at),
+            s.club,
+            s.session_id,
+            s.metrics.carry,
+            s.metrics.offline,
+            s.metrics.ball_speed,
+            s.metrics.spin,
+            s.metrics.launch_angle,
+            s.metrics.launch_direction,
+            int(s.is_outlier),
+        )
+        for s in shots
+    ]
+    # insert out of order, the frame sorts each club by capture time
+    conn.executemany(f"INSERT INTO shots VALUES ({', '.join('?' * len(ROW_FIELDS))})", rows[::-1])
+
+    expected = ShotFrame.from_shots(shots)
+    for frame in (
+        ShotFrame.from_rows(conn.execute(SELECT_ROWS_SQL)),
+        ShotFrame.from_rows(conn.execute("SELECT * FROM shots")),
+    ):
+        for club, columns in expected.items():
+            for name in ("captured_at", "carry", "spin", "launch_angle", "is_outlier"):
+                np.testing.assert_array_equal(frame[club][name], columns[name])
+            assert [
+                frame.sessions[s] if s != NO_SESSION else None for s in frame[club].session
+            ] == [expected.sessions[s] if s != NO_SESSION else None for s in columns.session]
+    assert len(ShotFrame.from_rows([])) == 0
+
+
+def test_save_and_load(tmp_path: Path, shots: list[Shot]) -> None:
+    """Test the memory-mapped round trip and appending to a loaded frame."""
+    frame = ShotFrame.from_shots(shots)
+    frame.save(tmp_path / "frame")
+
+    loaded = ShotFrame.load(tmp_path / "frame")
+    assert isinstance(loaded["7i"]._data["carry"], np.memmap)
+    assert loaded.clubs == frame.clubs and loaded.sessions == frame.sessions
+    np.testing.assert_array_equal(loaded["7i"].carry, frame["7i"].carry)
+
+    loaded.append(_shot(20, "7i", "s2"))
+    assert len(loaded["7i"]) == len(frame["7i"]) + 1
+    assert loaded.sessions == ["s1", "s2"]
+    assert len(ShotFrame.load(tmp_path / "frame")["7i"]) == len(frame["7i"])
+
+
+def test_micros_roundtrip() -> None:
+    """Test the captured_at encoding."""
+    t = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=UTC)
+    assert from_micros(to_micros(t)) == t
+    assert to_micros(t.replace(tzinfo=None)) == to_micros(t)
+    assert len(ShotColumns(capacity=4)) == 0
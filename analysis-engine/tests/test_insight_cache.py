@@ -0,0 +1,144 @@
+"""Insight cache tests."""
+
+import random
+from datetime import UTC, datetime, timedelta
+
+from insights.batch import generate_insights
+from insights.cache import InsightCache, InsightKey, InsightState
+from models import Insight, Shot, ShotMetrics, TrendEngineConfig
+from models.frame import ShotFrame
+
+
+START = datetime(2025, 1, 1, tzinfo=UTC)
+CONFIG = TrendEngineConfig(windows=["last_10", "last_25"], min_samples_trend=10)
+
+
+def _shots(n: int, seed: int = 0, clubs: tuple[str, ...] = ("7i", "Dr")) -> list[Shot]:
+    rng = random.Random(seed)
+    shots: list[Shot] = []
+    for i in range(n):
+        # carry steps up by 10y halfway through, then slowly drifts back
+        carry = 150 + (10 - 0.05 * (i - n // 2) if i >= n // 2 else 0)
+        shots.append(
+            Shot(
+                id=str(i),
+                captured_at=START + timedelta(minutes=i),
+                club=rng.choice(clubs),
+                metrics=ShotMetrics(
+                    carry=rng.gauss(carry, 3),
+                    offline=rng.gauss(0, 5),
+                    ball_speed=rng.gauss(118, 2),
+                    spin=rng.randint(6000, 7000),
+                ),
+            )
+        )
+    return shots
+
+
+def _insight(delta: float, p_value: float, metric: str = "carry") -> Insight:
+    return Insight(
+        id="x",
+        club="7i",
+        metric=metric,
+        kind="step_change",
+        window="last_25",
+        baseline="prev_25",
+        delta=delta,
+        ci=(delta - 1, delta + 1),
+        p_value=p_value,
+        effect_size=1.0,
+        text="",
+        created_at=START,
+    )
+
+
+def test_insight_state() -> None:
+    """Test that the state changes with direction, and by steps of significance and magnitude."""
+    state = InsightState.of(_insight(4.2, 0.03))
+    assert not state.differs(InsightState.of(_insight(5.9, 0.02)))
+    assert not state.differs(InsightState.of(_insight(2.5, 0.04)))
+    assert state.differs(InsightState.of(_insight(-4.2, 0.03)))
+    assert not state.differs(InsightState.of(_insight(4.2, 0.005)))
+    assert state.differs(InsightState.of(_insight(4.2, 0.002)))
+    assert not InsightState.of(_insight(4.2, 1e-4)).differs(InsightState.of(_insight(4.2, 1e-9)))
+    assert state.differs(InsightState.of(_insight(6.2, 0.03)))
+    assert InsightState.of(_insight(40, 0.03, "spin")).magnitude == 0.4
+
+
+def test_emits_only_changes() -> None:
+    """Test that insights are emitted only when new or changed."""
+    cache = InsightCache(CONFIG)
+    frame = ShotFrame()
+    computed = emitted = 0
+    last: dict[InsightKey, InsightState] = {}
+    for shot in _shots(300):
+        frame.append(shot)
+        new = cache.update(frame)
+        expected = generate_insights(frame, CONFIG)
+        computed += len(expected)
+        emitted += len(new)
+
+        expected_keys = {InsightKey.of(i): i for i in expected}
+        assert {InsightKey.of(i) for i in cache.current()} == set(expected_keys)
+        for insight in new:
+            key = InsightKey.of(insight)
+            assert insight.text == expected_keys[key].text
+            assert key not in last or last[key].differs(InsightState.of(insight))
+            last[key] = InsightState.of(insight)
+    assert emitted > 0
+    assert computed > 5 * emitted
+    # unchanged clubs are not even evaluated
+    assert cache.suppressed < computed - emitted
+
+
+def test_unchanged_clubs_are_skipped() -> None:
+    """Test that a club is evaluated again only when its version changes."""
+    frame = ShotFrame.from_shots(_shots(200))
+    cache = InsightCache(CONFIG)
+    assert cache.update(frame, versions={"7i": 1, "Dr": 1})
+    assert cache.evaluated == 2
+
+    assert cache.update(frame, versions={"7i": 1, "Dr": 1}) == []
+    assert (cache.evaluated, cache.skipped) == (2, 2)
+    assert cache.update(frame, versions={"7i": 2, "Dr": 1}) == []
+    assert (cache.evaluated, cache.skipped) == (3, 3)
+
+    # without versions, shots added or retagged are detected from the frame
+    cache = InsightCache(CONFIG)
+    cache.update(frame)
+    cache.update(frame)
+    assert cache.skipped == 2
+    frame["7i"]["is_outlier"][-1] = True
+    cache.update(frame)
+    assert (cache.evaluated, cache.skipped) == (3, 3)
+    # as are outliers swapped for others, however many there are
+    frame["7i"]["is_outlier"][-2:] = [True, False]
+    cache.update(frame)
+    assert (cache.evaluated, cache.skipped) == (4, 4)
+
+
+def test_eviction() -> None:
+    """Test TTL and LRU eviction, and that forgotten insights are emitted again."""
+    now = [0.0]
+    frame = ShotFrame.from_shots(_shots(200))
+    cache = InsightCache(CONFIG, ttl=60, clock=lambda: now[0])
+    first = cache.update(frame)
+    assert len(cache) == len(first) > 0
+
+    # clubs are forgotten with their last insight, so they are evaluated again
+    now[0] = 61
+    assert [i.text for i in cache.update(frame)] == [i.text for i in first]
+    assert cache.evaluated == 2 + len({i.club for i in first})
+    now[0] = 122
+    cache.update(ShotFrame())
+    assert len(cache) == 0
+    kept = set(cache._versions)  # pyright: ignore[reportPrivateUsage]
+    assert kept == set(frame.clubs) - {i.club for i in first}
+
+    cache = InsightCache(CONFIG, max_entries=3)
+    frame = ShotFrame()
+    for shot in _shots(300):
+        frame.append(shot)
+        cache.update(frame)
+        assert len(cache) <= 3
+    assert len(cache) == 3
@@ -0,0 +1,35 @@
+"""Optimal shot chart model tests."""
+
+import matplotlib
+import pytest
+
+from models.optimalshotchart import (
+    OPTIMAL_SHOT_CHART,
+    OptimalShotChartModel,
+    plot_optimal_shot_chart,
+)
+
+
+@pytest.fixture(scope="module")
+def model() -> OptimalShotChartModel:
+    return OptimalShotChartModel(OPTIMAL_SHOT_CHART)
+
+
+def test_axes(model: OptimalShotChartModel) -> None:
+    """Test the ball speed and angle of attack axes."""
+    assert model.get_ball_speeds()[:2] == [200.0, 190.0]
+    assert len(model.get_ball_speeds()) == 13
+    assert model.get_attack_angles() == [float(a) for a in range(-10, 11, 2)]
+    assert model.get_chart() is OPTIMAL_SHOT_CHART
+
+
+def test_optimal_score(model: OptimalShotChartModel) -> None:
+    """Test reading the legend value of an entry."""
+    assert model.get_optimal_score_from_entry(200.0, 0.0) == 325
+    assert model.get_optimal_score_from_entry(201.0, 0.0) is None
+
+
+def test_plot(model: OptimalShotChartModel) -> None:
+    """Test that the chart plots without a display."""
+    matplotlib.use("Agg")
+    plot_optimal_shot_chart(model)
@@ -0,0 +1,127 @@
+"""MAD outlier tagging tests."""
+
+import random
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from models import Shot, ShotMetrics, TrendEngineConfig
+from models.frame import ShotFrame
+from stats.outliers import (
+    MadWindow,
+    OutlierTagger,
+    detect_outliers,
+    mad_scores,
+    retag_frame,
+)
+from stats.rollups import RollupEngine, compute_rollups
+
+
+START = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def _shots(n: int, seed: int = 0) -> list[Shot]:
+    rng = random.Random(seed)
+    shots = []
+    for i in range(n):
+        mishit = rng.random() < 0.04
+        shots.append(
+            Shot(
+                id=str(i),
+                captured_at=START + timedelta(minutes=i),
+                club=rng.choice(("7i", "Dr")),
+                metrics=ShotMetrics(
+                    carry=rng.gauss(165, 6) - (60 if mishit else 0),
+                    offline=rng.gauss(0, 5),
+                    ball_speed=rng.gauss(118, 2),
+                    spin=rng.randint(5500, 7000),
+                ),
+            )
+        )
+    return shots
+
+
+def test_detect_outliers() -> None:
+    """Test that values far from the median in MAD units are marked."""
+    assert detect_outliers([10, 11, 9, 10, 12, 10, 40, 14]) == [False] * 6 + [True, False]
+    assert detect_outliers([5, 5, 5, 5, 9]) == [False] * 5
+    assert detect_outliers([]) == []
+
+
+def test_mad_window_matches_numpy() -> None:
+    """Test that the rolling median and MAD equal NumPy's over the same values."""
+    rng = random.Random(3)
+    window = MadWindow(size=37)
+    values: list[float] = []
+    for _ in range(400):
+        value = float(rng.choice([1.0, 2.0, 2.0, rng.randint(-20, 20), rng.gauss(0, 5)]))
+        window.add(value)
+        values.append(value)
+        recent = np.array(values[-37:])
+        median = np.median(recent)
+        assert window.median() == pytest.approx(median, abs=1e-12)
+        assert window.mad() == pytest.approx(np.median(np.abs(recent - median)), abs=1e-12)
+
+
+def test_streaming_tags_match_retag() -> None:
+    """Test that tagging shots one by one gives the tags of the vectorized pass."""
+    shots = _shots(1500)
+    tagger = OutlierTagger(window=100)
+    for shot in shots:
+        tagger.tag(shot)
+    tagged = [s for s in shots if s.is_outlier]
+    assert 20 < len(tagged) < 300
+    assert all(s.outlier_reason for s in tagged)
+    assert any("carry" in (s.outlier_reason or "") for s in tagged)
+
+    frame = ShotFrame.from_shots(s.model_copy(update={"is_outlier": False}) for s in shots)
+    assert retag_frame(frame, window=100) == len(tagged)
+    for club, columns in frame.items():
+        expected = [s.is_outlier for s in shots if s.club == club]
+        assert columns.is_outlier.tolist() == expected
+
+    # a stricter threshold untags some shots
+    changed = retag_frame(frame, TrendEngineConfig(outlier_mad_threshold=5.0), window=100)
+    assert 0 < changed == len(tagged) - sum(c.is_outlier.sum() for _, c in frame.items())
+
+
+def test_tags_overwrite_previous_tags() -> None:
+    """Test that both tagging paths replace a shot's previous tag with their own."""
+    shots = [
+        s.model_copy(update={"is_outlier": True, "outlier_reason": "old"}) for s in _shots(300)
+    ]
+    frame = ShotFrame.from_shots(shots)
+    tagger = OutlierTagger(window=100)
+    for shot in shots:
+        tagger.tag(shot)
+    assert not all(s.is_outlier for s in shots)
+    assert all(s.outlier_reason != "old" for s in shots)
+
+    retag_frame(frame, window=100)
+    for club, columns in frame.items():
+        assert columns.is_outlier.tolist() == [s.is_outlier for s in shots if s.club == club]
+
+
+def test_mad_scores_before_min_samples() -> None:
+    """Test that a club's first shots are never scored."""
+    frame = ShotFrame.from_shots(_shots(30))
+    scores = mad_scores(frame["7i"], "carry", min_samples=10)
+    assert (scores[:10] == 0).all()
+    assert (scores[10:] > 0).any()
+
+
+def test_rollup_engine_tags_and_excludes() -> None:
+    """Test that a tagging engine leaves out the outliers it tags as they arrive."""
+    shots = _shots(400, seed=1)
+    engine = RollupEngine(tagger=OutlierTagger())
+    for shot in shots:
+        engine.add(shot)
+    assert any(s.is_outlier for s in shots)
+    for club in engine.clubs:
+        expected = compute_rollups(club, shots)
+        actual = engine.rollups(club)
+        assert [(r.window, r.metric, r.n) for r in actual] == [
+            (r.window, r.metric, r.n) for r in expected
+        ]
+        np.testing.assert_allclose([r.mean for r in actual], [r.mean for r in expected])
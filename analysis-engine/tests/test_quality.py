@@ -0,0 +1,100 @@
+"""Shot quality scoring tests."""
+
+import numpy as np
+import pytest
+
+from insights.quality import (
+    HINT_LAUNCH_HIGH,
+    HINT_ON_TARGET,
+    HINT_SPIN_HIGH,
+    HINT_SPIN_LOW,
+    HINTS,
+    infer_angle_of_attack,
+    score_shots,
+)
+from models.optimalshotchart import OPTIMAL_SHOT_CHART, OptimalShotChartModel
+
+
+def test_optimal_shot_grades_a() -> None:
+    """Test that a shot matching the chart exactly is on target."""
+    launch, spin, carry, _ = OPTIMAL_SHOT_CHART[(160.0, 2.0)]
+    scores = score_shots([160.0], [launch], [spin], [carry], [2.0])
+    assert scores.grade.tolist() == ["A"]
+    assert scores.hint == [HINTS[HINT_ON_TARGET]]
+    assert scores.carry_delta[0] == pytest.approx(0.0)
+    assert not scores.aoa_inferred[0]
+
+
+def test_grades_and_hints() -> None:
+    """Test grading by carry efficiency and hinting at the largest deviation."""
+    # optimum at 150 mph / 0 deg: launch 12.4, spin 2600, carry 249
+    scores = score_shots(
+        ball_speed=[150.0] * 4,
+        launch=[12.4, 17.0, 12.0, 13.0],
+        spin=[2600.0, 2700.0, 3400.0, 1900.0],
+        carry=[249.0, 235.0, 220.0, 190.0],
+        angle_of_attack=[0.0] * 4,
+    )
+    assert scores.grade.tolist() == ["A", "B", "C", "D"]
+    assert scores.hint_code.tolist() == [
+        HINT_ON_TARGET,
+        HINT_LAUNCH_HIGH,
+        HINT_SPIN_HIGH,
+        HINT_SPIN_LOW,
+    ]
+    np.testing.assert_allclose(scores.launch_delta, [0.0, 4.6, -0.4, 0.6], atol=1e-9)
+    np.testing.assert_allclose(scores.spin_delta, [0.0, 100.0, 800.0, -700.0])
+    assert len(scores) == 4
+
+
+def test_infer_angle_of_attack() -> None:
+    """Test recovering the angle of attack from launch and spin."""
+    keys = [(170.0, -6.0), (130.0, 4.0), (90.0, 10.0)]
+    speeds = np.array([k[0] for k in keys])
+    launches = np.array([OPTIMAL_SHOT_CHART[k][0] for k in keys])
+    spins = np.array([OPTIMAL_SHOT_CHART[k][1] for k in keys])
+    np.testing.assert_allclose(infer_angle_of_attack(speeds, launches, spins), [-6.0, 4.0, 10.0])
+
+
+def test_partially_missing_angle_of_attack() -> None:
+    """Test that only NaN angles of attack are inferred."""
+    launch, spin, carry, _ = OPTIMAL_SHOT_CHART[(120.0, -4.0)]
+    scores = score_shots([120.0, 120.0], [launch] * 2, [spin] * 2, [carry] * 2, [np.nan, 8.0])
+    assert scores.aoa_inferred.tolist() == [True, False]
+    np.testing.assert_allclose(scores.angle_of_attack, [-4.0, 8.0])
+    assert scores.grade[0] == "A"
+
+
+def test_missing_ball_speed() -> None:
+    """Test that a shot without a ball speed gets no optimum, leaving the others graded."""
+    launch, spin, carry, _ = OPTIMAL_SHOT_CHART[(120.0, -4.0)]
+    scores = score_shots([np.nan, 120.0], [launch] * 2, [spin] * 2, [carry] * 2)
+    assert np.isnan(scores.efficiency[0])
+    assert scores.grade[1] == "A"
+
+
+def test_scores_a_session() -> None:
+    """Test that a whole session is scored in one call, every shot graded."""
+    rng = np.random.default_rng(0)
+    n = 500
+    speed = rng.uniform(80, 200, n)
+    scores = score_shots(
+        speed, rng.uniform(5, 25, n), rng.uniform(1500, 4000, n), speed * 1.6, None
+    )
+    assert len(scores) == n
+    assert scores.aoa_inferred.all()
+    assert set(scores.grade.tolist()) <= {"A", "B", "C", "D"}
+
+
+def test_inference_searches_the_charts_own_angles() -> None:
+    """Test that a custom chart's angle of attack range is searched, not a fixed one."""
+    chart = {
+        (speed, aoa): (10.0 + aoa, 3000.0 - 20 * aoa, speed * 1.5, 0.0)
+        for speed in (100.0, 150.0)
+        for aoa in (-20.0, -15.0, 0.0)
+    }
+    model = OptimalShotChartModel(chart)
+    inferred = infer_angle_of_attack(
+        np.array([120.0, 120.0]), np.array([-10.0, -3.0]), np.array([3400.0, 3260.0]), model
+    )
+    np.testing.assert_allclose(inferred, [-20.0, -13.0])
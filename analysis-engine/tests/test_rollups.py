@@ -0,0 +1,181 @@
+"""Rolling statistics tests."""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from models import Rollup, Shot, ShotMetrics, TrendEngineConfig
+from stats.rollups import (
+    RollupEngine,
+    RunningStats,
+    SortedBlocks,
+    WindowSpec,
+    compute_rollups,
+)
+
+
+START = datetime(2025, 1, 1)
+
+
+def _shots(n: int, seed: int = 0, clubs: tuple[str, ...] = ("7i",)) -> list[Shot]:
+    rng = random.Random(seed)
+    shots = []
+    t = START
+    for i in range(n):
+        t += timedelta(hours=rng.expovariate(1 / 12))
+        shots.append(
+            Shot(
+                id=str(i),
+                captured_at=t,
+                club=rng.choice(clubs),
+                metrics=ShotMetrics(
+                    carry=rng.gauss(165, 8),
+                    offline=rng.gauss(0, 6),
+                    ball_speed=rng.gauss(118, 3),
+                    # repeated values exercise duplicate handling in the sorted blocks
+                    spin=rng.choice([6000, 6200, 6400, rng.randint(5000, 7500)]),
+                ),
+                is_outlier=rng.random() < 0.05,
+            )
+        )
+    return shots
+
+
+def _key(rollups: list[Rollup]) -> dict[tuple[str, str], Rollup]:
+    return {(r.window, r.metric): r for r in rollups}
+
+
+def _assert_close(actual: list[Rollup], expected: list[Rollup]) -> None:
+    actual_by_key, expected_by_key = _key(actual), _key(expected)
+    assert actual_by_key.keys() == expected_by_key.keys()
+    for key, e in expected_by_key.items():
+        a = actual_by_key[key]
+        assert (a.n, a.updated_at) == (e.n, e.updated_at), key
+        np.testing.assert_allclose(
+            [a.mean, a.sd, a.median, a.iqr], [e.mean, e.sd, e.median, e.iqr], rtol=1e-9, atol=1e-9
+        )
+
+
+def test_compute_rollups() -> None:
+    """Test a full recompute against hand-picked values."""
+    shots = [
+        Shot(
+            id=str(i),
+            captured_at=START + timedelta(days=i),
+            club="7i",
+            metrics=ShotMetrics(carry=carry, offline=0.0, ball_speed=120.0, spin=6000),
+        )
+        for i, carry in enumerate([150.0, 160.0, 170.0, 180.0])
+    ]
+    config = TrendEngineConfig(windows=["last_3", "last_2d"])
+    rollups = _key(compute_rollups("7i", shots, config))
+    carry = rollups[("last_3", "carry")]
+    assert (carry.mean, carry.median, carry.iqr, carry.n) == (170.0, 170.0, 10.0, 3)
+    assert carry.sd == pytest.approx(np.std([160.0, 170.0, 180.0]))
+    assert rollups[("last_2d", "carry")].n == 2
+    assert compute_rollups("driver", shots, config) == []
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_engine_matches_full_recompute(seed: int) -> None:
+    """Test that incremental rollups equal a NumPy recompute after every shot."""
+    config = TrendEngineConfig(windows=["last_1", "last_10", "last_25", "last_3d", "last_30d"])
+    engine = RollupEngine(config)
+    shots = _shots(300, seed, clubs=("7i", "driver"))
+    for i, shot in enumerate(shots):
+        rollups = engine.add(shot)
+        _assert_close(rollups, compute_rollups(shot.club, shots[: i + 1], config))
+    assert sorted(engine.clubs) == ["7i", "driver"]
+
+
+def test_engine_long_history() -> None:
+    """Test block splitting and resyncing over a long history."""
+    config = TrendEngineConfig(windows=["last_600", "last_90d"], exclude_outliers=False)
+    engine = RollupEngine(config)
+    shots = _shots(3000, seed=7)
+    for shot in shots:
+        engine.add(shot)
+    _assert_close(engine.rollups("7i"), compute_rollups("7i", shots, config))
+
+
+def test_engine_advances_time_windows() -> None:
+    """Test that asking for a later time drops shots from time windows."""
+    config = TrendEngineConfig(windows=["last_7d"])
+    engine = RollupEngine(config)
+    shots = _shots(50)
+    for shot in shots:
+        engine.add(shot)
+    later = shots[-1].captured_at + timedelta(days=3)
+    _assert_close(engine.rollups("7i", later), compute_rollups("7i", shots, config, later))
+    with pytest.raises(ValueError, match="older than"):
+        engine.add(shots[-1])
+    assert engine.rollups("driver") == []
+
+
+def test_engine_version() -> None:
+    """Test that the version changes exactly when a club's windows do."""
+    config = TrendEngineConfig(windows=["last_10", "last_7d"])
+    engine = RollupEngine(config)
+    shots = [s for s in _shots(30) if not s.is_outlier]
+    for i, shot in enumerate(shots, 1):
+        engine.add(shot)
+        assert engine.version("7i") == i
+    assert engine.version("driver") == 0
+
+    outlier = shots[-1].model_copy(update={"id": "x", "is_outlier": True})
+    engine.add(outlier)
+    engine.rollups("7i", shots[-1].captured_at)
+    assert engine.version("7i") == len(shots)
+    engine.rollups("7i", shots[-1].captured_at + timedelta(days=30))
+    assert engine.version("7i") == len(shots) + 1
+
+
+def test_running_stats() -> None:
+    """Test Welford updates with removals down to empty and back."""
+    stats = RunningStats(resync_every=3)
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 1.0, 50).tolist()
+    for v in values:
+        stats.add(v)
+    for v in values[:45]:
+        stats.remove(v)
+    assert stats.mean == pytest.approx(np.mean(values[45:]), rel=1e-12)
+    assert stats.sd == pytest.approx(np.std(values[45:]), rel=1e-6)
+    for v in values[45:]:
+        stats.remove(v)
+    assert (stats.n, stats.sd) == (0, 0.0)
+
+
+def test_sorted_blocks() -> None:
+    """Test the sorted block list against a sorted Python list."""
+    rng = random.Random(0)
+    blocks = SortedBlocks(load=4)
+    reference: list[float] = []
+    for _ in range(2000):
+        if reference and rng.random() < 0.45:
+            value = rng.choice(reference)
+            blocks.remove(value)
+            reference.remove(value)
+        else:
+            value = float(rng.randint(0, 50))
+            blocks.add(value)
+            reference.append(value)
+        reference.sort()
+        assert len(blocks) == len(reference)
+    assert list(blocks) == reference
+    assert [blocks[k] for k in range(len(reference))] == reference
+    with pytest.raises(ValueError):
+        blocks.remove(51.0)
+    with pytest.raises(IndexError):
+        blocks[len(reference)]
+
+
+def test_window_spec() -> None:
+    """Test parsing window names."""
+    assert WindowSpec.parse("last_25") == WindowSpec("last_25", count=25)
+    assert WindowSpec.parse("last_7d") == WindowSpec("last_7d", span=timedelta(days=7))
+    for name in ("last_0", "prev_25", "last_7w"):
+        with pytest.raises(ValueError, match="unknown window"):
+            WindowSpec.parse(name)
@@ -0,0 +1 @@
+"""Benchmarks for the shot ingest path. Run with ``python -m benchmarks.<name>``."""
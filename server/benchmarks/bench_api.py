@@ -0,0 +1,97 @@
+"""
+Read latency of the dashboard endpoints as the shot table grows: keyset vs OFFSET
+pages of ``/api/shots``, club stats from memory vs aggregated from the rows, and
+conditional GETs answered with a 304.
+
+    python -m benchmarks.bench_api
+"""
+
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlalchemy import func, select
+
+from benchmarks.bench_storage import _row
+from server.main import create_app
+from server.storage import ShotStore, shots
+
+
+SIZES = (10_000, 100_000)
+REPEAT = 200
+PAGE = 50
+
+
+async def _time(fn: Callable[[], Awaitable[Any]]) -> float:
+    """Median seconds per call"""
+    latencies = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies)
+
+
+async def _run(n_shots: int) -> None:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ShotStore(Path(tmp) / "bench.db")
+        app = create_app(store=store)
+        async with app.router.lifespan_context(app):
+            t0 = 1_700_000_000_000_000
+            await store.backfill_shots(_row(rng, t0 + i * 60_000_000) for i in range(n_shots))
+            # the page 90% of the way back through the history
+            depth = int(n_shots * 0.9)
+            stmt = select(shots).order_by(shots.c.captured_at.desc(), shots.c.id.desc())
+            deep = (await store._fetch(stmt.offset(depth - 1).limit(1)))[0]
+            before = (deep["captured_at"], deep["id"])
+            aggregate = select(
+                func.count(), func.avg(shots.c.carry), func.avg(shots.c.offline)
+            ).where(shots.c.club == "7i")
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.get("/api/clubs/7i/stats")
+                tag = {"If-None-Match": response.headers["etag"]}
+                results = (
+                    (
+                        "first page",
+                        await _time(lambda: store.list_shots(limit=PAGE)),
+                    ),
+                    (
+                        "deep page, keyset",
+                        await _time(lambda: store.list_shots(limit=PAGE, before=before)),
+                    ),
+                    (
+                        "deep page, OFFSET",
+                        await _time(lambda: store._fetch(stmt.offset(depth).limit(PAGE))),
+                    ),
+                    ("stats, aggregated", await _time(lambda: store._fetch(aggregate))),
+                    ("GET stats", await _time(lambda: client.get("/api/clubs/7i/stats"))),
+                    (
+                        "GET stats, 304",
+                        await _time(lambda: client.get("/api/clubs/7i/stats", headers=tag)),
+                    ),
+                )
+    print(f"{n_shots:,} shots")
+    for name, elapsed in results:
+        print(f"  {name:<18} {elapsed * 1e3:8.3f} ms")
+
+
+async def main_async() -> None:
+    for n_shots in SIZES:
+        await _run(n_shots)
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Re-ingest a season of synthetic logs, serially and across a process pool.
+
+    python -m benchmarks.bench_backfill
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import log_bytes
+from parser.backfill import backfill_logs
+
+
+N_LOGS = 12
+SHOTS_PER_LOG = 1_500
+NOISE_PER_SHOT = 200
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(N_LOGS):
+            path = Path(tmp) / f"output_log_{i:02}.txt"
+            path.write_bytes(log_bytes(SHOTS_PER_LOG, NOISE_PER_SHOT, seed=i))
+            paths.append(str(path))
+        total_mb = sum(Path(p).stat().st_size for p in paths) / 1e6
+        print(f"{N_LOGS} logs, {total_mb:.0f} MB, {N_LOGS * SHOTS_PER_LOG:,} shots")
+
+        for name, workers in (("serial", 0), ("process pool", None)):
+            start = time.perf_counter()
+            streams = backfill_logs(paths, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            n_shots = sum(len(s) for s in streams)
+            assert n_shots == N_LOGS * SHOTS_PER_LOG
+            print(f"{name:<13} {elapsed:6.2f} s  {total_mb / elapsed:7.0f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
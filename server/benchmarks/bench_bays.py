@@ -0,0 +1,84 @@
+"""
+One process following a facility: N bays written to in real time, each at a couple
+of shots a second in Unity's noise, with the latency from a shot line being flushed
+to ``BaySupervisor`` handing it out, and the CPU the process used meanwhile (log
+writers included).
+
+    python -m benchmarks.bench_bays
+"""
+
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import replay_log
+from models.models import Shot
+from server.bays import Bay, BaySource, BaySupervisor
+
+
+BAYS = (8, 32, 64)
+SHOTS_PER_BAY = 20
+SHOTS_PER_SECOND = 2.0
+NOISE_PER_SECOND = 200.0
+
+
+async def _run(n_bays: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = [Path(tmp) / f"bay-{i}.txt" for i in range(n_bays)]
+        for log in logs:
+            log.touch()
+        received: dict[tuple[str, int], float] = {}
+
+        def on_shot(bay: Bay, shot: Shot) -> None:
+            received[bay.bay_id, shot.ShotNumber] = time.perf_counter()
+
+        sources = [BaySource(str(i), str(log)) for i, log in enumerate(logs)]
+        written: dict[str, dict[int, float]] = {}
+
+        def write(bay_id: str, log: Path) -> None:
+            written[bay_id] = replay_log(
+                log, SHOTS_PER_BAY, SHOTS_PER_SECOND, NOISE_PER_SECOND, seed=int(bay_id)
+            )
+
+        async with BaySupervisor(sources, on_shot) as bays:
+            await asyncio.sleep(0.2)
+            cpu, wall = time.process_time(), time.perf_counter()
+            writers = [
+                threading.Thread(target=write, args=(source.bay_id, log))
+                for source, log in zip(sources, logs, strict=True)
+            ]
+            for writer in writers:
+                writer.start()
+            await asyncio.to_thread(lambda: [writer.join() for writer in writers])
+            while len(received) < n_bays * SHOTS_PER_BAY:
+                await asyncio.sleep(0.01)
+            cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+            lag = max(bay["lag_bytes"] for bay in bays.snapshot())
+
+    latencies = sorted(
+        received[bay_id, shot_id] - flushed
+        for bay_id, shots in written.items()
+        for shot_id, flushed in shots.items()
+    )
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{n_bays:>3} bays  {len(latencies):5} shots  "
+        f"p50 {statistics.median(latencies) * 1e3:6.2f} ms  p99 {p99 * 1e3:6.2f} ms  "
+        f"cpu {cpu / wall:6.1%}  max lag {lag} B"
+    )
+
+
+async def main_async() -> None:
+    for n_bays in BAYS:
+        await _run(n_bays)
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Load test of the /ws fan-out: hundreds of local WebSocket dashboards, a few of which
+stop reading, receiving a stream of shots and insight batches. Compression is off so
+the numbers measure the hub rather than zlib.
+
+    python -m benchmarks.bench_broadcast
+"""
+
+import asyncio
+import json
+import secrets
+import socket
+import statistics
+import tempfile
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from websockets.asyncio.client import connect
+
+from server.main import create_app
+from server.storage import ShotStore
+
+
+N_CLIENTS = 300
+N_STALLED = 10
+N_SHOTS = 1000
+SHOT_INTERVAL = 0.005
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _dashboard(url: str, received: list[float], ready: asyncio.Event, done: int) -> None:
+    async with connect(url, max_queue=None, compression=None) as ws:
+        ready.set()
+        async for text in ws:
+            payload = json.loads(text)
+            if isinstance(payload, dict) and payload["type"] == "shot":
+                received.append(time.perf_counter() - payload["shot"]["sent"])
+                if payload["shot"]["i"] == done:
+                    return
+
+
+async def _stalled(url: str, ready: asyncio.Event, stop: asyncio.Event) -> None:
+    # a phone on bad wifi: small receive buffer, and nothing read from it
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    host, port = url.removeprefix("ws://").split("/")[0].split(":")
+    await asyncio.get_running_loop().sock_connect(sock, (host, int(port)))
+    async with connect(url, sock=sock, max_queue=1, compression=None) as ws:
+        ready.set()
+        await stop.wait()
+        await ws.close()
+
+
+async def main_async() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        await _run(create_app(store=ShotStore(f"{tmp}/bench.db")))
+
+
+async def _run(app: FastAPI) -> None:
+    hub = app.state.hub
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    url = f"ws://127.0.0.1:{port}/ws"
+
+    latencies: list[list[float]] = [[] for _ in range(N_CLIENTS)]
+    ready = [asyncio.Event() for _ in range(N_CLIENTS + N_STALLED)]
+    stop = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_dashboard(url, latencies[i], ready[i], N_SHOTS - 1))
+        for i in range(N_CLIENTS)
+    ]
+    tasks += [
+        asyncio.create_task(_stalled(url, ready[N_CLIENTS + i], stop)) for i in range(N_STALLED)
+    ]
+    await asyncio.gather(*(e.wait() for e in ready))
+    while len(hub.clients) < N_CLIENTS + N_STALLED:
+        await asyncio.sleep(0.01)
+    connected = list(hub.clients)
+
+    # stands in for the raw launch monitor JSON, random so compression cannot hide it
+    raw = [secrets.token_hex(2000) for _ in range(N_SHOTS)]
+    publish = []
+    for i in range(N_SHOTS):
+        start = time.perf_counter()
+        hub.publish_shot({"i": i, "club": "7i", "sent": start, "raw": raw[i]})
+        if i % 25 == 0:
+            hub.publish_insights([{"id": f"{i}-{k}", "club": "7i"} for k in range(3)])
+        publish.append(time.perf_counter() - start)
+        await asyncio.sleep(SHOT_INTERVAL)
+    await asyncio.wait_for(asyncio.gather(*tasks[:N_CLIENTS]), 30)
+    dropped = sum(c.dropped for c in connected)
+    stop.set()
+    await asyncio.gather(*tasks[N_CLIENTS:])
+
+    server.should_exit = True
+    await serving
+
+    all_latencies = sorted(x for client in latencies for x in client)
+    per_event_p99 = sorted(max(client[i] for client in latencies) for i in range(N_SHOTS))
+    print(f"{N_CLIENTS} dashboards + {N_STALLED} stalled, {N_SHOTS} shots")
+    print(
+        f"publish         p50 {statistics.median(publish) * 1e6:7.0f} us  "
+        f"max {max(publish) * 1e6:7.0f} us"
+    )
+    print(
+        f"delivery        p50 {statistics.median(all_latencies) * 1e3:7.2f} ms  "
+        f"p99 {all_latencies[int(len(all_latencies) * 0.99)] * 1e3:7.2f} ms"
+    )
+    print(
+        f"last client     p50 {statistics.median(per_event_p99) * 1e3:7.2f} ms  "
+        f"max {per_event_p99[-1] * 1e3:7.2f} ms"
+    )
+    print(f"shot frames coalesced for stalled clients: {dropped}")
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cost of rejecting a duplicate shot: in the ``DedupeIndex`` vs by the database's unique
+index, and a full replay of the history through ``ShotIngest``.
+
+    python -m benchmarks.bench_dedupe
+"""
+
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from models.models import BallData, Shot
+from server.dedupe import DedupeIndex
+from server.ingest import ShotIngest, shot_row
+from server.storage import ShotStore
+
+
+N_SHOTS = 100_000
+REPEAT = 2_000
+
+
+def _rows(n_shots: int) -> list[dict]:
+    rng = random.Random(0)
+    rows = []
+    for i in range(n_shots):
+        ball = BallData(
+            Speed=rng.gauss(120, 15),
+            SpinAxis=rng.gauss(0, 5),
+            TotalSpin=rng.gauss(6000, 1500),
+            HLA=rng.gauss(0, 3),
+            VLA=rng.gauss(18, 4),
+        )
+        row = shot_row(Shot(BallData=ball), club="7i", carry=150.0, offline=0.0)
+        rows.append({**row, "captured_at": 1_700_000_000_000_000 + i * 60_000_000})
+    return rows
+
+
+async def main_async() -> None:
+    rows = _rows(N_SHOTS)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ShotStore(Path(tmp) / "bench.db")
+        ingest = ShotIngest(store, DedupeIndex(Path(tmp) / "bench.bloom"))
+        async with store, ingest:
+            start = time.perf_counter()
+            await ingest.backfill(rows)
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            inserted = await ingest.backfill(rows)
+            replay = time.perf_counter() - start
+            assert inserted == 0
+
+            sample = random.Random(1).sample(rows, REPEAT)
+            in_memory, in_db = [], []
+            for row in sample:
+                start = time.perf_counter()
+                await ingest.add(row)
+                in_memory.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                await store.add_shots([{**row, "id": f"{row['id']}-again"}])
+                in_db.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        warm = DedupeIndex(Path(tmp) / "bench.bloom")
+        async with ShotStore(Path(tmp) / "bench.db") as reopened:
+            await warm.warm(reopened)
+        warm_up = time.perf_counter() - start
+
+    print(f"{N_SHOTS:,} shots")
+    print(f"  backfill            {first:8.2f} s")
+    print(f"  full replay         {replay:8.2f} s  (0 inserted)")
+    print(f"  warm from filter    {warm_up:8.2f} s")
+    print(f"  reject, index       {statistics.median(in_memory) * 1e6:8.1f} µs")
+    print(f"  reject, database    {statistics.median(in_db) * 1e6:8.1f} µs")
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
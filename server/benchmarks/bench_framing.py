@@ -0,0 +1,106 @@
+"""
+GSPro Connect stream framing: old retry-on-every-brace parser vs GSProStreamDecoder.
+
+Concatenated: whole messages back to back in 2 KB reads (the only case the old parser
+handles). Fragmented: the same stream cut at random points, as TCP may deliver it.
+
+    python -m benchmarks.bench_framing
+"""
+
+import json
+import random
+import time
+from typing import Any
+
+from server.socket import GSProStreamDecoder
+
+
+N_MESSAGES = 20_000
+
+MESSAGES: list[dict[str, Any]] = [
+    {"Code": 200, "Message": "Ball Data received", "Player": None},
+    {
+        "Code": 201,
+        "Message": "GSPro Player Information",
+        "Player": {"Handed": "RH", "Club": "7I", "DistanceToTarget": 162.0},
+    },
+    {"Code": 202, "Message": "GSPro ready", "Player": None},
+]
+
+
+def _legacy_parse_gspro_data(data: bytes) -> list[dict[str, Any]]:
+    """The parser GSProSession used before the streaming decoder."""
+    text = data.decode()
+    len_processed = 0
+    result = []
+    while len_processed < len(text):
+        msg = None
+        start = len_processed
+        while msg is None:
+            idx_of_close_bracket = text.find("}", start)
+            substr = text[len_processed : idx_of_close_bracket + 1]
+            try:
+                msg = json.loads(substr)
+            except json.decoder.JSONDecodeError:
+                start = start + len(substr)
+        result.append(msg)
+        len_processed = len_processed + len(substr)
+    return result
+
+
+def _time(fn, reads: list[bytes]) -> float:
+    start = time.perf_counter()
+    n = fn(reads)
+    elapsed = time.perf_counter() - start
+    assert n == N_MESSAGES, n
+    return elapsed
+
+
+def _legacy(reads: list[bytes]) -> int:
+    return sum(len(_legacy_parse_gspro_data(r)) for r in reads)
+
+
+def _decoder(reads: list[bytes]) -> int:
+    decoder = GSProStreamDecoder()
+    return sum(len(decoder.decode(r)) for r in reads)
+
+
+def _streams(rng: random.Random, messages: list[dict[str, Any]]) -> tuple[list[bytes], list[bytes]]:
+    encoded = [json.dumps(rng.choice(messages)).encode() for _ in range(N_MESSAGES)]
+
+    # whole messages packed into reads of at most 2 KB
+    concatenated: list[bytes] = [b""]
+    for msg in encoded:
+        if len(concatenated[-1]) + len(msg) > 2048:
+            concatenated.append(b"")
+        concatenated[-1] += msg
+
+    stream = b"".join(encoded)
+    fragmented = []
+    pos = 0
+    while pos < len(stream):
+        size = rng.randint(1, 300)
+        fragmented.append(stream[pos : pos + size])
+        pos += size
+    return concatenated, fragmented
+
+
+def main() -> None:
+    rng = random.Random(0)
+    concatenated, fragmented = _streams(rng, MESSAGES)
+
+    for name, reads, fns in (
+        ("concatenated", concatenated, (("legacy", _legacy), ("decoder", _decoder))),
+        ("fragmented", fragmented, (("decoder", _decoder),)),
+    ):
+        for fn_name, fn in fns:
+            elapsed = _time(fn, reads)
+            print(
+                f"{name:<13} {fn_name:<8} {N_MESSAGES / elapsed:>10,.0f} msg/s  "
+                f"{elapsed / N_MESSAGES * 1e6:6.2f} us/msg"
+            )
+    print("fragmented    legacy   crashes on messages split across reads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Throughput of the batch shot parser vs calling ``parse_shot_file`` on every line.
+
+    python -m benchmarks.bench_parse
+"""
+
+import time
+
+from benchmarks.synthetic import log_bytes
+from parser.parse import parse_shot_buffer, parse_shot_file, parse_shot_lines
+
+
+N_SHOTS = 2_000
+NOISE_PER_SHOT = 200
+
+
+def main() -> None:
+    buf = log_bytes(N_SHOTS, NOISE_PER_SHOT)
+    lines = buf.decode().splitlines()
+    n_lines = len(lines)
+
+    def per_line() -> int:
+        return sum(1 for line in lines if parse_shot_file(line.strip()))
+
+    def batch_lines() -> int:
+        return sum(1 for _ in parse_shot_lines(lines))
+
+    def batch_buffer() -> int:
+        return sum(1 for _ in parse_shot_buffer(buf))
+
+    print(f"{n_lines:,} lines, {len(buf) / 1e6:.1f} MB, {N_SHOTS:,} shots")
+    for name, fn in (
+        ("parse_shot_file", per_line),
+        ("parse_shot_lines", batch_lines),
+        ("parse_shot_buffer", batch_buffer),
+    ):
+        start = time.perf_counter()
+        found = fn()
+        elapsed = time.perf_counter() - start
+        assert found == N_SHOTS, (name, found)
+        print(f"{name:<18} {n_lines / elapsed:>14,.0f} lines/s  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
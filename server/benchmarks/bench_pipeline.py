@@ -0,0 +1,142 @@
+"""
+End-to-end replay of the ingest path: a synthetic ``output_log.txt`` written in real
+time, tailed and parsed, every shot forwarded to a local GSPro Connect stand-in,
+persisted to a SQLite store and broadcast to a dashboard. Each stage is timed from the
+moment the shot's ``LaunchExt Vars:`` line was flushed to the log.
+
+The live run paces shots and Unity noise like a busy bay (faster, so that it finishes
+quickly); the burst run writes as fast as it can to find the throughput ceiling.
+
+    python -m benchmarks.bench_pipeline
+"""
+
+import asyncio
+import json
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.gspro_stub import GSProStub
+from benchmarks.synthetic import replay_log
+from models.models import Shot
+from parser.parse import parse_shot_buffer
+from parser.tailer import LogTailer
+from server.async_socket import AsyncGSProSession
+from server.broadcast import BroadcastHub, Message
+from server.storage import ShotStore, now_micros
+
+
+RUNS = (
+    # name, shots, shots/s (0: as fast as possible), noise lines/s
+    ("live", 200, 20.0, 2000.0),
+    ("burst", 2000, 0.0, 200.0),
+)
+STAGES = ("parsed", "gspro", "persisted", "broadcast")
+
+
+def _row(shot: Shot) -> dict:
+    ball = shot.BallData
+    return {
+        "id": str(shot.ShotNumber),
+        "captured_at": now_micros(),
+        "club": "7i",
+        # the log only has launch data, ball flight is GSPro's; rough stand-ins
+        "carry": ball.Speed * 1.3,
+        "offline": ball.HLA * 3.0,
+        "ball_speed": ball.Speed,
+        "spin": int(ball.TotalSpin),
+        "launch_angle": ball.VLA,
+        "launch_direction": ball.HLA,
+        "session_id": None,
+        "is_outlier": False,
+        "outlier_reason": None,
+        "raw_json": None,
+        "signature": None,
+        "created_at": now_micros(),
+    }
+
+
+def _tail(tailer: LogTailer, loop: asyncio.AbstractEventLoop, ingest) -> None:
+    for chunk in tailer.chunks():
+        for shot in parse_shot_buffer(chunk):
+            loop.call_soon_threadsafe(ingest, shot, time.perf_counter())
+
+
+async def _run(name: str, n_shots: int, shots_per_second: float, noise_per_second: float) -> None:
+    loop = asyncio.get_running_loop()
+    stamps: dict[str, dict[int, float]] = {stage: {} for stage in STAGES}
+    done = asyncio.Event()
+
+    async def dashboard(message: Message) -> None:
+        payload = json.loads(message["text"])
+        if isinstance(payload, dict) and payload["type"] == "shot":
+            stamps["broadcast"][int(payload["shot"]["id"])] = time.perf_counter()
+            if len(stamps["broadcast"]) == n_shots:
+                done.set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "output_log.txt")
+        Path(path).touch()
+        async with (
+            GSProStub() as gspro,
+            AsyncGSProSession(gspro.host, gspro.port) as session,
+            ShotStore(Path(tmp) / "shots.db") as store,
+            BroadcastHub(max_pending_shots=n_shots) as hub,
+        ):
+            hub.connect(dashboard)
+            await asyncio.wait_for(session.connected.wait(), 5)
+            pending: set[asyncio.Task[None]] = set()
+
+            async def persist_and_broadcast(shot: Shot) -> None:
+                row = _row(shot)
+                await store.add_shots([row])
+                stamps["persisted"][shot.ShotNumber] = time.perf_counter()
+                hub.publish_shot(row)
+
+            def ingest(shot: Shot, parsed_at: float) -> None:
+                stamps["parsed"][shot.ShotNumber] = parsed_at
+                session.send_shot_nowait(shot)
+                task = asyncio.create_task(persist_and_broadcast(shot))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            with LogTailer(path, from_start=True) as tailer:
+                reader = threading.Thread(target=_tail, args=(tailer, loop, ingest))
+                reader.start()
+                written = await asyncio.to_thread(
+                    replay_log, path, n_shots, shots_per_second, noise_per_second
+                )
+                await asyncio.wait_for(done.wait(), 30)
+                tailer.stop()
+                await asyncio.to_thread(reader.join)
+
+            deadline = time.perf_counter() + 5
+            while len(gspro.shots) < n_shots and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            for msg, at in zip(gspro.shots, gspro.received_at, strict=True):
+                stamps["gspro"][msg["ShotNumber"]] = at
+
+    first, last = min(written.values()), max(stamps["broadcast"].values())
+    print(f"{name}: {n_shots} shots, {n_shots / (last - first):8.1f} shots/s end to end")
+    for stage in STAGES:
+        latencies = sorted(stamps[stage][i] - written[i] for i in written if i in stamps[stage])
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(
+            f"  written -> {stage:<10} {len(latencies):5d}  "
+            f"p50 {statistics.median(latencies) * 1e3:8.2f} ms  p99 {p99 * 1e3:8.2f} ms"
+        )
+
+
+async def main_async() -> None:
+    for run in RUNS:
+        await _run(*run)
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Shot message encoding: asdict_ignore_none + json.dumps vs the generated encoders.
+
+    python -m benchmarks.bench_serialize
+"""
+
+import json
+import random
+import time
+
+from models import serialize
+from models.models import HEARTBEAT_MSG, BallData, Shot, asdict_ignore_none
+
+
+N_MESSAGES = 100_000
+
+
+def _legacy(obj) -> bytes:
+    return json.dumps(asdict_ignore_none(obj)).encode()
+
+
+def _shots(rng: random.Random) -> list[Shot]:
+    return [
+        Shot(
+            ShotNumber=i,
+            BallData=BallData(
+                Speed=rng.uniform(80, 180),
+                SpinAxis=rng.uniform(-15, 15),
+                TotalSpin=rng.uniform(1800, 7500),
+                HLA=rng.uniform(-6, 6),
+                VLA=rng.uniform(8, 25),
+            ),
+        )
+        for i in range(N_MESSAGES)
+    ]
+
+
+def _time(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    shots = _shots(random.Random(0))
+    assert all(serialize.encode(s) == _legacy(s) for s in shots[:1000])
+    heartbeats = [Shot.heartbeat()] * N_MESSAGES
+
+    results = (
+        ("shot", "legacy", _time(_legacy, shots)),
+        ("shot", "encoder", _time(serialize.encode, shots)),
+        ("heartbeat", "legacy", _time(_legacy, heartbeats)),
+        ("heartbeat", "encoder", _time(serialize.encode, heartbeats)),
+        ("heartbeat", "constant", _time(lambda _: HEARTBEAT_MSG, heartbeats)),
+    )
+    for name, fn_name, elapsed in results:
+        print(
+            f"{name:<10} {fn_name:<9} {N_MESSAGES / elapsed:>12,.0f} msg/s  "
+            f"{elapsed / N_MESSAGES * 1e6:6.2f} us/msg"
+        )
+
+
+if __name__ == "__main__":
+    main()
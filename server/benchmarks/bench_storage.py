@@ -0,0 +1,90 @@
+"""
+SQLite storage throughput on a local database file: a season backfill, then live
+inserts while API reads run concurrently.
+
+    python -m benchmarks.bench_storage
+"""
+
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from server.storage import ShotStore, now_micros
+
+
+N_BACKFILL = 100_000
+N_LIVE = 500
+CLUBS = ("Dr", "3w", "5i", "6i", "7i", "8i", "9i", "PW", "SW")
+
+
+def _row(rng: random.Random, captured_at: int) -> dict:
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "captured_at": captured_at,
+        "club": rng.choice(CLUBS),
+        "carry": rng.gauss(160, 10),
+        "offline": rng.gauss(0, 6),
+        "ball_speed": rng.gauss(118, 4),
+        "spin": rng.randint(2500, 8000),
+        "launch_angle": rng.gauss(18, 2),
+        "launch_direction": rng.gauss(0, 2),
+        "session_id": None,
+        "is_outlier": False,
+        "outlier_reason": None,
+        "raw_json": None,
+        "signature": f"{rng.getrandbits(64):016x}",
+        "created_at": now_micros(),
+    }
+
+
+async def _reads(store: ShotStore, stop: asyncio.Event, latencies: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await store.list_shots(club=random.choice(CLUBS), limit=50)
+        latencies.append(loop.time() - start)
+
+
+async def main_async() -> None:
+    rng = random.Random(0)
+    t0 = now_micros() - N_BACKFILL * 60_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        async with ShotStore(Path(tmp) / "bench.db") as store:
+            rows = [_row(rng, t0 + i * 60_000_000) for i in range(N_BACKFILL)]
+            start = time.perf_counter()
+            await store.backfill_shots(rows)
+            elapsed = time.perf_counter() - start
+            print(
+                f"backfill {N_BACKFILL:,} shots  {elapsed:6.2f} s  "
+                f"{N_BACKFILL / elapsed:9,.0f} rows/s  {store.commits} commits"
+            )
+
+            stop = asyncio.Event()
+            read_latencies: list[float] = []
+            readers = [asyncio.create_task(_reads(store, stop, read_latencies)) for _ in range(4)]
+            write_latencies = []
+            for i in range(N_LIVE):
+                start = time.perf_counter()
+                await store.add_shots([_row(rng, now_micros() + i)])
+                write_latencies.append(time.perf_counter() - start)
+            stop.set()
+            await asyncio.gather(*readers)
+
+            for name, values in (("live insert", write_latencies), ("list_shots", read_latencies)):
+                values.sort()
+                print(
+                    f"{name:<12} n={len(values):>5}  p50 {statistics.median(values) * 1e3:6.2f} ms"
+                    f"  p99 {values[int(len(values) * 0.99)] * 1e3:6.2f} ms"
+                )
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
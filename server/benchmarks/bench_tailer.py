@@ -0,0 +1,106 @@
+"""
+Shot-to-parse latency and idle CPU of the log tailer vs the old readline/sleep loop.
+
+A writer thread replays a synthetic growing ``output_log.txt``: bursts of Unity noise
+followed by a ``LaunchExt Vars:`` line, with the write time of every shot recorded.
+The reader under test stamps each shot line it sees, giving write-to-parse latency.
+Shot lines are recognised with a plain marker check so that only the tailing is timed.
+
+    python -m benchmarks.bench_tailer
+"""
+
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.synthetic import log_lines
+from parser.tailer import LogTailer
+
+
+MARKER = b"LaunchExt Vars:"
+
+N_SHOTS = 50
+SHOT_INTERVAL = 0.02
+IDLE_SECONDS = 2.0
+
+
+def _shot_id(line: bytes | memoryview) -> int:
+    return int(bytes(line).rsplit(b" ", 1)[1])
+
+
+def _legacy_reader(path: str, seen: dict[int, float], done: threading.Event) -> None:
+    with Path(path).open("rb") as f:
+        while not done.is_set():
+            line = f.readline()
+            if not line:
+                time.sleep(0.1)
+                continue
+            if MARKER in line:
+                seen[_shot_id(line)] = time.perf_counter()
+
+
+def _tailer_reader(use_inotify: bool) -> Callable[[str, dict[int, float], threading.Event], None]:
+    def reader(path: str, seen: dict[int, float], done: threading.Event) -> None:
+        with LogTailer(path, from_start=True, use_inotify=use_inotify) as tailer:
+            threading.Thread(target=lambda: (done.wait(), tailer.stop()), daemon=True).start()
+            for line in tailer.lines():
+                if line[: len(MARKER)] == MARKER:
+                    seen[_shot_id(line)] = time.perf_counter()
+
+    return reader
+
+
+def run(name: str, reader: Callable[[str, dict[int, float], threading.Event], None]) -> None:
+    lines = log_lines(N_SHOTS, noise_per_shot=50)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "output_log.txt")
+        Path(path).touch()
+
+        seen: dict[int, float] = {}
+        written: dict[int, float] = {}
+        done = threading.Event()
+        thread = threading.Thread(target=reader, args=(path, seen, done))
+        thread.start()
+
+        # idle period: nothing is written, measure how much CPU the reader burns
+        cpu0 = time.process_time()
+        time.sleep(IDLE_SECONDS)
+        idle_cpu = (time.process_time() - cpu0) / IDLE_SECONDS
+
+        with Path(path).open("a", newline="") as f:
+            block: list[str] = []
+            for line in lines:
+                block.append(line)
+                if line.startswith("LaunchExt"):
+                    written[int(line.rsplit(" ", 1)[1])] = time.perf_counter()
+                    f.write("\r\n".join(block) + "\r\n")
+                    f.flush()
+                    block.clear()
+                    time.sleep(SHOT_INTERVAL)
+
+        deadline = time.perf_counter() + 2.0
+        while len(seen) < N_SHOTS and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        done.set()
+        thread.join()
+
+    latencies = sorted((seen[i] - written[i]) * 1000 for i in written if i in seen)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<18} shots {len(latencies):>3}/{N_SHOTS}  "
+        f"p50 {statistics.median(latencies):7.2f} ms  p99 {p99:7.2f} ms  "
+        f"idle cpu {idle_cpu * 100:5.2f}%"
+    )
+
+
+def main() -> None:
+    run("readline+sleep", _legacy_reader)
+    run("tailer (polling)", _tailer_reader(use_inotify=False))
+    run("tailer (inotify)", _tailer_reader(use_inotify=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+A local stand-in for the GSPro Connect TCP server.
+
+It accepts connections on ``127.0.0.1``, frames the shots sent to it and answers the
+way GSPro does: ``Code 200`` for every shot carrying ball data, nothing for
+heartbeats, and optionally a ``Code 201`` player update / ``Code 202`` ready message
+when a client connects.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any
+
+from server.socket import GSProStreamDecoder
+
+
+READY = {"Code": 202, "Message": "GSPro ready", "Player": None}
+SHOT_RECEIVED = {"Code": 200, "Message": "Ball Data received", "Player": None}
+
+
+def player_info(club: str = "DR", handed: str = "RH", distance: float = 380.0) -> dict[str, Any]:
+    return {
+        "Code": 201,
+        "Message": "GSPro Player Information",
+        "Player": {"Handed": handed, "Club": club, "DistanceToTarget": distance},
+    }
+
+
+class GSProStub:
+    """
+    Example:
+
+        async with GSProStub() as gspro:
+            session = AsyncGSProSession(gspro.host, gspro.port)
+            ...
+            assert gspro.shots[0]["ShotNumber"] == 1
+
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, greeting: bool = True):
+        self.host = host
+        self.port = port
+        self.greeting = greeting
+        self.answer = True  # answer shots with a Code 200
+        self.shots: list[dict[str, Any]] = []
+        self.heartbeats = 0
+        self.heartbeat_devices: set[str] = set()
+        self.connections = 0
+        self.received_at: list[float] = []
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._handlers: set[asyncio.Task[None]] = set()
+
+    async def start(self) -> "GSProStub":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self.drop_clients()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def drop_clients(self) -> None:
+        """Close every client connection, as GSPro does when it restarts."""
+        for writer in list(self._writers):
+            writer.close()
+
+    async def send(self, *messages: dict[str, Any]) -> None:
+        """Push messages to every connected client."""
+        data = b"".join(json.dumps(m).encode() for m in messages)
+        for writer in list(self._writers):
+            writer.write(data)
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        handler = asyncio.current_task()
+        assert handler is not None
+        self._handlers.add(handler)
+        self._writers.add(writer)
+        decoder = GSProStreamDecoder()
+        try:
+            if self.greeting:
+                writer.write(json.dumps(player_info()).encode() + json.dumps(READY).encode())
+            while data := await reader.read(65536):
+                for msg in decoder.decode(data):
+                    if msg.get("ShotDataOptions", {}).get("IsHeartbeat"):
+                        self.heartbeats += 1
+                        self.heartbeat_devices.add(msg.get("DeviceID"))
+                        continue
+                    self.shots.append(msg)
+                    self.received_at.append(time.perf_counter())
+                    if self.answer:
+                        writer.write(json.dumps(SHOT_RECEIVED).encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+
+    async def __aenter__(self) -> "GSProStub":
+        return await self.start()
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
@@ -0,0 +1,91 @@
+"""
+Synthetic GSPro ``output_log.txt`` content for benchmarks and tests.
+"""
+
+import random
+import threading
+import time
+from pathlib import Path
+
+
+NOISE_LINES = (
+    "UnloadTime: 0.812300 ms",
+    "Unloading 4 unused Assets to reduce memory usage. Loaded Objects now: 81234.",
+    "Total: 42.118600 ms (FindLiveObjects: 3.201300 ms CreateObjectMapping: 1.004100 ms MarkObjects: 37.511200 ms)",
+    "(Filename: C:\\buildslave\\unity\\build\\Runtime/Export/Debug/Debug.bindings.h Line: 35)",
+    "[Physics::Module] Initialized MultithreadedJobDispatcher with 7 workers.",
+    "Setting up 4 worker threads for Enlighten.",
+    "GSPro: Ball at rest. Distance to pin 143.2",
+    "ShotCamera: switching to follow cam",
+    "",
+)
+
+
+def shot_line(shot_id: int, rng: random.Random | None = None) -> str:
+    """
+    A ``LaunchExt Vars:`` line that matches ``LAUNCH_EXT_VARS_REGEX``.
+    """
+    rng = rng or random.Random(shot_id)
+    return (
+        f"LaunchExt Vars: sp {rng.uniform(80.0, 180.0):.2f}, el {rng.uniform(8.0, 25.0):.2f}, "
+        f"az {rng.uniform(0.0, 6.0):.2f}, ts {rng.uniform(1800.0, 7500.0):.2f}, "
+        f"sa {rng.uniform(0.0, 15.0):.2f}, cy 1, id {shot_id}"
+    )
+
+
+def log_lines(
+    n_shots: int, noise_per_shot: int = 200, seed: int = 0, first_id: int = 1
+) -> list[str]:
+    """
+    Unity noise with a shot line after every ``noise_per_shot`` noise lines.
+    """
+    rng = random.Random(seed)
+    lines: list[str] = []
+    for shot_id in range(first_id, first_id + n_shots):
+        lines.extend(rng.choice(NOISE_LINES) for _ in range(noise_per_shot))
+        lines.append(shot_line(shot_id, rng))
+    return lines
+
+
+def log_bytes(n_shots: int, noise_per_shot: int = 200, seed: int = 0, first_id: int = 1) -> bytes:
+    return ("\r\n".join(log_lines(n_shots, noise_per_shot, seed, first_id)) + "\r\n").encode()
+
+
+def replay_log(
+    path: str | Path,
+    n_shots: int,
+    shots_per_second: float = 1.0,
+    noise_per_second: float = 200.0,
+    flushes_per_shot: int = 4,
+    seed: int = 0,
+    first_id: int = 1,
+    stop: threading.Event | None = None,
+) -> dict[int, float]:
+    """
+    Append a live session to ``path`` in real time, the way Unity writes it: noise
+    flushed in bursts at ``noise_per_second`` and a shot line every
+    ``1 / shots_per_second`` seconds (0 writes as fast as possible).
+
+    :return: ``perf_counter`` time each shot line was flushed, by shot id
+    """
+    rng = random.Random(seed)
+    interval = 1 / shots_per_second if shots_per_second else 0.0
+    noise = noise_per_second * interval if interval else noise_per_second
+    burst, pause = round(noise / flushes_per_shot), interval / flushes_per_shot
+    written: dict[int, float] = {}
+    with Path(path).open("a", newline="") as f:
+        due = time.perf_counter()
+        for shot_id in range(first_id, first_id + n_shots):
+            if stop is not None and stop.is_set():
+                break
+            for i in range(flushes_per_shot):
+                lines = [rng.choice(NOISE_LINES) for _ in range(burst)]
+                if i == flushes_per_shot - 1:
+                    lines.append(shot_line(shot_id, rng))
+                due += pause
+                if pause:
+                    time.sleep(max(due - time.perf_counter(), 0.0))
+                f.write("\r\n".join(lines) + "\r\n")
+                f.flush()
+            written[shot_id] = time.perf_counter()
+    return written
@@ -0,0 +1,20 @@
+"""
+``GET /api/bays``: throughput and lag of every bay the server follows.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, Request
+
+
+if TYPE_CHECKING:
+    from server.bays import BaySupervisor
+
+
+router = APIRouter(prefix="/api")
+
+
+@router.get("/bays")
+async def list_bays(request: Request) -> list[dict[str, Any]]:
+    bays: BaySupervisor | None = request.app.state.bays
+    return [] if bays is None else bays.snapshot()
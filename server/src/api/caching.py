@@ -0,0 +1,30 @@
+"""
+Conditional GETs: ETags derived from the store's versions, and ``304 Not Modified``
+for clients whose ``If-None-Match`` still matches.
+"""
+
+from fastapi import Request, Response
+
+from server.storage import ShotStore
+
+
+def etag(store: ShotStore, version: int) -> str:
+    # the epoch keeps a restarted server, whose versions start over, from matching
+    return f'"{store.epoch}-{version}"'
+
+
+def not_modified(request: Request, response: Response, tag: str) -> Response | None:
+    """
+    Set the validators on ``response``, and return a ``304`` response instead if the
+    client's ``If-None-Match`` matches ``tag``.
+    """
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    response.headers.update(headers)
+    candidates = request.headers.get("if-none-match")
+    if candidates is None:
+        return None
+    for candidate in candidates.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate in (tag, "*"):
+            return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,50 @@
+"""
+``GET /api/clubs`` and ``GET /api/clubs/{club}/stats``, answered from the store's
+in-memory shot counts and rollups without touching the database.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from api.caching import etag, not_modified
+
+
+if TYPE_CHECKING:
+    from server.storage import ShotStore
+
+
+router = APIRouter(prefix="/api")
+
+STAT_FIELDS = ("mean", "sd", "median", "iqr", "n")
+
+
+@router.get("/clubs", response_model=None)
+async def list_clubs(request: Request, response: Response) -> list[dict[str, Any]] | Response:
+    store: ShotStore = request.app.state.store
+    if (cached := not_modified(request, response, etag(store, store.version()))) is not None:
+        return cached
+    return [{"club": club, "shots": n} for club, n in sorted(store.shot_counts().items())]
+
+
+@router.get("/clubs/{club}/stats", response_model=None)
+async def club_stats(club: str, request: Request, response: Response) -> dict[str, Any] | Response:
+    store: ShotStore = request.app.state.store
+    version = store.version(club)
+    if (cached := not_modified(request, response, etag(store, version))) is not None:
+        return cached
+
+    shots = store.shot_counts().get(club, 0)
+    rows = store.club_rollups(club)
+    if not shots and not rows:
+        raise HTTPException(status_code=404, detail=f"no shots or rollups for club {club}")
+    windows: dict[str, dict[str, dict[str, Any]]] = {}
+    for row in rows:
+        windows.setdefault(row["window"], {})[row["metric"]] = {f: row[f] for f in STAT_FIELDS}
+    return {
+        "club": club,
+        "shots": shots,
+        "version": version,
+        "updated_at": max((row["updated_at"] for row in rows), default=None),
+        "windows": windows,
+    }
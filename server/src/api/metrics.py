@@ -0,0 +1,30 @@
+"""
+``GET /metrics``: the pipeline's stage latencies and counters as Prometheus text, and
+``GET /metrics.json``: the same as a compact JSON snapshot.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+
+if TYPE_CHECKING:
+    from server.metrics import Metrics
+
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    registry: Metrics = request.app.state.metrics
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/metrics.json")
+async def metrics_snapshot(request: Request) -> dict[str, Any]:
+    registry: Metrics = request.app.state.metrics
+    return registry.snapshot()
@@ -0,0 +1,110 @@
+"""
+``GET /api/shots``: shots, most recent first, a page at a time, and ``POST /api/shots``:
+a shot from a launch monitor.
+
+Pages are keyset paginated: ``next_cursor`` encodes the ``(captured_at, id)`` of the
+last shot of the page, and the next page is read from the index right after it, so
+every page costs the same however far back it is.
+
+Shots are listed as the client's ``Shot``, see ``ShotOut``. Posted shots go through ``ShotIngest``; a shot already stored, by signature, is
+answered with ``409``.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+
+from api.caching import etag, not_modified
+from models.models import BallData, Shot
+from models.shots import ShotOut
+from server.ingest import shot_row
+
+
+if TYPE_CHECKING:
+    from server.ingest import ShotIngest
+    from server.storage import ShotStore
+
+
+router = APIRouter(prefix="/api")
+
+MAX_PAGE_SIZE = 500
+
+
+class BallIn(BaseModel):
+    Speed: float
+    SpinAxis: float
+    TotalSpin: float
+    HLA: float
+    VLA: float
+
+
+class ShotIn(BaseModel):
+    club: str
+    carry: float
+    offline: float
+    ball: BallIn
+    captured_at: datetime | None = None
+    session_id: str | None = None
+
+
+class ShotPage(BaseModel):
+    shots: list[ShotOut]
+    next_cursor: str | None
+
+
+def encode_cursor(shot: dict[str, Any]) -> str:
+    key = f"{shot['captured_at']}:{shot['id']}".encode()
+    return base64.urlsafe_b64encode(key).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        captured_at, shot_id = key.split(":", 1)
+        return int(captured_at), shot_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail="invalid cursor") from e
+
+
+@router.get("/shots", response_model=None)
+async def list_shots(
+    request: Request,
+    response: Response,
+    club: str | None = None,
+    session_id: str | None = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+) -> ShotPage | Response:
+    store: ShotStore = request.app.state.store
+    before = decode_cursor(cursor) if cursor is not None else None
+    # read before the shots, so the tag is never newer than the page
+    tag = etag(store, store.version(club))
+    if (cached := not_modified(request, response, tag)) is not None:
+        return cached
+
+    rows = await store.list_shots(club, session_id, limit, before)
+    return ShotPage(
+        shots=[ShotOut.from_row(row) for row in rows],
+        next_cursor=encode_cursor(rows[-1]) if len(rows) == limit else None,
+    )
+
+
+@router.post("/shots", status_code=201)
+async def create_shot(body: ShotIn, request: Request) -> dict[str, Any]:
+    ingest: ShotIngest = request.app.state.ingest
+    shot = Shot(BallData=BallData(**body.ball.model_dump()))
+    row = shot_row(
+        shot,
+        club=body.club,
+        carry=body.carry,
+        offline=body.offline,
+        captured_at=body.captured_at,
+        session_id=body.session_id,
+    )
+    if not await ingest.add(row):
+        raise HTTPException(status_code=409, detail="duplicate shot")
+    return {"id": row["id"], "signature": row["signature"]}
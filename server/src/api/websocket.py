@@ -1 +1,54 @@
-# This websocket relays parsed data from the output file
+"""
+The ``/ws`` endpoint: relays shot and insight events from the ``BroadcastHub``.
+
+Clients pick their topics with query parameters (``/ws?club=7i&club=DR&session_id=...``)
+and can change them at any time by sending ``{"clubs": [...], "session_id": ...}``.
+"""
+
+import asyncio
+import contextlib
+import json
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+
+from server.broadcast import BroadcastHub, Client, Topics
+
+
+router = APIRouter()
+
+# sent when a client is dropped for not keeping up, "try again later"
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+async def _receive_topics(websocket: WebSocket, client: Client) -> None:
+    with contextlib.suppress(WebSocketDisconnect):
+        async for text in websocket.iter_text():
+            try:
+                request = json.loads(text)
+                client.topics = Topics.parse(request.get("clubs"), request.get("session_id"))
+            except (ValueError, AttributeError, TypeError):
+                continue
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    club: list[str] = Query(default=[]),
+    session_id: str | None = None,
+) -> None:
+    hub: BroadcastHub = websocket.app.state.hub
+    await websocket.accept()
+    client = hub.connect(websocket.send, Topics.parse(club, session_id))
+    receiving = asyncio.create_task(_receive_topics(websocket, client))
+    closed = asyncio.create_task(client.closed.wait())
+    try:
+        await asyncio.wait((receiving, closed), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # the hub drops clients too slow to keep, or all of them when shutting down
+        dropped = client not in hub.clients and not receiving.done()
+        receiving.cancel()
+        closed.cancel()
+        await hub.disconnect(client)
+        if dropped:
+            with contextlib.suppress(Exception):
+                await websocket.close(SLOW_CLIENT_CLOSE_CODE)
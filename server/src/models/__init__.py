@@ -5,9 +5,13 @@ from .models import (
     Shot,
     ShotDataOptions,
 )
+from .shots import ShotMetrics, ShotOut
+
 
 __all__ = [
     "BallData",
-    "ShotDataOptions",
     "Shot",
+    "ShotDataOptions",
+    "ShotMetrics",
+    "ShotOut",
 ]
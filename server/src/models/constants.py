@@ -5,5 +5,10 @@ PORT = 921
 HOST = "127.0.0.1" # not accurate for our system, thanks foresight 
 
 OUTPUT_LOG_PATH = r'%USERPROFILE%\AppData\LocalLow\GSPro\GSPro\output_log.txt'
+CHECKPOINT_PATH = r'%USERPROFILE%\.double-sight\output_log.checkpoint.json'
+DB_PATH = r'%USERPROFILE%\.double-sight\double-sight.db'
+BAYS_PATH = r'%USERPROFILE%\.double-sight\bays.json'
 
-LAUNCH_EXT_VARS_REGEX = r'sp (\d+\.\d+), el (\d+\.\d+), az (\d+\.\d+), ts (\d+\.\d+), sa (\d+\.\d+), cy (\d+), id (\d+)'
\ No newline at end of file
+LAUNCH_EXT_VARS_REGEX = r'sp (\d+\.\d+), el (\d+\.\d+), az (\d+\.\d+), ts (\d+\.\d+), sa (\d+\.\d+), cy (\d+), id (\d+)'
+
+LAUNCH_EXT_VARS_MARKER = "LaunchExt Vars:"
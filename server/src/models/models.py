@@ -1,10 +1,12 @@
-from dataclasses import dataclass, field, fields
+from dataclasses import dataclass, field, fields, is_dataclass
+from models import serialize
 from models.constants import BASE_UNITS, DEVICE_ID
 from typing import Any, Any, Optional
 
 # -------------
 # Socket Models
-# ------------- 
+# -------------
+
 
 @dataclass
 class BallData:
@@ -14,6 +16,7 @@ class BallData:
     HLA: float
     VLA: float
 
+
 @dataclass
 class ShotDataOptions:
     ContainsBallData: bool = True
@@ -22,6 +25,7 @@ class ShotDataOptions:
     LaunchMonitorBallDetected: bool | None = None
     IsHeartbeat: bool | None = None
 
+
 @dataclass
 class Shot:
     DeviceID: str = DEVICE_ID
@@ -31,12 +35,35 @@ class Shot:
     BallData: BallData = None
     ShotDataOptions: ShotDataOptions = field(default_factory=ShotDataOptions)
 
+    @classmethod
+    def heartbeat(cls, device_id: str = DEVICE_ID) -> "Shot":
+        """A GSPro Connect heartbeat from ``device_id``: no ball data, launch monitor ready"""
+        return cls(
+            DeviceID=device_id,
+            ShotDataOptions=ShotDataOptions(
+                ContainsBallData=False,
+                LaunchMonitorIsReady=True,
+                LaunchMonitorBallDetected=True,
+                IsHeartbeat=True,
+            ),
+        )
+
+    def as_msg(self) -> bytes:
+        """The shot as a GSPro Connect JSON message"""
+        return serialize.encode(self)
+
+
+# heartbeats of a device never change, render the default device's once
+HEARTBEAT_MSG = Shot.heartbeat().as_msg()
+
+
 @dataclass
 class GSProPlayer:
     Handed: str | None = None
     Club: str | None = None
     DistanceToTarget: float | None = None
 
+
 @dataclass
 class GSProMessage:
     Code: int
@@ -45,7 +72,7 @@ class GSProMessage:
     Xtra: dict = field(default_factory=dict)  # other attributes passed through in extra
 
     @classmethod
-    def create_from_dict(cls, dct: dict[str, Any]) -> GSProMessage:
+    def create_from_dict(cls, dct: dict[str, Any]) -> "GSProMessage":
         dct = dict(dct)
         kwargs = {}
         for f in fields(cls):
@@ -53,3 +80,34 @@ class GSProMessage:
                 kwargs[f.name] = dct.pop(f.name)
         kwargs["Xtra"] = dct
         return cls(**kwargs)
+
+
+def asdict_ignore_none(obj) -> dict[str, Any]:
+    """Like dataclasses.asdict ignoring keys whose value is None
+
+    :param obj: an instance of a Dataclass
+    :return: a dict without any None values
+
+    Examples:
+
+        assert (
+          asdict_ignore_none(ShotDataOptions())
+          == {'ContainsBallData': True, 'ContainsClubData': False}
+        )
+        assert (
+          asdict_ignore_none(ShotDataOptions(IsHeartbeat=False))
+          == {'ContainsBallData': True, 'ContainsClubData': False, 'IsHeartbeat': False}
+        )
+
+    """
+
+    assert is_dataclass(obj)
+    result = dict()
+    for f in fields(obj):
+        val = getattr(obj, f.name)
+        if val is not None:
+            if is_dataclass(val):
+                result[f.name] = asdict_ignore_none(val)
+            else:
+                result[f.name] = val
+    return result
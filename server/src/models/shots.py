@@ -0,0 +1,50 @@
+"""
+A stored shot as the dashboard sees it, the client's ``Shot``: the REST listing and
+the WebSocket ``shot`` frames both serialize shots with ``ShotOut``.
+"""
+
+from collections.abc import Mapping
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from pydantic import BaseModel
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+class ShotMetrics(BaseModel):
+    carry: float
+    offline: float
+    ball_speed: float
+    spin: int
+    launch_angle: float | None = None
+    launch_direction: float | None = None
+
+
+class ShotOut(BaseModel):
+    id: str
+    captured_at: datetime
+    club: str
+    metrics: ShotMetrics
+    session_id: str | None = None
+    is_outlier: bool = False
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "ShotOut":
+        """The shot of a ``shots`` row, whose ``captured_at`` is in epoch microseconds"""
+        return cls(
+            id=row["id"],
+            captured_at=_EPOCH + timedelta(microseconds=row["captured_at"]),
+            club=row["club"],
+            metrics=ShotMetrics(
+                carry=row["carry"],
+                offline=row["offline"],
+                ball_speed=row["ball_speed"],
+                spin=row["spin"],
+                launch_angle=row.get("launch_angle"),
+                launch_direction=row.get("launch_direction"),
+            ),
+            session_id=row.get("session_id"),
+            is_outlier=bool(row.get("is_outlier")),
+        )
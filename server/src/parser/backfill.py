@@ -0,0 +1,224 @@
+"""
+Resuming the sniffer where it left off, and bulk ingest of historical logs.
+
+The sniffer persists a ``Checkpoint``: the byte offset just past the last line it
+processed plus a fingerprint of the file (inode, size and a hash of its first bytes).
+On restart ``resume_plan`` uses the fingerprint to decide where to pick up:
+
+- same file, at least as long as before: continue at the saved offset
+- Unity rotated the old log away (same inode under another name): drain the tail of
+  the rotated file, then read the new log from the top
+- anything else means the log was rewritten: read the new log from the top
+
+``backfill_logs`` parses whole historical logs in parallel across a process pool by
+splitting them into newline aligned byte ranges.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import pairwise
+from pathlib import Path
+
+from models.models import Shot
+from parser.parse import parse_shot_buffer
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+HEAD_BYTES = 4096
+DEFAULT_SPLIT_BYTES = 16 << 20
+
+
+@dataclass(frozen=True)
+class LogFingerprint:
+    inode: int
+    size: int
+    head_len: int
+    head_hash: str
+
+    @classmethod
+    def of(cls, path: str, head_len: int = HEAD_BYTES) -> "LogFingerprint":
+        """
+        Fingerprint ``path``, hashing at most ``head_len`` bytes from its start.
+        """
+        with Path(path).open("rb") as f:
+            st = os.fstat(f.fileno())
+            head = f.read(head_len)
+        return cls(st.st_ino, st.st_size, len(head), hashlib.sha1(head).hexdigest())
+
+    def same_file(self, other: "LogFingerprint") -> bool:
+        """
+        True if ``other`` (taken later) looks like this file, possibly grown since.
+        """
+        return (
+            self.inode == other.inode
+            and self.head_len <= other.head_len
+            and other.size >= self.size
+        )
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    path: str
+    offset: int
+    fingerprint: LogFingerprint
+
+
+class CheckpointStore:
+    """
+    A checkpoint persisted as JSON, replaced atomically on every save.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def load(self) -> Checkpoint | None:
+        try:
+            dct = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        return Checkpoint(dct["path"], dct["offset"], LogFingerprint(**dct["fingerprint"]))
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w") as f:
+            json.dump(asdict(checkpoint), f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
+
+
+def checkpoint_for(path: str, offset: int) -> Checkpoint:
+    return Checkpoint(path, offset, LogFingerprint.of(path))
+
+
+def _matches(path: str, fingerprint: LogFingerprint) -> bool:
+    try:
+        current = LogFingerprint.of(path, fingerprint.head_len)
+    except OSError:
+        return False
+    return fingerprint.same_file(current) and current.head_hash == fingerprint.head_hash
+
+
+def _find_rotated(log_path: str, fingerprint: LogFingerprint) -> str | None:
+    """
+    Look next to the log for the checkpointed file under a new name (renames keep the inode).
+    """
+    for candidate in Path(log_path).absolute().parent.iterdir():
+        try:
+            if candidate.stat().st_ino != fingerprint.inode:
+                continue
+        except OSError:
+            continue
+        if _matches(str(candidate), fingerprint):
+            return str(candidate)
+    return None
+
+
+def resume_plan(log_path: str, checkpoint: Checkpoint | None) -> list[tuple[str, int]]:
+    """
+    Work out which files to read, and from where, to continue exactly after ``checkpoint``.
+
+    :param log_path: the live log
+    :param checkpoint: the last saved checkpoint, if any
+    :return: ``(path, start_offset)`` pairs oldest first, the last one always being the
+        live log. Empty when there is no usable checkpoint (the caller decides whether
+        that means "start at the end" or "backfill everything").
+    """
+    if checkpoint is None:
+        return []
+
+    if _matches(log_path, checkpoint.fingerprint):
+        return [(log_path, checkpoint.offset)]
+
+    rotated = _find_rotated(log_path, checkpoint.fingerprint)
+    if rotated is not None:
+        logger.info(f"Log was rotated to {rotated}, draining it from {checkpoint.offset}")
+        return [(rotated, checkpoint.offset), (log_path, 0)]
+
+    logger.info(f"{log_path} was rewritten since the checkpoint, reading it from the top")
+    return [(log_path, 0)]
+
+
+def read_shots(path: str, start: int = 0, end: int | None = None) -> list[Shot]:
+    """
+    Parse the shots in ``[start, end)`` of ``path`` in one read.
+    """
+    with Path(path).open("rb") as f:
+        f.seek(start)
+        buf = f.read() if end is None else f.read(end - start)
+    return list(parse_shot_buffer(buf))
+
+
+def _line_aligned_ranges(path: str, split_bytes: int) -> list[tuple[int, int]]:
+    """
+    Cut ``path`` into ranges of roughly ``split_bytes`` that start and end on line boundaries.
+    """
+    size = Path(path).stat().st_size
+    bounds = [0]
+    with Path(path).open("rb") as f:
+        while bounds[-1] + split_bytes < size:
+            f.seek(bounds[-1] + split_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(pairwise(bounds))
+
+
+def _split_runs(shots: Iterable[Shot]) -> Iterator[list[Shot]]:
+    """
+    Split a log's shots into GSPro runs, a new run starting wherever ShotNumber resets.
+    """
+    run: list[Shot] = []
+    for shot in shots:
+        if run and shot.ShotNumber <= run[-1].ShotNumber:
+            yield run
+            run = []
+        run.append(shot)
+    if run:
+        yield run
+
+
+def backfill_logs(
+    paths: Iterable[str],
+    max_workers: int | None = None,
+    split_bytes: int = DEFAULT_SPLIT_BYTES,
+) -> list[list[Shot]]:
+    """
+    Parse historical logs in parallel and return their shots as ordered streams.
+
+    Every log is split into newline aligned ranges which are parsed across a process
+    pool. The ranges of a log are stitched back together in log order and cut into one
+    stream per GSPro run, since ShotNumber resets when GSPro restarts. Streams are
+    ordered by the modification time of their log.
+
+    :param paths: rotated / historical log files
+    :param max_workers: process pool size, ``0`` parses in this process
+    :param split_bytes: target size of the ranges handed to workers
+    :return: list of streams, each a list of Shots with increasing ShotNumber
+    """
+    ordered = sorted(paths, key=lambda p: Path(p).stat().st_mtime)
+    jobs = [(p, start, end) for p in ordered for start, end in _line_aligned_ranges(p, split_bytes)]
+
+    if max_workers == 0:
+        results = [read_shots(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(read_shots, *zip(*jobs, strict=True)))
+
+    shots_by_path: dict[str, list[Shot]] = {p: [] for p in ordered}
+    for (path, _, _), shots in zip(jobs, results, strict=True):
+        shots_by_path[path].extend(shots)  # ranges come back in log order
+
+    return [run for shots in shots_by_path.values() for run in _split_runs(shots)]
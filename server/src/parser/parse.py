@@ -1,43 +1,124 @@
 import re
+from collections.abc import Iterable, Iterator
 from typing import Optional
 
-from models.constants import LAUNCH_EXT_VARS_REGEX
-from ..models.models import BallData, Shot
-from ...utils.Logging import Logger
+from models.constants import LAUNCH_EXT_VARS_MARKER, LAUNCH_EXT_VARS_REGEX
+from models.models import BallData, Shot
+from utils.Logging import Logger
 
-def parse_shot_file(line: str) -> Optional[Shot]:
+
+LAUNCH_EXT_VARS_PATTERN = re.compile(LAUNCH_EXT_VARS_REGEX)
+LAUNCH_EXT_VARS_BYTES_PATTERN = re.compile(LAUNCH_EXT_VARS_REGEX.encode())
+_MARKER_BYTES = LAUNCH_EXT_VARS_MARKER.encode()
+# bytes of lines ``parse_shot_lines`` joins before scanning them
+LINES_CHUNK_SIZE = 1 << 20
+
+logger = Logger(__name__).get_logger()
+
+
+def _shot_from_groups(
+    sp: str | bytes,
+    el: str | bytes,
+    az: str | bytes,
+    ts: str | bytes,
+    sa: str | bytes,
+    _cy: str | bytes,
+    shot_id: str | bytes,
+) -> Shot:
     """
-    Parse a shot data file and extract relevant information to create a Shot object.
+    Build a Shot from the regex groups, which may be str or bytes (float/int accept both).
     """
-    ball_data = None
-    shot_number = None
+    shot = Shot()
+    shot.BallData = BallData(
+        Speed=float(sp), SpinAxis=float(sa), TotalSpin=float(ts), HLA=float(az), VLA=float(el)
+    )
+    shot.ShotNumber = int(shot_id)
+    return shot
 
-    logger = Logger(__name__).get_logger()
 
+def parse_shot_file(line: str) -> Optional[Shot]:
+    """
+    Parse a shot data file and extract relevant information to create a Shot object.
+    """
     try:
         # only relevant part retained
-        if 'LaunchExt Vars:' in line:
-            logger.info("Found LaunchExt Vars")
-            match = re.search(LAUNCH_EXT_VARS_REGEX, line)
+        if LAUNCH_EXT_VARS_MARKER in line:
+            logger.debug("Found LaunchExt Vars")
+            match = LAUNCH_EXT_VARS_PATTERN.search(line)
             if match:
-                sp, el, az, ts, sa, cy, shot_id = match.groups()
-                ball_data = BallData(
-                    Speed=float(sp),
-                    SpinAxis=float(sa),
-                    TotalSpin=float(ts),
-                    HLA=float(az),
-                    VLA=float(el)
-                )
-                shot_number = int(shot_id)
-
-        if ball_data:
-            shot = Shot()
-            shot.BallData = ball_data
-            if shot_number is not None:
-                shot.ShotNumber = shot_number
-            return shot
+                return _shot_from_groups(*match.groups())
 
     except Exception as e:
         logger.error(f"Error parsing file: {e}")
 
-    return None
\ No newline at end of file
+    return None
+
+
+def parse_shot_buffer(buf: bytes) -> Iterator[Shot]:
+    """
+    Parse every shot out of a block of raw log bytes.
+
+    Unity logs are almost entirely noise, so rather than looking at each line this
+    jumps between occurrences of the ``LaunchExt Vars:`` marker with ``bytes.find``
+    and only runs the compiled regex on the lines that contain one.
+
+    :param buf: raw ``output_log.txt`` bytes, e.g. a chunk from ``LogTailer``
+    :return: iterator of Shots in log order
+
+    Example:
+
+        with open(LOG_PATH, 'rb') as f:
+            shots = list(parse_shot_buffer(f.read()))
+
+    """
+    find = buf.find
+    search = LAUNCH_EXT_VARS_BYTES_PATTERN.search
+    hit = find(_MARKER_BYTES)
+    while hit != -1:
+        line_start = buf.rfind(b"\n", 0, hit) + 1
+        line_end = find(b"\n", hit)
+        if line_end == -1:
+            line_end = len(buf)
+
+        match = search(buf, line_start, line_end)
+        if match:
+            yield _shot_from_groups(*match.groups())
+
+        hit = find(_MARKER_BYTES, line_end)
+
+
+def _parse_batch(text: list[str], raw: list[bytes]) -> Iterator[Shot]:
+    if text:
+        yield from parse_shot_buffer("\n".join(text).encode("utf-8", errors="ignore"))
+    if raw:
+        yield from parse_shot_buffer(b"\n".join(raw))
+
+
+def parse_shot_lines(
+    lines: Iterable[str | bytes], chunk_size: int = LINES_CHUNK_SIZE
+) -> Iterator[Shot]:
+    """
+    Parse every shot out of an iterable of log lines (str or bytes, with or without
+    line endings), joining them into buffers of about ``chunk_size`` bytes so the scan
+    stays in C without holding the whole log in memory.
+    """
+    text: list[str] = []
+    raw: list[bytes] = []
+    size = 0
+    for line in lines:
+        # a switch between str and bytes starts a new batch, keeping shots in order
+        if isinstance(line, str):
+            if raw:
+                yield from _parse_batch(text, raw)
+                text, raw, size = [], [], 0
+            text.append(line)
+        else:
+            if text:
+                yield from _parse_batch(text, raw)
+                text, raw, size = [], [], 0
+            raw.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield from _parse_batch(text, raw)
+            text, raw, size = [], [], 0
+    yield from _parse_batch(text, raw)
@@ -1,40 +1,109 @@
 import os
+import sys
 import time
+from collections.abc import Callable
+
+from models.constants import CHECKPOINT_PATH, OUTPUT_LOG_PATH
+from models.models import Shot
+from parser.backfill import CheckpointStore, backfill_logs, checkpoint_for, read_shots, resume_plan
+from parser.parse import parse_shot_buffer
+from parser.tailer import LogTailer
+from server.metrics import metrics
+from utils.Logging import Logger
 
-from parser.parse import parse_shot_file
-from ..models.models import BallData, Shot, ShotDataOptions
-from ..models.constants import OUTPUT_LOG_PATH
-from ...utils.Logging import Logger
 
 # The hidden path where Unity stores GSPro logs
 LOG_PATH = os.path.expandvars(OUTPUT_LOG_PATH)
+# Where the sniffer remembers how far into the log it got
+CHECKPOINT_FILE = os.path.expandvars(CHECKPOINT_PATH)
+# Longest time between checkpoints while only noise is being logged
+CHECKPOINT_INTERVAL = 5.0
 
 logger = Logger(__name__).get_logger()
 
-def sniff_gspro():
-    logger.info(f"Sniffer Active on: {LOG_PATH}")
-    
-    # We use 'rb' (read binary) and a manual decode to avoid encoding locks
-    with open(LOG_PATH, 'rb') as f:
-        # Move to the end of the file so we don't process history
-        f.seek(0, os.SEEK_END)
-        
+
+def _log_shot(shot: Shot) -> None:
+    logger.info(f"Parsed data: {shot}")
+
+
+def sniff_gspro(
+    path: str = LOG_PATH,
+    checkpoint_path: str | None = CHECKPOINT_FILE,
+    on_shot: Callable[[Shot], None] = _log_shot,
+):
+    """
+    Follow the GSPro log and call ``on_shot`` for every shot written to it.
+
+    With a ``checkpoint_path`` the sniffer resumes after the last line it had
+    checkpointed before it was stopped, so shots taken while the server was down are
+    picked up. Delivery is at-least-once: the checkpoint is saved once ``on_shot`` has
+    returned, so a crash in between delivers that block's shots again on restart, and
+    ``on_shot`` should be idempotent. Nothing drops the repeats for it: parsed shots
+    don't go through ``ShotIngest``, which only dedupes stored shots.
+    Without a checkpoint (first run, or ``checkpoint_path=None``) it starts at the end
+    of the log.
+    """
+    logger.info(f"Sniffer Active on: {path}")
+
+    store = CheckpointStore(checkpoint_path) if checkpoint_path else None
+    plan = resume_plan(path, store.load()) if store else []
+
+    # drain rotated logs the checkpoint still points into before following the live one
+    for rotated_path, offset in plan[:-1]:
+        for shot in read_shots(rotated_path, offset):
+            on_shot(shot)
+    start_offset = plan[-1][1] if plan else None
+    if store and len(plan) > 1 and start_offset is not None:
+        # the rotated logs are done with, don't drain them again after a crash
+        store.save(checkpoint_for(path, start_offset))
+
+    with LogTailer(path, start_offset=start_offset) as tailer:
+        last_saved = float("-inf")
         while True:
-            line = f.readline()
-            if not line:
-                time.sleep(0.1)  # Wait for GSPro to write more
+            start = time.perf_counter()
+            chunk = tailer.read_available()
+            if not chunk:
+                tailer.wait()
                 continue
-            
-            # Convert binary to string
-            decoded_line = line.decode('utf-8', errors='ignore').strip()
-            data = parse_shot_file(decoded_line)
+            read = time.perf_counter()
+            shots = list(parse_shot_buffer(chunk))
+            metrics.observe("tail", read - start)
+            metrics.observe("parse", time.perf_counter() - read)
+            metrics.inc("log_bytes_read", len(chunk))
+            metrics.inc("shots_parsed", len(shots))
+            for shot in shots:
+                on_shot(shot)
+
+            # checkpoint right after delivering shots so a restart can't repeat them,
+            # otherwise only now and then to keep up with the noise
+            now = time.monotonic()
+            if store and (shots or now - last_saved > CHECKPOINT_INTERVAL):
+                checkpoint = checkpoint_for(path, tailer.offset)
+                if checkpoint.fingerprint.inode == tailer.inode:
+                    store.save(checkpoint)
+                    last_saved = now
+
 
-            if data:
-                logger.info(f"Parsed data: {data}")
+def backfill(paths: list[str], max_workers: int | None = None) -> None:
+    """
+    Ingest historical logs, logging every shot found in them.
+    """
+    start = time.perf_counter()
+    streams = backfill_logs(paths, max_workers)
+    for stream in streams:
+        for shot in stream:
+            _log_shot(shot)
+    n_shots = sum(len(s) for s in streams)
+    logger.info(
+        f"Backfilled {n_shots} shots in {len(streams)} runs from {len(paths)} logs "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
 
 
 if __name__ == "__main__":
-    if os.path.exists(LOG_PATH):
+    if len(sys.argv) > 2 and sys.argv[1] == "backfill":
+        backfill(sys.argv[2:])
+    elif os.path.exists(LOG_PATH):
         sniff_gspro()
     else:
-        logger.error("Log file not found. Launch GSPro first!")
\ No newline at end of file
+        logger.error("Log file not found. Launch GSPro first!")
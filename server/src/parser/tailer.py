@@ -0,0 +1,346 @@
+"""
+Event driven tailing of the GSPro / Unity ``output_log.txt``.
+
+On Linux the tailer blocks on an inotify descriptor watching the log directory, so a
+shot is picked up as soon as Unity flushes it and an idle bay costs no CPU. Everywhere
+else (GSPro itself runs on Windows) it falls back to polling with an adaptive backoff
+that starts at a couple of milliseconds after activity and relaxes towards
+``max_poll`` while nobody is hitting balls.
+
+New bytes are read in bulk and handed out as blocks of complete lines. Unity rewrites
+the log when GSPro restarts, so every wake-up also checks for truncation (file shrank)
+and rotation (path now points at a different inode) and restarts from the top of the
+new file.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# inotify(7) event bits, see <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _PollingWatcher:
+    """
+    Sleep between reads, doubling the delay on every empty read.
+    """
+
+    def __init__(self, min_poll: float, max_poll: float):
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.delay = min_poll
+        self._stop = threading.Event()
+
+    def fileno(self) -> int | None:
+        return None
+
+    def wait(self, timeout: float) -> bool:
+        self._stop.wait(min(self.delay, timeout))
+        self.delay = min(self.delay * 2, self.max_poll)
+        return False
+
+    def drain(self) -> bool:
+        return False
+
+    def activity(self) -> None:
+        self.delay = self.min_poll
+
+    def interrupt(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+class _InotifyWatcher:
+    """
+    Block on an inotify descriptor watching the directory that holds the log.
+
+    The directory is watched rather than the file so that Unity deleting and
+    recreating ``output_log.txt`` still wakes us up.
+    """
+
+    def __init__(self, path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._name = Path(path).name.encode()
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        directory = bytes(Path(path).absolute().parent)
+        if libc.inotify_add_watch(self._fd, directory, _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory!r}")
+
+        self._wake_r, self._wake_w = os.pipe()
+
+    def fileno(self) -> int | None:
+        return self._fd
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if self._wake_r in ready:
+            return False
+        return self.drain()
+
+    def drain(self) -> bool:
+        """
+        Consume pending events, returning True if any of them concern the log file.
+        """
+        relevant = False
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            pos = 0
+            while pos < len(buf):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, pos)
+                name = buf[pos + _EVENT_HEADER.size : pos + _EVENT_HEADER.size + name_len]
+                if mask & IN_Q_OVERFLOW or name.rstrip(b"\0") == self._name:
+                    relevant = True
+                pos += _EVENT_HEADER.size + name_len
+
+    def activity(self) -> None:
+        pass
+
+    def interrupt(self) -> None:
+        os.write(self._wake_w, b"\0")
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class LogTailer:
+    """
+    Follow a growing log file and yield new data as blocks of complete lines.
+
+    :param path: file to follow
+    :param from_start: start at the top of the file instead of its current end
+    :param start_offset: explicit byte offset to resume from (overrides ``from_start``)
+    :param chunk_size: maximum number of bytes read per system call
+    :param min_poll: first polling delay after activity (polling fallback only)
+    :param max_poll: longest polling delay when idle (polling fallback only)
+    :param rotation_check: longest time to block before re-checking the file for
+        truncation or rotation, even without a change notification
+    :param use_inotify: force (True) or disable (False) inotify; defaults to using it
+        whenever it is available
+
+    Example:
+
+        tailer = LogTailer(LOG_PATH)
+        for chunk in tailer.chunks():
+            for line in LogTailer.iter_lines(chunk):
+                ...
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        from_start: bool = False,
+        start_offset: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_poll: float = 0.002,
+        max_poll: float = 0.25,
+        rotation_check: float = 1.0,
+        use_inotify: bool | None = None,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.rotation_check = rotation_check
+
+        self._fd = -1
+        self._ino = 0
+        self._pos = 0
+        self._partial = b""
+        self._stopped = False
+
+        self._open(start_offset, from_start)
+
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        self._watcher: _InotifyWatcher | _PollingWatcher
+        if use_inotify:
+            try:
+                self._watcher = _InotifyWatcher(path)
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}), falling back to polling")
+                self._watcher = _PollingWatcher(min_poll, max_poll)
+        else:
+            self._watcher = _PollingWatcher(min_poll, max_poll)
+
+    @property
+    def offset(self) -> int:
+        """
+        Byte offset just past the last complete line handed out.
+        """
+        return self._pos - len(self._partial)
+
+    @property
+    def inode(self) -> int:
+        """
+        Inode of the file currently being followed.
+        """
+        return self._ino
+
+    @property
+    def uses_inotify(self) -> bool:
+        return isinstance(self._watcher, _InotifyWatcher)
+
+    def fileno(self) -> int | None:
+        """
+        Descriptor that becomes readable when the log may have changed, or None when polling.
+        """
+        return self._watcher.fileno()
+
+    def _open(self, start_offset: int | None = None, from_start: bool = True) -> None:
+        fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        st = os.fstat(fd)
+        if start_offset is not None:
+            pos = min(start_offset, st.st_size)
+        elif from_start:
+            pos = 0
+        else:
+            pos = st.st_size
+        os.lseek(fd, pos, os.SEEK_SET)
+
+        if self._fd >= 0:
+            os.close(self._fd)
+        self._fd = fd
+        self._ino = st.st_ino
+        self._pos = pos
+        self._partial = b""
+
+    def _check_rotation(self) -> bool:
+        """
+        Reopen the log if Unity truncated or replaced it. Returns True if it did.
+        """
+        try:
+            st = Path(self.path).stat()
+        except FileNotFoundError:
+            return False  # mid-rewrite, keep the old descriptor until the new file shows up
+
+        if st.st_ino != self._ino:
+            logger.info(f"{self.path} was replaced, following the new file")
+            self._open(from_start=True)
+            return True
+        if st.st_size < self._pos:
+            logger.info(f"{self.path} was truncated, restarting from the top")
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            self._pos = 0
+            self._partial = b""
+            return True
+        return False
+
+    def read_available(self) -> bytes:
+        """
+        Read whatever has been appended since the last call without blocking.
+
+        :return: a block of complete lines (ending in ``\\n``), or ``b""`` if no full
+            line is available yet. A trailing partial line is kept for the next call.
+        """
+        data = os.read(self._fd, self.chunk_size)
+        if not data:
+            if self._check_rotation():
+                data = os.read(self._fd, self.chunk_size)
+            if not data:
+                return b""
+
+        self._pos += len(data)
+        self._watcher.activity()
+
+        if self._partial:
+            data = self._partial + data
+        end = data.rfind(b"\n") + 1
+        if end == len(data):
+            self._partial = b""
+            return data
+        self._partial = data[end:]
+        return data[:end]
+
+    def wait(self, timeout: float | None = None) -> None:
+        """
+        Block until the log may have changed, ``timeout`` expires or ``stop`` is called.
+        """
+        self._watcher.wait(self.rotation_check if timeout is None else timeout)
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Yield blocks of complete lines as they are written, until ``stop`` is called.
+        """
+        while not self._stopped:
+            chunk = self.read_available()
+            if chunk:
+                yield chunk
+            else:
+                self.wait()
+
+    def lines(self) -> Iterator[memoryview]:
+        """
+        Yield every new line (without its line ending) as it is written.
+        """
+        for chunk in self.chunks():
+            yield from self.iter_lines(chunk)
+
+    @staticmethod
+    def iter_lines(chunk: bytes) -> Iterator[memoryview]:
+        """
+        Split a block of lines into zero-copy views, stripping ``\\n`` / ``\\r\\n``.
+        """
+        view = memoryview(chunk)
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            stop = end - 1 if end > start and chunk[end - 1] == 0x0D else end
+            yield view[start:stop]
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if start < len(chunk):
+            yield view[start:]
+
+    def stop(self) -> None:
+        """
+        Make ``chunks``/``lines`` return; safe to call from another thread.
+        """
+        self._stopped = True
+        self._watcher.interrupt()
+
+    def close(self) -> None:
+        self._stopped = True
+        self._watcher.close()
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "LogTailer":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,212 @@
+import asyncio
+import contextlib
+import random
+from collections import deque
+from collections.abc import Callable
+
+from models.constants import DEVICE_ID, HOST, PORT
+from models.models import HEARTBEAT_MSG, GSProMessage, Shot
+from server.history import ShotHistory, answers_shot
+from server.metrics import metrics
+from server.socket import GSProStreamDecoder
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+Subscriber = Callable[[GSProMessage], None]
+
+
+class AsyncGSProSession:
+    """GSPro Connect client for the asyncio event loop
+
+    The session runs as a handful of background tasks around one connection:
+
+    - a writer that drains a bounded outbound queue, coalescing every message queued
+      at that moment into a single write and waiting for it to be flushed
+    - a reader that frames GSPro's responses and hands each ``GSProMessage`` to the
+      subscribers as soon as it is complete
+    - a heartbeat that keeps the connection alive while no shots are being sent
+    - a supervisor that (re)connects with exponential backoff whenever the connection
+      drops, so callers never see GSPro restarts
+
+    GSPro answers every shot, in order. Shots written but not answered yet when the
+    connection drops are sent again once it is back, ahead of the queue; a shot GSPro
+    took but whose answer was lost with the connection is therefore sent twice.
+
+    :param gspro_host: GSPro Connect host
+    :param gspro_port: GSPro Connect port
+    :param device_id: ``DeviceID`` of the heartbeats
+    :param queue_size: outbound messages buffered while GSPro is slow or unreachable
+    :param heartbeat_interval: seconds of outbound silence before a heartbeat is sent
+    :param reconnect_min: first reconnect delay, doubled after every failed attempt
+    :param reconnect_max: longest reconnect delay
+    :param history: where sent shots and received messages are recorded
+
+    Example:
+
+        async with AsyncGSProSession() as session:
+            session.subscribe(lambda msg: print(msg.Code))
+            await session.send_shot(shot)
+
+    """
+
+    def __init__(
+        self,
+        gspro_host: str = HOST,
+        gspro_port: int = PORT,
+        *,
+        device_id: str = DEVICE_ID,
+        queue_size: int = 256,
+        heartbeat_interval: float = 5.0,
+        connect_timeout: float = 5.0,
+        reconnect_min: float = 0.25,
+        reconnect_max: float = 30.0,
+        history: ShotHistory | None = None,
+    ):
+        self.gspro_host = gspro_host
+        self.gspro_port = gspro_port
+        self.heartbeat_interval = heartbeat_interval
+        self.connect_timeout = connect_timeout
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+
+        self.history = history if history is not None else ShotHistory()
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+
+        self._queue: asyncio.Queue[tuple[Shot, bytes]] = asyncio.Queue(queue_size)
+        # shots written to GSPro and not answered yet, oldest first
+        self._unanswered: deque[tuple[Shot, bytes]] = deque(maxlen=queue_size)
+        self._subscribers: list[Subscriber] = []
+        self._last_send = 0.0
+        self._supervisor: asyncio.Task[None] | None = None
+        self._heartbeat_shot = Shot.heartbeat(device_id)
+        self._heartbeat_msg = (
+            HEARTBEAT_MSG if device_id == DEVICE_ID else self._heartbeat_shot.as_msg()
+        )
+
+    async def start(self) -> None:
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise(), name="gspro-session")
+
+    async def close(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._supervisor
+            self._supervisor = None
+        self.history.close()
+
+    async def __aenter__(self) -> "AsyncGSProSession":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Call ``callback`` with every message GSPro sends, returns an unsubscribe function"""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    async def send_shot(self, golfshot: Shot) -> None:
+        """Queue a shot for sending, waiting for room if the queue is full"""
+        await self._queue.put((golfshot, golfshot.as_msg()))
+
+    def send_shot_nowait(self, golfshot: Shot) -> None:
+        """Queue a shot for sending, raising ``asyncio.QueueFull`` if the queue is full"""
+        self._queue.put_nowait((golfshot, golfshot.as_msg()))
+
+    async def _supervise(self) -> None:
+        delay = self.reconnect_min
+        while True:
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.gspro_host, self.gspro_port),
+                    self.connect_timeout,
+                )
+            except (OSError, TimeoutError) as e:
+                logger.warning(
+                    f"connecting to gspro {self.gspro_host}:{self.gspro_port} failed ({e!r}), "
+                    f"retrying in {delay:.2f}s"
+                )
+                # jitter so a room full of bays doesn't reconnect in lockstep
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+                delay = min(delay * 2, self.reconnect_max)
+                continue
+
+            logger.info(f"connected to gspro {self.gspro_host}:{self.gspro_port}")
+            delay = self.reconnect_min
+            self.connected.set()
+            tasks = [
+                asyncio.create_task(self._read(reader)),
+                asyncio.create_task(self._write(writer)),
+                asyncio.create_task(self._heartbeat()),
+            ]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.warning(f"gspro connection lost: {task.exception()!r}")
+            finally:
+                self.connected.clear()
+                self.history.clear_pending()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                writer.close()
+            self.reconnects += 1
+            metrics.inc("gspro_reconnects")
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        decoder = GSProStreamDecoder()
+        while data := await reader.read(65536):
+            for msg in decoder.feed(data):
+                if answers_shot(msg.Code) and self._unanswered:
+                    self._unanswered.popleft()
+                self.history.record_received(msg)
+                metrics.inc("gspro_messages_received")
+                for callback in list(self._subscribers):
+                    try:
+                        callback(msg)
+                    except Exception as e:
+                        logger.error(f"gspro subscriber {callback!r} failed: {e!r}")
+        raise ConnectionResetError("gspro closed the connection")
+
+    async def _write(self, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        # shots GSPro hadn't answered when the last connection dropped go first
+        batch = list(self._unanswered)
+        self._unanswered.clear()
+        resent = len(batch)
+        while True:
+            if not batch:
+                batch.append(await self._queue.get())
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # heartbeats go unanswered
+            self._unanswered.extend(
+                item for item in batch if not item[0].ShotDataOptions.IsHeartbeat
+            )
+            writer.write(b"".join(msg for _, msg in batch))
+            for i, (shot, _) in enumerate(batch):
+                self.history.record_sent(shot, resent=i < resent)
+            resent = 0
+            await writer.drain()
+            self._last_send = loop.time()
+            metrics.inc("gspro_messages_sent", len(batch))
+            batch = []
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._last_send = loop.time()
+        while True:
+            idle = loop.time() - self._last_send
+            if idle < self.heartbeat_interval:
+                await asyncio.sleep(self.heartbeat_interval - idle)
+                continue
+            with contextlib.suppress(asyncio.QueueFull):
+                self._queue.put_nowait((self._heartbeat_shot, self._heartbeat_msg))
+            self._last_send = loop.time()
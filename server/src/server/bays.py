@@ -0,0 +1,403 @@
+"""
+Ingest for a whole facility: one process following the GSPro logs of many bays.
+
+Every bay is a task on the server's event loop. Reading and parsing a bay's log are
+handed to worker threads, one call per bay at a time and ``workers`` calls at most
+across all bays, and on Linux each bay waits on its own inotify descriptor registered
+with the loop, so idle bays cost nothing and a busy one only holds a worker while it
+reads.
+
+A bay never waits on another. It has its own GSPro Connect session, so a simulator
+that is down or slow only fills its own outbound queue. A bay whose log read hangs
+(a log on a network share, say) is reported as stalled and keeps its thread, but
+stops counting against the workers, so hung reads cost a thread each rather than
+the pool. A bay that fails is restarted with a backoff on its own.
+
+Each shot leaves with its bay's ``DeviceID`` and is handed to ``on_shot`` together
+with its ``Bay``, whose ``session_id`` is new every time the supervisor starts.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+
+from models.constants import DEVICE_ID, PORT
+from models.models import Shot
+from parser.backfill import CheckpointStore, checkpoint_for, read_shots, resume_plan
+from parser.parse import parse_shot_buffer
+from parser.tailer import LogTailer
+from server.async_socket import AsyncGSProSession
+from server.metrics import metrics
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+T = TypeVar("T")
+
+# Longest time between checkpoints while only noise is being logged
+CHECKPOINT_INTERVAL = 5.0
+
+
+@dataclass
+class BaySource:
+    """
+    One bay of the facility, as configured.
+
+    :param bay_id: name of the bay, unique in the facility
+    :param log_path: the bay's GSPro ``output_log.txt``
+    :param device_id: ``DeviceID`` its shots are sent to GSPro with
+    :param gspro_host: the bay's GSPro Connect host, None to not forward its shots
+    :param gspro_port: the bay's GSPro Connect port
+    :param checkpoint_path: where the bay's log position is saved, None to start at
+        the end of the log on every start
+    """
+
+    bay_id: str
+    log_path: str
+    device_id: str = DEVICE_ID
+    gspro_host: str | None = None
+    gspro_port: int = PORT
+    checkpoint_path: str | None = None
+
+
+def load_bays(path: str | Path) -> list[BaySource]:
+    """
+    Read the bays of a facility from a JSON list of ``BaySource`` fields; environment
+    variables in paths are expanded.
+
+    Example:
+
+        [
+            {"bay_id": "1", "log_path": "//bay-1/GSPro/output_log.txt", "device_id": "GC3 1040287",
+             "gspro_host": "10.0.0.11", "gspro_port": 921},
+            {"bay_id": "2", "log_path": "//bay-2/GSPro/output_log.txt", "device_id": "GC3 1040311"}
+        ]
+
+    """
+    sources = [BaySource(**entry) for entry in json.loads(Path(path).read_text())]
+    for source in sources:
+        source.log_path = os.path.expandvars(source.log_path)
+        if source.checkpoint_path is not None:
+            source.checkpoint_path = os.path.expandvars(source.checkpoint_path)
+    bay_ids = [source.bay_id for source in sources]
+    if len(set(bay_ids)) != len(bay_ids):
+        raise ValueError(f"duplicate bay ids in {path}")
+    return sources
+
+
+@dataclass
+class BayStats:
+    started_at: float = field(default_factory=time.monotonic)
+    bytes_read: int = 0
+    shots: int = 0
+    dropped: int = 0  # shots GSPro's full outbound queue had no room for
+    errors: int = 0
+    lag_bytes: int = 0  # log written but not read yet, as of the last read
+    last_shot_at: float | None = None
+    reading_since: float | None = None  # set while a read is with a worker
+
+
+@dataclass
+class Bay:
+    source: BaySource
+    session: AsyncGSProSession | None = None
+    session_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    stats: BayStats = field(default_factory=BayStats)
+    # the bay's call on a worker, which carries on if the bay is cancelled meanwhile
+    pending: Future[Any] | None = field(default=None, repr=False)
+
+    @property
+    def bay_id(self) -> str:
+        return self.source.bay_id
+
+
+OnShot = Callable[[Bay, Shot], Awaitable[None] | None]
+
+
+def _read(tailer: LogTailer) -> tuple[int, list[Shot], int, float, float]:
+    """Read and parse what is new in a bay's log, on a worker"""
+    start = time.perf_counter()
+    chunk = tailer.read_available()
+    read = time.perf_counter()
+    shots = list(parse_shot_buffer(chunk)) if chunk else []
+    try:
+        lag = Path(tailer.path).stat().st_size - tailer.offset
+    except OSError:
+        lag = 0
+    return len(chunk), shots, max(lag, 0), read - start, time.perf_counter() - read
+
+
+class BaySupervisor:
+    """
+    Follows the logs of many bays from one event loop.
+
+    :param sources: the bays to follow
+    :param on_shot: called with every shot and the bay it came from, awaited if it
+        returns an awaitable; only the shot's own bay waits for it
+    :param workers: calls reading and parsing logs at once, shared by all bays; stalled
+        reads don't count
+    :param stall_after: seconds a read may take before its bay is reported as stalled
+    :param min_poll: first polling delay after activity, where inotify is unavailable
+    :param max_poll: longest polling delay when idle, where inotify is unavailable
+    :param restart_max: longest delay before a failed bay is restarted
+    :param use_inotify: passed to every ``LogTailer``
+
+    Example:
+
+        async with BaySupervisor(load_bays(BAYS_PATH), on_shot) as bays:
+            ...
+            print(bays.snapshot())
+
+    """
+
+    def __init__(
+        self,
+        sources: Iterable[BaySource],
+        on_shot: OnShot | None = None,
+        *,
+        workers: int = 4,
+        stall_after: float = 5.0,
+        min_poll: float = 0.002,
+        max_poll: float = 0.25,
+        restart_max: float = 30.0,
+        use_inotify: bool | None = None,
+    ):
+        self.bays = {source.bay_id: Bay(source) for source in sources}
+        self.on_shot = on_shot
+        self.workers = workers
+        self.stall_after = stall_after
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.restart_max = restart_max
+        self.use_inotify = use_inotify
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+        # a thread per bay at most, as a bay has one call at a time; the slots keep the
+        # calls that aren't stalled to ``workers``
+        self._executor = ThreadPoolExecutor(len(self.bays) or 1, thread_name_prefix="bay-reader")
+        self._slots = asyncio.Semaphore(self.workers)
+        for bay in self.bays.values():
+            source = bay.source
+            bay.session_id = str(uuid.uuid4())
+            bay.stats = BayStats()
+            if source.gspro_host is not None:
+                bay.session = AsyncGSProSession(
+                    source.gspro_host, source.gspro_port, device_id=source.device_id
+                )
+                await bay.session.start()
+            task = asyncio.create_task(self._run(bay), name=f"bay-{bay.bay_id}")
+            self._tasks.append(task)
+        logger.info(f"Following {len(self.bays)} bays with {self.workers} readers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for bay in self.bays.values():
+            if bay.session is not None:
+                await bay.session.close()
+                bay.session = None
+        if self._executor is not None:
+            # a read stuck on a dead share can't be interrupted, don't wait for it
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self) -> "BaySupervisor":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    async def _offload(self, bay: Bay, fn: Callable[..., T], *args: Any) -> T:
+        assert self._executor is not None and self._slots is not None
+        await self._slots.acquire()
+        held = True
+        waiter: asyncio.Future[T] | None = None
+        try:
+            bay.stats.reading_since = time.monotonic()
+            future = bay.pending = self._executor.submit(fn, *args)
+            waiter = asyncio.wrap_future(future)
+            done, _ = await asyncio.wait((waiter,), timeout=self.stall_after)
+            if not done:
+                # the call keeps its thread, but no longer counts against the workers
+                self._slots.release()
+                held = False
+                metrics.inc("bay_reads_stalled")
+                logger.warning(
+                    f"bay {bay.bay_id}: log read stalled for {self.stall_after:g}s, "
+                    "reading the other bays without it"
+                )
+            return await waiter
+        finally:
+            if waiter is not None:
+                waiter.cancel()  # cancels the call too if it hasn't started
+            if held:
+                self._slots.release()
+            bay.stats.reading_since = None
+
+    async def _run(self, bay: Bay) -> None:
+        delay = 0.25
+        while True:
+            try:
+                await self._follow(bay)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                bay.stats.errors += 1
+                metrics.inc("bay_errors")
+                logger.warning(f"bay {bay.bay_id} failed ({e!r}), restarting in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.restart_max)
+
+    async def _deliver(self, bay: Bay, shots: list[Shot]) -> None:
+        now = time.monotonic()
+        for shot in shots:
+            shot.DeviceID = bay.source.device_id
+            bay.stats.shots += 1
+            bay.stats.last_shot_at = now
+            if bay.session is not None:
+                try:
+                    bay.session.send_shot_nowait(shot)
+                except asyncio.QueueFull:
+                    bay.stats.dropped += 1
+                    metrics.inc("gspro_shots_dropped")
+                    logger.warning(f"bay {bay.bay_id}: GSPro is not keeping up, dropped a shot")
+            if self.on_shot is not None:
+                result = self.on_shot(bay, shot)
+                if inspect.isawaitable(result):
+                    await result
+
+    async def _follow(self, bay: Bay) -> None:
+        source = bay.source
+        store = CheckpointStore(source.checkpoint_path) if source.checkpoint_path else None
+        plan = (
+            await self._offload(bay, lambda: resume_plan(source.log_path, store.load()))
+            if store
+            else []
+        )
+
+        # drain rotated logs the checkpoint still points into before following the live one
+        for rotated_path, offset in plan[:-1]:
+            await self._deliver(bay, await self._offload(bay, read_shots, rotated_path, offset))
+        start_offset = plan[-1][1] if plan else None
+        if store and len(plan) > 1 and start_offset is not None:
+            # the rotated logs are done with, don't drain them again after a restart
+            await self._offload(
+                bay, lambda: store.save(checkpoint_for(source.log_path, start_offset))
+            )
+
+        tailer = await self._offload(
+            bay,
+            lambda: LogTailer(
+                source.log_path, start_offset=start_offset, use_inotify=self.use_inotify
+            ),
+        )
+        loop = asyncio.get_running_loop()
+        fd = tailer.fileno()
+        woken = asyncio.Event()
+
+        def readable(fd: int) -> None:
+            # level triggered: stop watching until the bay has drained the events
+            loop.remove_reader(fd)
+            woken.set()
+
+        try:
+            last_saved = float("-inf")
+            delay = self.min_poll
+            while True:
+                n_bytes, shots, lag, read_s, parse_s = await self._offload(bay, _read, tailer)
+                bay.stats.lag_bytes = lag
+                if not n_bytes:
+                    if fd is None:
+                        await asyncio.sleep(delay)
+                        delay = min(delay * 2, self.max_poll)
+                        continue
+                    woken.clear()
+                    loop.add_reader(fd, readable, fd)
+                    try:
+                        # not wait_for, which can swallow a cancellation that races
+                        # with the wake-up
+                        async with asyncio.timeout(tailer.rotation_check):
+                            await woken.wait()
+                    except TimeoutError:
+                        pass
+                    finally:
+                        loop.remove_reader(fd)
+                    tailer.wait(0)  # consume the notifications, without blocking
+                    continue
+
+                delay = self.min_poll
+                bay.stats.bytes_read += n_bytes
+                metrics.observe("tail", read_s)
+                metrics.observe("parse", parse_s)
+                metrics.inc("log_bytes_read", n_bytes)
+                metrics.inc("shots_parsed", len(shots))
+                await self._deliver(bay, shots)
+
+                # checkpoint right after delivering shots so a restart can't repeat them,
+                # otherwise only now and then to keep up with the noise
+                now = time.monotonic()
+                due = shots or now - last_saved > CHECKPOINT_INTERVAL
+                if store and due and await self._offload(bay, self._save, store, tailer):
+                    last_saved = now
+        finally:
+            if fd is not None:
+                loop.remove_reader(fd)
+            # closing the log under a read still on a worker could leave it reading
+            # whatever reuses the descriptor
+            pending = bay.pending
+            if pending is not None and not pending.done():
+                pending.add_done_callback(lambda _: tailer.close())
+            else:
+                tailer.close()
+
+    @staticmethod
+    def _save(store: CheckpointStore, tailer: LogTailer) -> bool:
+        checkpoint = checkpoint_for(tailer.path, tailer.offset)
+        if checkpoint.fingerprint.inode != tailer.inode:
+            return False
+        store.save(checkpoint)
+        return True
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Throughput and lag of every bay"""
+        now = time.monotonic()
+        bays: list[dict[str, Any]] = []
+        for bay in self.bays.values():
+            stats = bay.stats
+            uptime = max(now - stats.started_at, 1e-9)
+            reading = 0.0 if stats.reading_since is None else now - stats.reading_since
+            last_shot = None if stats.last_shot_at is None else round(now - stats.last_shot_at, 3)
+            bays.append(
+                {
+                    "bay_id": bay.bay_id,
+                    "session_id": bay.session_id,
+                    "device_id": bay.source.device_id,
+                    "shots": stats.shots,
+                    "shots_per_minute": round(stats.shots / uptime * 60, 3),
+                    "bytes_read": stats.bytes_read,
+                    "lag_bytes": stats.lag_bytes,
+                    "seconds_since_last_shot": last_shot,
+                    "stalled": reading > self.stall_after,
+                    "gspro_connected": bay.session is not None and bay.session.connected.is_set(),
+                    "dropped": stats.dropped,
+                    "errors": stats.errors,
+                }
+            )
+        return bays
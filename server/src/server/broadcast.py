@@ -0,0 +1,267 @@
+"""
+Fan-out of shot and insight events to the dashboards connected over WebSocket.
+
+Every event is serialized once, into a single ASGI ``websocket.send`` message shared by
+all the clients it goes to. Each client has its own bounded queue drained by its own
+sender task, so a slow phone never holds up the producer or the TVs: once a client
+falls behind, its queued ``shot`` frames are coalesced down to the most recent few
+(the dashboard reloads history anyway), and a client that cannot even keep up with
+insights is disconnected.
+
+Frames follow the client's ``WebSocketMessage``: ``{"type": "shot", "ts": ..., "shot":
+{...}}``, the shot serialized as ``ShotOut`` like the REST listing's. Insights published together go out as one ``{"type": "insights", "ts": ...,
+"insights": [...]}`` frame, and a ``{"type": "ping"}`` frame is sent every
+``heartbeat_interval`` seconds.
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from models.shots import ShotOut
+from server.metrics import metrics
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+Message = dict[str, Any]  # an ASGI websocket message
+Send = Callable[[Message], Awaitable[None]]
+
+SHOT = "shot"
+INSIGHTS = "insights"
+PING = "ping"
+
+
+def _frame(payload: Any) -> Message:
+    return {"type": "websocket.send", "text": json.dumps(payload, separators=(",", ":"))}
+
+
+@dataclass(frozen=True)
+class Topics:
+    """What a client wants to hear about: ``None`` means everything"""
+
+    clubs: frozenset[str] | None = None
+    session_id: str | None = None
+
+    @classmethod
+    def parse(cls, clubs: Iterable[str] | None = None, session_id: str | None = None) -> "Topics":
+        clubs = frozenset(c for c in clubs or () if c)
+        return cls(clubs or None, session_id or None)
+
+    def matches(self, club: str | None, session_id: str | None) -> bool:
+        if self.clubs is not None and club not in self.clubs:
+            return False
+        return self.session_id is None or session_id == self.session_id
+
+
+class Client:
+    """
+    One connection: its topics, its queue of frames and the task sending them.
+    """
+
+    def __init__(self, send: Send, topics: Topics, queue_size: int, max_pending_shots: int):
+        self.send = send
+        self.topics = topics
+        self.queue_size = queue_size
+        self.max_pending_shots = max_pending_shots
+        self.sent = 0
+        self.dropped = 0
+        self.closed = asyncio.Event()
+        self._frames: deque[tuple[str, Message]] = deque()
+        self._pending_shots = 0
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def enqueue(self, kind: str, message: Message) -> bool:
+        """Queue a frame, returns False if the client is too slow to keep"""
+        if kind == SHOT:
+            if self._pending_shots >= self.max_pending_shots:
+                self._drop_oldest_shot()
+            self._pending_shots += 1
+        elif len(self._frames) >= self.queue_size and not self._drop_oldest_shot():
+            return False
+        self._frames.append((kind, message))
+        self._ready.set()
+        return True
+
+    def _drop_oldest_shot(self) -> bool:
+        for i, (kind, _) in enumerate(self._frames):
+            if kind == SHOT:
+                del self._frames[i]
+                self._pending_shots -= 1
+                self.dropped += 1
+                metrics.inc("ws_shot_frames_coalesced")
+                return True
+        return False
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="ws-client-sender")
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                while self._frames:
+                    kind, message = self._frames.popleft()
+                    if kind == SHOT:
+                        self._pending_shots -= 1
+                    await self.send(message)
+                    self.sent += 1
+                self._ready.clear()
+        except Exception as e:
+            logger.info(f"websocket client gone: {e!r}")
+        finally:
+            self.closed.set()
+
+    def abort(self) -> None:
+        """Stop sending without waiting, e.g. from synchronous publishing code"""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self.closed.set()
+
+
+class BroadcastHub:
+    """
+    Sends every published event to the matching connected clients.
+
+    :param queue_size: frames queued per client before it is considered too slow
+    :param max_pending_shots: ``shot`` frames queued per client, older ones are dropped
+    :param heartbeat_interval: seconds between ``ping`` frames, 0 to disable
+    :param clock: time source of the ``ts`` fields, ``time.time`` by default
+
+    Example:
+
+        async with BroadcastHub() as hub:
+            hub.publish_shot(row)  # returns at once, sending happens per client
+            hub.publish_insights(insights)
+
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = 256,
+        max_pending_shots: int = 4,
+        heartbeat_interval: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.queue_size = queue_size
+        self.max_pending_shots = max_pending_shots
+        self.heartbeat_interval = heartbeat_interval
+        self.clients: set[Client] = set()
+        self.disconnected_slow = 0
+        self._clock = clock
+        self._heartbeat: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._heartbeat is None and self.heartbeat_interval > 0:
+            self._heartbeat = asyncio.create_task(self._ping(), name="ws-heartbeat")
+
+    async def close(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._heartbeat
+            self._heartbeat = None
+        for client in list(self.clients):
+            await self.disconnect(client)
+
+    async def __aenter__(self) -> "BroadcastHub":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    def connect(self, send: Send, topics: Topics | None = None) -> Client:
+        client = Client(send, topics or Topics(), self.queue_size, self.max_pending_shots)
+        self.clients.add(client)
+        client.start()
+        return client
+
+    async def disconnect(self, client: Client) -> None:
+        self.clients.discard(client)
+        await client.stop()
+
+    def _ts(self) -> int:
+        return int(self._clock() * 1000)
+
+    def _deliver(self, client: Client, kind: str, message: Message) -> bool:
+        if client.enqueue(kind, message):
+            return True
+        logger.warning("disconnecting a websocket client that cannot keep up")
+        self.disconnected_slow += 1
+        metrics.inc("ws_clients_disconnected_slow")
+        self.clients.discard(client)
+        client.abort()
+        return False
+
+    def publish_shot(
+        self, shot: Mapping[str, Any], *, club: str | None = None, session_id: str | None = None
+    ) -> int:
+        """
+        Queue a ``shot`` event for every matching client, returns how many. ``club`` and
+        ``session_id`` default to the fields of the ``shots`` row.
+        """
+        club = club if club is not None else shot.get("club")
+        session_id = session_id if session_id is not None else shot.get("session_id")
+        message: Message | None = None
+        n = 0
+        with metrics.span("broadcast"):
+            for client in list(self.clients):
+                if client.topics.matches(club, session_id):
+                    if message is None:
+                        payload = ShotOut.from_row(shot).model_dump(mode="json")
+                        message = _frame({"type": SHOT, "ts": self._ts(), "shot": payload})
+                    n += self._deliver(client, SHOT, message)
+        return n
+
+    def publish_insights(self, insights: Sequence[Mapping[str, Any]]) -> int:
+        """
+        Queue the insights a client is interested in as one frame per client, returns
+        the number of clients sent a frame. Clients interested in the same insights share
+        the frame.
+        """
+        if not insights:
+            return 0
+        with metrics.span("broadcast"):
+            ts = self._ts()
+            frames: dict[tuple[int, ...], Message] = {}
+            n = 0
+            for client in list(self.clients):
+                selected = tuple(
+                    i
+                    for i, insight in enumerate(insights)
+                    if client.topics.matches(insight.get("club"), insight.get("session_id"))
+                )
+                if not selected:
+                    continue
+                message = frames.get(selected)
+                if message is None:
+                    message = frames[selected] = _frame(
+                        {"type": INSIGHTS, "ts": ts, "insights": [insights[i] for i in selected]}
+                    )
+                n += self._deliver(client, INSIGHTS, message)
+        return n
+
+    async def _ping(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            message = _frame({"type": PING, "ts": self._ts()})
+            for client in list(self.clients):
+                self._deliver(client, PING, message)
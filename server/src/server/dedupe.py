@@ -0,0 +1,205 @@
+"""
+Shot de-duplication on the ingest path.
+
+GSPro restarts its ``ShotNumber`` from 1, and the same shot can arrive through the log
+sniffer, GSPro Connect, ``POST /api/shots`` or a backfill replay, so shots are keyed by
+a ``signature``: a hash of their ball data, rounded the way the log prints it.
+
+The database's unique index on ``signature`` is the final word, but asking it costs a
+round-trip per shot. ``DedupeIndex`` answers in memory instead:
+
+- signatures of the last ``recent`` shots are held exactly, so a repeated shot is
+  rejected straight away;
+- every signature ever stored is also in a Bloom filter, so a shot it does not contain
+  is certainly new and can be forwarded before it is even committed;
+- only a shot that is not recent but that the filter may contain (an old shot being
+  replayed, or a false positive) has to wait for the database to tell.
+
+The filter is saved to a file together with the rowid of the last shot in it, so at
+startup only the shots inserted since have to be read back from SQLite.
+"""
+
+import hashlib
+import math
+import os
+import struct
+from collections import OrderedDict
+from enum import Enum
+from pathlib import Path
+
+from models.models import BallData
+from server.storage import ShotStore
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+# magic, m (bits), k (hashes), watermark (rowid of the last shot added)
+_HEADER = struct.Struct("<4sQIQ")
+_MAGIC = b"DSB1"
+
+
+def signature(ball: BallData) -> str:
+    """
+    The dedupe key of a shot: its ball data at the log's 2 decimals, hashed.
+
+    Example:
+
+        signature(BallData(Speed=145.2, SpinAxis=3.1, TotalSpin=2650, HLA=1.2, VLA=12.3))
+
+    """
+    # + 0.0 so that -0.00 and 0.00 are the same
+    values = (ball.Speed, ball.SpinAxis, ball.TotalSpin, ball.HLA, ball.VLA)
+    key = "|".join(f"{round(v, 2) + 0.0:.2f}" for v in values)
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """
+    A set of strings that may answer "maybe" for one it does not hold, at about
+    ``error_rate`` once ``capacity`` strings are in it, but never "no" for one it does.
+
+    :param capacity: strings the filter is sized for
+    :param error_rate: false positive rate at ``capacity``
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-3):
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.m = max(bits, 64)
+        self.k = max(round(self.m / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, item: str) -> None:
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path: str | Path, watermark: int) -> None:
+        """Replace ``path`` atomically with the filter and ``watermark``"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.m, self.k, watermark))
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> tuple["BloomFilter", int] | None:
+        """The filter saved to ``path`` and its watermark, None if missing or unreadable"""
+        try:
+            data = Path(path).read_bytes()
+            magic, m, k, watermark = _HEADER.unpack_from(data)
+        except (OSError, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable dedupe filter {path}: {e}")
+            return None
+        bits = data[_HEADER.size :]
+        if magic != _MAGIC or len(bits) != (m + 7) // 8:
+            logger.warning(f"Ignoring dedupe filter {path}: not a filter or truncated")
+            return None
+        bloom = cls.__new__(cls)
+        bloom.m, bloom.k, bloom.bits = m, k, bytearray(bits)
+        return bloom, watermark
+
+
+class Verdict(Enum):
+    NEW = "new"  # certainly never stored
+    DUPLICATE = "duplicate"  # certainly stored, or being stored
+    MAYBE = "maybe"  # only the database can tell
+
+
+class DedupeIndex:
+    """
+    Recent signatures exactly, and all of them in a Bloom filter.
+
+    :param path: where the filter is saved, None to rebuild it from the database on
+        every start
+    :param recent: signatures held exactly, the most recently added
+    :param capacity: shots the filter is sized for
+    :param error_rate: false positive rate of the filter at ``capacity``
+
+    Example:
+
+        index = DedupeIndex(FILTER_PATH)
+        await index.warm(store)
+        if index.check(sig) is Verdict.DUPLICATE:
+            return
+        index.add(sig)
+
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        recent: int = 100_000,
+        capacity: int = 1_000_000,
+        error_rate: float = 1e-3,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.recent = recent
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.watermark = 0  # rowid of the last stored shot the filter holds
+        self._recent: OrderedDict[str, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def check(self, sig: str) -> Verdict:
+        if sig in self._recent:
+            return Verdict.DUPLICATE
+        return Verdict.MAYBE if sig in self.bloom else Verdict.NEW
+
+    def add(self, sig: str) -> None:
+        """Remember ``sig``, once it is certain to be stored or being stored"""
+        recent = self._recent
+        recent[sig] = None
+        recent.move_to_end(sig)
+        if len(recent) > self.recent:
+            recent.popitem(last=False)
+        self.bloom.add(sig)
+
+    def discard(self, sig: str) -> None:
+        """Forget a signature added for a shot that then failed to be stored"""
+        self._recent.pop(sig, None)
+
+    async def warm(self, store: ShotStore) -> None:
+        """Load the saved filter, then catch up with the shots stored since"""
+        loaded = BloomFilter.load(self.path) if self.path is not None else None
+        if loaded is not None and loaded[0].m == self.bloom.m and loaded[0].k == self.bloom.k:
+            self.bloom, self.watermark = loaded
+        await self.sync(store)
+        self._recent.clear()
+        for sig in await store.recent_signatures(self.recent):
+            self._recent[sig] = None
+
+    async def sync(self, store: ShotStore) -> int:
+        """Add the signatures stored after the watermark, returns how many"""
+        rows = await store.signatures(self.watermark)
+        for _, sig in rows:
+            self.bloom.add(sig)
+        if rows:
+            self.watermark = rows[-1][0]
+        return len(rows)
+
+    async def save(self, store: ShotStore) -> None:
+        """Catch up with the database, then save the filter"""
+        if self.path is None:
+            return
+        await self.sync(store)
+        self.bloom.save(self.path, self.watermark)
@@ -0,0 +1,195 @@
+import struct
+import time
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from models.models import GSProMessage, Shot
+
+
+SENT = 0
+RECEIVED = 1
+
+# code column of outbound records, inbound records carry GSPro's response code
+SENT_SHOT = 0
+SENT_HEARTBEAT = 1
+
+SHOT_RECEIVED_CODE = 200
+# GSPro's 5xx codes report a shot it failed to take
+SHOT_FAILED_CODES = range(500, 600)
+
+# timestamp, direction, code, shot number
+_RECORD = struct.Struct("<dbhi")
+
+
+def answers_shot(code: int) -> bool:
+    """Whether a response with this code is GSPro's answer to a shot, in send order"""
+    return code == SHOT_RECEIVED_CODE or code in SHOT_FAILED_CODES
+
+
+class HistoryRecord(NamedTuple):
+    timestamp: float
+    direction: int
+    code: int
+    shot_number: int
+
+
+class ShotHistory:
+    """Fixed-capacity record of the traffic between a session and GSPro
+
+    A session lives for hours with a heartbeat every few seconds, so rather than
+    keeping every ``Shot`` and ``GSProMessage`` this keeps four typed columns
+    (timestamp, direction, code, shot number) in preallocated arrays used as a ring
+    buffer. Once full, the oldest record is overwritten, after being appended to
+    ``spill_path`` if one is given.
+
+    It also pairs every shot sent with the next answer received (GSPro answers in
+    order) and keeps the round-trip latencies of the ``Code 200`` ones in a ring of the
+    same size. Shots unanswered when a connection drops are forgotten by
+    ``clear_pending``, so they can't shift the pairing of the shots sent after.
+
+    :param capacity: number of records kept in memory
+    :param spill_path: append-only file receiving records as they are overwritten
+    :param clock: time source, ``time.time`` by default
+    """
+
+    __slots__ = (
+        "_clock",
+        "_code",
+        "_direction",
+        "_latency",
+        "_latency_count",
+        "_pending",
+        "_shot_number",
+        "_spill",
+        "_spill_buf",
+        "_timestamp",
+        "capacity",
+        "count",
+        "spill_path",
+    )
+
+    SPILL_BATCH = 256
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        spill_path: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if capacity <= 0:
+            raise ValueError(f"{capacity=} must be positive")
+        self.capacity = capacity
+        self.count = 0  # records ever added
+        self.spill_path = spill_path
+        self._clock = clock
+
+        self._timestamp = array("d", bytes(8 * capacity))
+        self._direction = array("b", bytes(capacity))
+        self._code = array("h", bytes(2 * capacity))
+        self._shot_number = array("i", bytes(4 * capacity))
+
+        self._pending: deque[float] = deque(maxlen=capacity)
+        self._latency = array("d", bytes(8 * capacity))
+        self._latency_count = 0
+
+        self._spill = None if spill_path is None else Path(spill_path).open("ab")  # noqa: SIM115
+        self._spill_buf = bytearray()
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def _append(self, direction: int, code: int, shot_number: int) -> float:
+        now = self._clock()
+        i = self.count % self.capacity
+        if self.count >= self.capacity and self._spill is not None:
+            self._spill_buf += _RECORD.pack(
+                self._timestamp[i], self._direction[i], self._code[i], self._shot_number[i]
+            )
+            if len(self._spill_buf) >= self.SPILL_BATCH * _RECORD.size:
+                self.flush()
+        self._timestamp[i] = now
+        self._direction[i] = direction
+        self._code[i] = code
+        self._shot_number[i] = shot_number
+        self.count += 1
+        return now
+
+    def record_sent(self, shot: Shot, *, resent: bool = False) -> None:
+        """
+        :param resent: the shot was recorded when first sent and is only waited on again,
+            after a reconnect
+        """
+        is_heartbeat = bool(shot.ShotDataOptions and shot.ShotDataOptions.IsHeartbeat)
+        if resent:
+            if not is_heartbeat:
+                self._pending.append(self._clock())
+            return
+        now = self._append(SENT, SENT_HEARTBEAT if is_heartbeat else SENT_SHOT, shot.ShotNumber)
+        if not is_heartbeat:
+            self._pending.append(now)
+
+    def record_received(self, msg: GSProMessage) -> None:
+        now = self._append(RECEIVED, msg.Code, -1)
+        if answers_shot(msg.Code) and self._pending:
+            sent = self._pending.popleft()
+            if msg.Code == SHOT_RECEIVED_CODE:
+                self._latency[self._latency_count % self.capacity] = now - sent
+                self._latency_count += 1
+
+    def clear_pending(self) -> None:
+        """Stop waiting for answers to the shots sent so far, once their connection is gone"""
+        self._pending.clear()
+
+    def records(self) -> Iterator[HistoryRecord]:
+        """The records still in memory, oldest first"""
+        start = max(0, self.count - self.capacity)
+        for n in range(start, self.count):
+            i = n % self.capacity
+            yield HistoryRecord(
+                self._timestamp[i], self._direction[i], self._code[i], self._shot_number[i]
+            )
+
+    def latencies(self, last: int | None = None) -> list[float]:
+        """Round-trip latencies (shot sent to Code 200 received) in seconds, oldest first"""
+        n = min(self._latency_count, self.capacity)
+        if last is not None:
+            n = min(n, last)
+        return [
+            self._latency[i % self.capacity]
+            for i in range(self._latency_count - n, self._latency_count)
+        ]
+
+    def latency_summary(self, last: int | None = None) -> dict[str, float]:
+        """Count, mean, p50, p99 and max of the recent round-trip latencies in seconds"""
+        values = sorted(self.latencies(last))
+        if not values:
+            return {"count": 0}
+        return {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "p50": values[len(values) // 2],
+            "p99": values[min(len(values) - 1, int(len(values) * 0.99))],
+            "max": values[-1],
+        }
+
+    def flush(self) -> None:
+        if self._spill is not None and self._spill_buf:
+            self._spill.write(self._spill_buf)
+            self._spill.flush()
+            self._spill_buf.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+def read_spilled(path: str) -> Iterator[HistoryRecord]:
+    """Records spilled to disk by a ``ShotHistory``, oldest first"""
+    data = Path(path).read_bytes()
+    for fields in _RECORD.iter_unpack(data[: len(data) - len(data) % _RECORD.size]):
+        yield HistoryRecord(*fields)
@@ -0,0 +1,170 @@
+"""
+The path a shot posted to the server takes: de-duplicated, forwarded to GSPro,
+persisted, then broadcast to the dashboards. ``backfill`` stores historical shots the
+same way, without forwarding or broadcasting them.
+
+A shot the ``DedupeIndex`` rejects goes no further. One it knows to be new is
+forwarded to GSPro straight away, without waiting for the commit; one it is unsure
+of is forwarded only once the database has inserted it.
+"""
+
+import uuid
+from collections.abc import Iterable, Mapping
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any
+
+from models.models import Shot
+from server.async_socket import AsyncGSProSession
+from server.broadcast import BroadcastHub
+from server.dedupe import DedupeIndex, Verdict, signature
+from server.metrics import metrics
+from server.storage import Row, ShotStore, now_micros, to_micros
+
+
+def shot_row(
+    shot: Shot,
+    *,
+    club: str,
+    carry: float,
+    offline: float,
+    captured_at: datetime | None = None,
+    session_id: str | None = None,
+    shot_id: str | None = None,
+) -> dict[str, Any]:
+    """
+    The ``shots`` row of a GSPro Connect shot; ball flight is GSPro's to compute, so
+    ``carry`` and ``offline`` come from the caller.
+    """
+    ball = shot.BallData
+    sig = signature(ball)
+    return {
+        "id": shot_id or str(uuid.uuid4()),
+        "captured_at": now_micros() if captured_at is None else to_micros(captured_at),
+        "club": club,
+        "carry": carry,
+        "offline": offline,
+        "ball_speed": ball.Speed,
+        "spin": int(ball.TotalSpin),
+        "launch_angle": ball.VLA,
+        "launch_direction": ball.HLA,
+        "session_id": session_id,
+        "is_outlier": False,
+        "outlier_reason": None,
+        "raw_json": asdict(shot),
+        "signature": sig,
+        "created_at": now_micros(),
+    }
+
+
+class ShotIngest:
+    """
+    :param store: where shots are persisted
+    :param index: the dedupe index, warmed from ``store`` by ``open``
+    :param hub: where accepted shots are broadcast, if anywhere
+    :param session: where accepted shots are forwarded, if anywhere
+
+    Example:
+
+        async with ShotIngest(store, DedupeIndex(FILTER_PATH), hub, session) as ingest:
+            await ingest.add(shot_row(shot, club="7i", carry=152.0, offline=-3.5), shot)
+
+    """
+
+    def __init__(
+        self,
+        store: ShotStore,
+        index: DedupeIndex | None = None,
+        hub: BroadcastHub | None = None,
+        session: AsyncGSProSession | None = None,
+    ):
+        self.store = store
+        self.index = index if index is not None else DedupeIndex()
+        self.hub = hub
+        self.session = session
+        self.accepted = 0
+        self.duplicates = 0
+
+    async def open(self) -> None:
+        await self.index.warm(self.store)
+
+    async def close(self) -> None:
+        await self.index.save(self.store)
+
+    async def __aenter__(self) -> "ShotIngest":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    def _duplicate(self, n: int = 1) -> bool:
+        self.duplicates += n
+        metrics.inc("shots_duplicate", n)
+        return False
+
+    async def _store(self, rows: list[Row]) -> int:
+        inserted = len(await self.store.add_shots(rows))
+        self._duplicate(len(rows) - inserted)
+        self.accepted += inserted
+        metrics.inc("shots_accepted", inserted)
+        return inserted
+
+    async def add(self, row: Mapping[str, Any], shot: Shot | None = None) -> bool:
+        """
+        Ingest one shot, returns False if it was a duplicate.
+
+        :param row: the ``shots`` row, with its ``signature``
+        :param shot: the GSPro Connect shot, forwarded to ``session`` if accepted
+        """
+        sig = row["signature"]
+        with metrics.span("dedupe"):
+            verdict = self.index.check(sig)
+        if verdict is Verdict.DUPLICATE:
+            return self._duplicate()
+
+        # claimed before the first await, so the same shot arriving twice at once is
+        # stored once, and released if the shot doesn't make it into the store
+        self.index.add(sig)
+        try:
+            if verdict is Verdict.NEW and shot is not None and self.session is not None:
+                self.session.send_shot_nowait(shot)
+            if not await self._store([row]):
+                return False
+            if verdict is Verdict.MAYBE and shot is not None and self.session is not None:
+                self.session.send_shot_nowait(shot)
+        except BaseException:
+            self.index.discard(sig)
+            raise
+        if self.hub is not None:
+            self.hub.publish_shot(row)
+        return True
+
+    async def backfill(self, rows: Iterable[Row], chunk_size: int = 10_000) -> int:
+        """
+        Store a stream of historical shots, neither forwarded nor broadcast; those the
+        index knows are stored already are not even sent to the database. Returns the
+        number of shots inserted.
+        """
+        inserted = 0
+        chunk: list[Row] = []
+        for row in rows:
+            sig = row["signature"]
+            if self.index.check(sig) is Verdict.DUPLICATE:
+                self._duplicate()
+                continue
+            self.index.add(sig)
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inserted += await self._store_claimed(chunk)
+                chunk = []
+        return inserted + await self._store_claimed(chunk)
+
+    async def _store_claimed(self, rows: list[Row]) -> int:
+        """``_store`` rows whose signatures were added to the index, released on failure"""
+        try:
+            return await self._store(rows)
+        except BaseException:
+            for row in rows:
+                self.index.discard(row["signature"])
+            raise
@@ -0,0 +1,82 @@
+"""
+The FastAPI application and its entry point (``server``).
+"""
+
+import contextlib
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from api import bays as bays_api
+from api import clubs, shots, websocket
+from api import metrics as metrics_api
+from models.constants import BAYS_PATH, DB_PATH
+from server import __version__
+from server.bays import BaySupervisor, load_bays
+from server.broadcast import BroadcastHub
+from server.dedupe import DedupeIndex
+from server.ingest import ShotIngest
+from server.metrics import Metrics, metrics
+from server.storage import ShotStore
+
+
+def create_app(
+    hub: BroadcastHub | None = None,
+    registry: Metrics | None = None,
+    store: ShotStore | None = None,
+    bays: BaySupervisor | None = None,
+) -> FastAPI:
+    """
+    :param hub: where events are broadcast from, a new ``BroadcastHub`` by default
+    :param registry: what ``/metrics`` serves, the process-wide ``metrics`` by default
+    :param store: the database, opened and closed with the app; ``DB_PATH`` by default.
+        Its dedupe filter is saved next to it.
+    :param bays: the bays whose logs are followed while the app runs, if any. Their shots
+        go to the supervisor's own ``on_shot``: a shot read from a log has no club, carry
+        or offline, so the app can't store or broadcast it.
+    """
+    hub = hub if hub is not None else BroadcastHub()
+    store = store if store is not None else ShotStore(os.path.expandvars(DB_PATH))
+    ingest = ShotIngest(store, DedupeIndex(store.path.with_suffix(".bloom")), hub)
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        async with hub, store, ingest, contextlib.AsyncExitStack() as stack:
+            if bays is not None:
+                await stack.enter_async_context(bays)
+            yield
+
+    app = FastAPI(title="Double Sight", version=__version__, lifespan=lifespan)
+    app.state.hub = hub
+    app.state.metrics = registry if registry is not None else metrics
+    app.state.store = store
+    app.state.ingest = ingest
+    app.state.bays = bays
+    app.include_router(websocket.router)
+    app.include_router(metrics_api.router)
+    app.include_router(shots.router)
+    app.include_router(clubs.router)
+    app.include_router(bays_api.router)
+    return app
+
+
+app = create_app()
+
+
+def server_app() -> FastAPI:
+    """
+    The app ``server`` runs: ``app``, following the facility's bays when ``BAYS_PATH``
+    lists them. Each bay's shots are forwarded to its own GSPro and its throughput is
+    served at ``/api/bays``.
+    """
+    path = Path(os.path.expandvars(BAYS_PATH))
+    return create_app(bays=BaySupervisor(load_bays(path))) if path.exists() else app
+
+
+def run() -> None:
+    import uvicorn
+
+    uvicorn.run("server.main:server_app", factory=True, host="0.0.0.0", port=8000)
@@ -0,0 +1,170 @@
+"""
+Per-stage latency histograms and counters for the shot pipeline.
+
+Every stage a shot goes through in the server (``tail``, ``parse``, ``dedupe``,
+``persist``, ``broadcast``) is timed with a monotonic clock into a histogram of fixed
+buckets, so recording a span costs two clock reads, a bisect and three additions,
+whatever the traffic. Counters are plain integers. The registry is
+exposed as Prometheus text by ``GET /metrics`` and as a compact JSON snapshot by
+``GET /metrics.json``.
+
+Components record into the process-wide ``metrics`` registry. Updates are not
+locked: the tailer thread and the event loop may both record, and under the GIL a
+racing increment can at worst be lost, which is fine for monitoring.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from time import perf_counter
+from typing import Any
+
+
+STAGES = ("tail", "parse", "dedupe", "persist", "broadcast")
+
+# upper bounds in seconds, from 50us up; anything slower lands in +Inf
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+PREFIX = "double_sight"
+
+
+class Histogram:
+    """Counts of observations per bucket, the last one unbounded"""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate of the ``q`` quantile, interpolated within its bucket the way
+        Prometheus' ``histogram_quantile`` does; the largest bound if it is beyond.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class Span:
+    """Times a ``with`` block into a histogram"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> "Span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._histogram.observe(perf_counter() - self._start)
+
+
+class Metrics:
+    """
+    Latency histograms per stage and named counters.
+
+    Example:
+
+        with metrics.span("parse"):
+            shots = list(parse_shot_buffer(chunk))
+        metrics.inc("shots_parsed", len(shots))
+
+    """
+
+    def __init__(self, stages: Iterable[str] = STAGES, bounds: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.stages = {stage: Histogram(self.bounds) for stage in stages}
+        self.counters: dict[str, int] = {}
+
+    def histogram(self, stage: str) -> Histogram:
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.bounds)
+        return histogram
+
+    def span(self, stage: str) -> Span:
+        """Time a ``with`` block as ``stage``"""
+        return Span(self.histogram(stage))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histogram(stage).observe(seconds)
+
+    def inc(self, counter: str, n: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def reset(self) -> None:
+        for stage in list(self.stages):
+            self.stages[stage] = Histogram(self.bounds)
+        self.counters.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Count, total, mean and p50/p99/p999 of each stage in milliseconds, and the counters"""
+        stages = {}
+        for stage, h in self.stages.items():
+            stages[stage] = {
+                "count": h.count,
+                "sum_ms": h.sum * 1e3,
+                "mean_ms": h.sum / h.count * 1e3 if h.count else 0.0,
+                "p50_ms": h.quantile(0.5) * 1e3,
+                "p99_ms": h.quantile(0.99) * 1e3,
+                "p999_ms": h.quantile(0.999) * 1e3,
+            }
+        return {"stages": stages, "counters": dict(self.counters)}
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format"""
+        name = f"{PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each stage of the shot pipeline.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, h in self.stages.items():
+            cumulative = 0
+            for bound, n in zip((*h.bounds, "+Inf"), h.counts, strict=True):
+                cumulative += n
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {PREFIX}_{counter}_total counter")
+            lines.append(f"{PREFIX}_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
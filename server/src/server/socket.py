@@ -1,122 +1,167 @@
-import sys
-from logging import Formatter, Logger, StreamHandler, getLogger
-from typing import Any
+import codecs
 import json
+import logging
+import re
 import socket
-from dataclasses import dataclass, asdict, fields, replace, is_dataclass, field
+from typing import Any
 import select
 
-from models.models import BallData, Shot
-
-@dataclass
-class GSProPlayer:
-    Handed: str | None = None
-    Club: str | None = None
-    DistanceToTarget: float | None = None
-
+from models.models import GSProMessage, Shot, asdict_ignore_none
+from server.history import ShotHistory
+from utils.Logging import Logger
 
-@dataclass
-class GSProMessage:
-    Code: int
-    Message: str | None = None
-    Player: GSProPlayer | None = None
-    Xtra: dict = field(default_factory=dict)  # other attributes passed through in extra
+logger = Logger(__name__).get_logger()
 
-    @classmethod
-    def create_from_dict(cls, dct: dict[str, Any]) -> "GSProMessage":
-        dct = dict(dct)
-        kwargs = {}
-        for f in fields(cls):
-            if f.name in dct:
-                kwargs[f.name] = dct.pop(f.name)
-        kwargs["Xtra"] = dct
-        return cls(**kwargs)
+# at DEBUG, log the payload of one shot in this many
+PAYLOAD_LOG_EVERY = 50
 
 
 class GSProSession:
-
     def __init__(self, gspro_host="127.0.0.1", gspro_port=921):
         self.gspro_host = gspro_host
         self.gspro_port = gspro_port
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.shots_and_responses = []
+        self.history = ShotHistory()
+        self.decoder = GSProStreamDecoder()
+        self._sent = 0
 
         self.__logger = Logger(__name__).get_logger()
 
         self.__logger.info(f"connecting to gspro {self.gspro_host}:{self.gspro_port}")
         self.sock.connect((self.gspro_host, self.gspro_port))
-        self.__logger.info(f"{self.sock=}")
+        self.__logger.debug(f"{self.sock=}")
 
     def send_heartbeat(self):
         self.send_shot(Shot.heartbeat())
 
     def recv_data(self):
-        self.__logger.info("receiving response")
         resp_bytes = self.sock.recv(2048)
-        self.__logger.info(f"recv msg size: {len(resp_bytes)}")
-        msgs = [GSProMessage.create(dct) for dct in parse_gspro_data(resp_bytes)]
-        self.shots_and_responses.extend(msgs)
-        self.__logger.info(resp_bytes)
+        for msg in self.decoder.feed(resp_bytes):
+            self.history.record_received(msg)
+        if self.__logger.isEnabledFor(logging.DEBUG):
+            self.__logger.debug(f"received {len(resp_bytes)} bytes: {resp_bytes[:200]!r}")
 
     def send_shot(self, golfshot: Shot):
-        self.__logger.info(f"sending {golfshot=}")
         shot_data = golfshot.as_msg()
-        self.__logger.info(f"---------- {golfshot.ShotNumber} ------------")
-        self.__logger.info(shot_data)
-        self.__logger.info("----------------------------------------------")
-        self.shots_and_responses.append(golfshot)
+        # payloads are only worth logging now and then, and only when debugging
+        if self._sent % PAYLOAD_LOG_EVERY == 0 and self.__logger.isEnabledFor(logging.DEBUG):
+            self.__logger.debug(f"sending shot {golfshot.ShotNumber}: {shot_data!r}")
+        self._sent += 1
+        self.history.record_sent(golfshot)
         nbytes_sent = self.sock.send(shot_data)
 
         if len(shot_data) != nbytes_sent:
             raise ValueError(f"{len(shot_data)=} {nbytes_sent=}")
 
     def data_available(self) -> bool:
-        self.__logger.info(f"checking data avail")
         r, _, _ = select.select([self.sock], [], [], 0)
-        self.__logger.info(f"{r=}")
-        self.__logger.info(f"{self.sock in r=}")
         return self.sock in r
 
     def close(self):
         self.sock.close()
+        self.history.close()
 
-def asdict_ignore_none(obj) -> dict[str, Any]:
-    """Like dataclasses.asdict ignoring keys whose value is None
 
-    :param obj: an instance of a Dataclass
-    :return: a dict without any None values
+class GSProStreamDecoder:
+    """Incrementally frame the stream of JSON objects GSPro Connect sends back
 
-    Examples:
+    GSPro writes its responses back to back without a delimiter and TCP is free to
+    split or merge them across ``recv`` calls, so the decoder keeps whatever is left
+    of an incomplete message for the next ``feed``. Each complete object is decoded
+    in place with a single ``JSONDecoder.raw_decode`` call. An incomplete tail is only
+    retried once a chunk brings in a closing brace, so a message split over many
+    reads is not re-parsed on every one of them.
 
-        assert (
-          asdict_ignore_none(ShotDataOptions())
-          == {'ContainsBallData': True, 'ContainsClubData': False}
-        )
-        assert (
-          asdict_ignore_none(ShotDataOptions(IsHeartbeat=False))
-          == {'ContainsBallData': True, 'ContainsClubData': False, 'IsHeartbeat': False}
-        )
+    Example:
+        decoder = GSProStreamDecoder()
+        decoder.feed(b'{"Code":200,"Message":"Ball Da')  # []
+        decoder.feed(b'ta received","Player":null}{"Co')  # [GSProMessage(Code=200, ...)]
 
     """
 
-    assert is_dataclass(obj)
-    result = dict()
-    for f in fields(obj):
-        val = getattr(obj, f.name)
-        if val is not None:
-            if is_dataclass(val):
-                result[f.name] = asdict_ignore_none(val)
-            else:
-                result[f.name] = val
-    return result
+    # anything longer than this that still doesn't decode is garbage, not a partial message
+    MAX_MESSAGE_SIZE = 64 * 1024
+
+    _NEXT_OBJECT = re.compile(r"\s*")
+    # what may follow a decode error when the message is only cut short
+    _PARTIAL_TAIL = re.compile(r'[^{}\[\]",:]*')
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buf = ""
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered characters belonging to an incomplete message"""
+        return len(self._buf)
+
+    def decode(self, data: bytes) -> list[dict[str, Any]]:
+        """Feed a chunk of bytes, returning the json decoded objects it completed"""
+        text = self._text.decode(data)
+        if self._buf:
+            text = self._buf + text
+            if "}" not in text[len(self._buf) :] and len(text) <= self.MAX_MESSAGE_SIZE:
+                self._buf = text  # can't have completed the pending message
+                return []
+
+        raw_decode = self._raw_decode
+        skip_ws = self._NEXT_OBJECT.match
+        result = []
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if text[pos] != "{":
+                pos = skip_ws(text, pos).end()
+                if pos == end:
+                    break
+                if text[pos] != "{":
+                    pos = self._skip_garbage(text, pos)
+                    continue
+            try:
+                obj, pos = raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if end - pos <= self.MAX_MESSAGE_SIZE and self._incomplete(e):
+                    break  # wait for the rest
+                pos = self._skip_garbage(text, pos + 1)
+                continue
+            result.append(obj)
+
+        self._buf = text[pos:]
+        return result
+
+    def feed(self, data: bytes) -> list[GSProMessage]:
+        """Feed a chunk of bytes, returning the messages it completed"""
+        return [GSProMessage.create_from_dict(dct) for dct in self.decode(data)]
+
+    @classmethod
+    def _incomplete(cls, e: json.JSONDecodeError) -> bool:
+        """
+        Whether decoding failed only because the text ends mid-message: inside a string,
+        or in a token (number, literal, escape) with nothing structural after it. Any
+        other error is a malformed message, and waiting for more data won't fix it.
+        """
+        if e.msg.startswith("Unterminated string"):
+            return True
+        return cls._PARTIAL_TAIL.fullmatch(e.doc, e.pos) is not None
+
+    @staticmethod
+    def _skip_garbage(text: str, pos: int) -> int:
+        """Skip to where the next object starts"""
+        nxt = text.find("{", pos)
+        nxt = len(text) if nxt == -1 else nxt
+        logger.warning(f"skipping unexpected data from gspro: {text[pos:nxt][:200]!r}")
+        return nxt
 
 
 def parse_gspro_data(data: bytes) -> list[dict[str, Any]]:
     """Parse data from gspro into a list of json decoded objects
 
-    :param resp: chunk of data received from gspro
+    :param resp: chunk of data received from gspro, holding whole messages only
     :return: list of json decoded objects
 
+    Use a ``GSProStreamDecoder`` to parse a stream whose messages may be split across reads.
+
     Example:
         data = bytes('{"Code":200,"Message":"Ball Data received","Player":null}{"Code":201,"Message":"GSPro Player Information","Player":{"Handed":"RH","Club":"DR","DistanceToTarget":380.0}}{"Code":202,"Message":"GSPro ready","Player":null}{"Code":203,"Message":"GSPro round ended","Player":null}',
                      encoding="utf8")
@@ -129,25 +174,10 @@ def parse_gspro_data(data: bytes) -> list[dict[str, Any]]:
 
     """
 
-    data = data.decode()  # convert to str
-    len_processed = 0
-    result = []
-
-    while len_processed < len(data):
-        assert data[len_processed] == "{", f"{len_processed=} {data[len_processed]=}"
-        msg = None
-        start = len_processed
-        while msg is None:
-            idx_of_close_bracket = data.find("}", start)
-            substr = data[len_processed: idx_of_close_bracket+1]
-            # print(f"trying {start=} {idx_of_close_bracket=} {substr=}")
-            try:
-                msg = json.loads(substr)
-                # print(f"parsed {len(substr)} bytes {substr=}")
-            except json.decoder.JSONDecodeError:
-                start = start + len(substr)
-        result.append(msg)
-        len_processed = len_processed + len(substr)
+    decoder = GSProStreamDecoder()
+    result = decoder.decode(data)
+    if decoder.pending:
+        raise ValueError(f"incomplete message at end of data ({decoder.pending} characters)")
     return result
 
 
@@ -162,7 +192,8 @@ def test_serialize():
 def test_resp():
     data = bytes(
         '{"Code":200,"Message":"Ball Data received","Player":null}{"Code":201,"Message":"GSPro Player Information","Player":{"Handed":"RH","Club":"DR","DistanceToTarget":380.0}}{"Code":202,"Message":"GSPro ready","Player":null}{"Code":203,"Message":"GSPro round ended","Player":null}',
-        encoding="utf8")
+        encoding="utf8",
+    )
     msgs = parse_gspro_data(data)
     assert len(msgs) == 4
 
@@ -0,0 +1,469 @@
+"""
+SQLite persistence of shots, rollups, insights and sessions.
+
+The database runs in WAL mode, so readers never wait for the writer and the writer
+never waits for readers. Writes go through one writer task: every write queued while
+the previous transaction was committing is committed together in the next one (group
+commit), so a burst of shots, or a backfill, costs one fsync per batch rather than per
+row, while a lone live shot is committed straight away. Reads use a separate pool of
+read-only connections.
+
+The store also keeps what dashboards poll for in memory: every club's shot count and
+latest rollups, loaded once when it opens and updated by each commit, and per club a
+version that each commit touching the club bumps. Versions can back HTTP ETags: they
+are bumped only once a commit is visible to readers, so content read after a version
+is at least as new as that version.
+
+Timestamps are stored as INTEGER microseconds since the Unix epoch (UTC), the layout
+the trend engine's ``ShotFrame.from_rows`` reads directly.
+"""
+
+import asyncio
+import contextlib
+import secrets
+import time
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    event,
+    func,
+    literal_column,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from server.metrics import metrics
+from utils.Logging import Logger
+
+
+logger = Logger(__name__).get_logger()
+
+Row = Mapping[str, Any]
+
+
+def to_micros(dt: datetime) -> int:
+    """Microseconds since the Unix epoch of a datetime, exactly; naive ones are UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    delta = dt - datetime(1970, 1, 1, tzinfo=UTC)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def now_micros() -> int:
+    return to_micros(datetime.now(UTC))
+
+
+metadata = MetaData()
+
+shots = Table(
+    "shots",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("captured_at", Integer, nullable=False),
+    Column("club", String, nullable=False),
+    Column("carry", Float(), nullable=False),
+    Column("offline", Float(), nullable=False),
+    Column("ball_speed", Float(), nullable=False),
+    Column("spin", Integer, nullable=False),
+    Column("launch_angle", Float()),
+    Column("launch_direction", Float()),
+    Column("session_id", String(36)),
+    Column("is_outlier", Boolean, nullable=False, default=False),
+    Column("outlier_reason", String),
+    Column("raw_json", JSON),
+    Column("signature", String),
+    Column("created_at", Integer, nullable=False, default=now_micros),
+    # per-club history in time order, and its windows, without touching the table
+    Index(
+        "ix_shots_club_captured_at",
+        "club",
+        "captured_at",
+        "id",
+        "carry",
+        "offline",
+        "ball_speed",
+        "spin",
+        "is_outlier",
+    ),
+    # (captured_at, id) is the keyset of shot listings
+    Index("ix_shots_captured_at", "captured_at", "id"),
+    Index("ix_shots_session_id", "session_id", "captured_at", "id"),
+    Index("ux_shots_signature", "signature", unique=True),
+)
+
+rollups = Table(
+    "rollups_club_window",
+    metadata,
+    Column("club", String, primary_key=True),
+    Column("window", String, primary_key=True),
+    Column("metric", String, primary_key=True),
+    Column("mean", Float(), nullable=False),
+    Column("sd", Float(), nullable=False),
+    Column("median", Float(), nullable=False),
+    Column("iqr", Float(), nullable=False),
+    Column("n", Integer, nullable=False),
+    Column("updated_at", Integer, nullable=False),
+)
+
+insights = Table(
+    "insights",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("club", String, nullable=False),
+    Column("metric", String, nullable=False),
+    Column("kind", String, nullable=False),
+    Column("window", String, nullable=False),
+    Column("baseline", String, nullable=False),
+    Column("delta", Float(), nullable=False),
+    Column("slope", Float()),
+    Column("ci_low", Float()),
+    Column("ci_high", Float()),
+    Column("p_value", Float(), nullable=False),
+    Column("effect_size", Float(), nullable=False),
+    Column("text", Text, nullable=False),
+    Column("created_at", Integer, nullable=False),
+    Index("ix_insights_club_created_at", "club", "created_at"),
+    Index("ix_insights_created_at", "created_at"),
+)
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("started_at", Integer, nullable=False),
+    Column("ended_at", Integer),
+    Column("notes", Text),
+)
+
+# applied to every connection; NORMAL is durable across crashes in WAL mode, only a
+# power loss can drop the last transactions
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64_000,  # KiB
+    "mmap_size": 256 << 20,
+    "busy_timeout": 5000,  # ms
+    "foreign_keys": "ON",
+}
+
+
+def _statement(table: Table) -> Any:
+    if table is shots:
+        # a shot seen before (same signature or id) is silently skipped, and the ones
+        # inserted are returned to keep the counts
+        return insert(shots).on_conflict_do_nothing().returning(shots.c.id, shots.c.club)
+    if table is rollups:
+        stmt = insert(rollups)
+        updated = {c.name: stmt.excluded[c.name] for c in rollups.c if not c.primary_key}
+        return stmt.on_conflict_do_update(index_elements=["club", "window", "metric"], set_=updated)
+    stmt = insert(table)
+    updated = {c.name: stmt.excluded[c.name] for c in table.c if not c.primary_key}
+    return stmt.on_conflict_do_update(index_elements=["id"], set_=updated)
+
+
+@dataclass
+class _Write:
+    table: Table
+    rows: Sequence[Row]
+    done: asyncio.Future[None] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+    inserted: list[str] = field(default_factory=list[str])  # ids of the shots inserted
+
+
+class ShotStore:
+    """
+    The server's database, a single SQLite file.
+
+    :param path: database file, created with its tables if missing
+    :param read_pool_size: connections available to concurrent reads
+    :param max_batch_rows: rows committed in one transaction at most
+
+    Example:
+
+        async with ShotStore("double-sight.db") as store:
+            await store.add_shots([row])  # returns once committed
+            recent = await store.list_shots(club="7i", limit=25)
+
+    """
+
+    def __init__(self, path: str | Path, *, read_pool_size: int = 4, max_batch_rows: int = 10_000):
+        self.path = Path(path)
+        self.read_pool_size = read_pool_size
+        self.max_batch_rows = max_batch_rows
+        self.commits = 0  # transactions committed by the writer
+        # tells versions of this process apart from those of an earlier one
+        self.epoch = secrets.token_hex(4)
+        self._versions: Counter[str] = Counter()
+        self._version = 0
+        self._counts: Counter[str] = Counter()
+        self._rollups: dict[str, dict[tuple[str, str], dict[str, Any]]] = {}
+        self._queue: asyncio.Queue[_Write | None] = asyncio.Queue()
+        self._writer_engine: AsyncEngine | None = None
+        self._reader_engine: AsyncEngine | None = None
+        self._writer: asyncio.Task[None] | None = None
+
+    def _engine(self, pool_size: int, read_only: bool) -> AsyncEngine:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{self.path}", pool_size=pool_size, max_overflow=0
+        )
+        pragmas = dict(PRAGMAS)
+        if read_only:
+            # the writer sets the (persistent) journal mode
+            del pragmas["journal_mode"]
+            pragmas["query_only"] = "ON"
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _configure(dbapi_connection: Any, _: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+        return engine
+
+    async def open(self) -> None:
+        if self._writer is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer_engine = self._engine(1, read_only=False)
+        self._reader_engine = self._engine(self.read_pool_size, read_only=True)
+        async with self._writer_engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+        self._counts = Counter(await self.club_counts())
+        for row in await self._fetch(select(rollups)):
+            self._rollups.setdefault(row["club"], {})[row["window"], row["metric"]] = row
+        self._writer = asyncio.create_task(self._write_loop(), name="shot-store-writer")
+
+    async def close(self) -> None:
+        """Commit everything queued so far, then close every connection"""
+        if self._writer is not None:
+            await self._queue.put(None)
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer
+            self._writer = None
+        for engine in (self._writer_engine, self._reader_engine):
+            if engine is not None:
+                await engine.dispose()
+
+    async def __aenter__(self) -> "ShotStore":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    # -- writes
+
+    async def _write(self, table: Table, rows: Sequence[Row]) -> list[str]:
+        if not rows:
+            return []
+        if self._writer is None:
+            raise RuntimeError("ShotStore is not open")
+        write = _Write(table, rows)
+        await self._queue.put(write)
+        await write.done
+        return write.inserted
+
+    async def _write_loop(self) -> None:
+        while True:
+            write = await self._queue.get()
+            if write is None:
+                return
+            batch, n_rows, stop = [write], len(write.rows), False
+            # group commit: everything queued meanwhile goes into the same transaction
+            while n_rows < self.max_batch_rows and not self._queue.empty():
+                write = self._queue.get_nowait()
+                if write is None:
+                    stop = True
+                    break
+                batch.append(write)
+                n_rows += len(write.rows)
+            await self._commit(batch)
+            if stop:
+                return
+
+    async def _commit(self, batch: list[_Write]) -> None:
+        assert self._writer_engine is not None
+        start = time.perf_counter()
+        inserted: Counter[str] = Counter()
+        try:
+            async with self._writer_engine.begin() as conn:
+                for write in batch:
+                    result = await conn.execute(_statement(write.table), list(write.rows))
+                    if write.table is shots:
+                        rows = result.all()
+                        write.inserted = [row.id for row in rows]
+                        inserted.update(row.club for row in rows)
+        except Exception as e:
+            if len(batch) > 1:
+                # one bad write must not fail the others it was grouped with
+                for write in batch:
+                    await self._commit([write])
+                return
+            logger.error(
+                f"writing {len(batch[0].rows)} rows to {batch[0].table.name} failed: {e!r}"
+            )
+            if not batch[0].done.done():
+                batch[0].done.set_exception(e)
+            return
+        metrics.observe("persist", time.perf_counter() - start)
+        metrics.inc("db_commits")
+        metrics.inc("db_rows_written", sum(len(write.rows) for write in batch))
+        self.commits += 1
+        self._committed(batch, inserted)
+        for write in batch:
+            if not write.done.done():
+                write.done.set_result(None)
+
+    def _committed(self, batch: list[_Write], inserted: Counter[str]) -> None:
+        """Bring the in-memory state up to date with a commit, then bump versions"""
+        self._counts.update(inserted)
+        touched = set(inserted)
+        for write in batch:
+            if write.table is rollups:
+                for row in write.rows:
+                    club = self._rollups.setdefault(row["club"], {})
+                    club[row["window"], row["metric"]] = dict(row)
+                    touched.add(row["club"])
+            elif write.table is insights:
+                touched.update(row["club"] for row in write.rows)
+        self._versions.update(touched)
+        self._version += 1
+
+    # -- in memory
+
+    def version(self, club: str | None = None) -> int:
+        """Bumped by every commit changing ``club``'s shots, rollups or insights, or by
+        every commit at all without a club"""
+        return self._version if club is None else self._versions[club]
+
+    def shot_counts(self) -> dict[str, int]:
+        """Shots per club"""
+        return {club: n for club, n in self._counts.items() if n}
+
+    def club_rollups(self, club: str) -> list[dict[str, Any]]:
+        """The latest rollups of ``club``, by window and metric"""
+        return list(self._rollups.get(club, {}).values())
+
+    async def add_shots(self, rows: Sequence[Row]) -> list[str]:
+        """Insert shots, skipping any whose id or signature is already stored, returns
+        the ids of those inserted"""
+        return await self._write(shots, rows)
+
+    async def backfill_shots(self, rows: Iterable[Row], chunk_size: int = 10_000) -> int:
+        """Insert a stream of shots in chunks of one transaction each, returns rows sent"""
+        total = 0
+        chunk: list[Row] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                await self.add_shots(chunk)
+                total += len(chunk)
+                chunk = []
+        await self.add_shots(chunk)
+        return total + len(chunk)
+
+    async def put_rollups(self, rows: Sequence[Row]) -> None:
+        """Insert or replace rollups, keyed by (club, window, metric)"""
+        await self._write(rollups, rows)
+
+    async def add_insights(self, rows: Sequence[Row]) -> None:
+        """Insert or replace insights, keyed by id"""
+        await self._write(insights, rows)
+
+    async def put_sessions(self, rows: Sequence[Row]) -> None:
+        """Insert or replace sessions, keyed by id"""
+        await self._write(sessions, rows)
+
+    # -- reads
+
+    async def _fetch(self, stmt: Any) -> list[dict[str, Any]]:
+        if self._reader_engine is None:
+            raise RuntimeError("ShotStore is not open")
+        async with self._reader_engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return [dict(row) for row in result.mappings()]
+
+    async def get_shot(self, shot_id: str) -> dict[str, Any] | None:
+        rows = await self._fetch(select(shots).where(shots.c.id == shot_id))
+        return rows[0] if rows else None
+
+    async def list_shots(
+        self,
+        club: str | None = None,
+        session_id: str | None = None,
+        limit: int = 100,
+        before: tuple[int, str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Most recent shots first, optionally of one club or session.
+
+        :param before: ``(captured_at, id)`` of the last shot of the previous page; the
+            page starts right after it in the index, however deep it is
+        """
+        stmt = select(shots).order_by(shots.c.captured_at.desc(), shots.c.id.desc()).limit(limit)
+        if before is not None:
+            stmt = stmt.where(tuple_(shots.c.captured_at, shots.c.id) < tuple_(*before))
+        if club is not None:
+            stmt = stmt.where(shots.c.club == club)
+        if session_id is not None:
+            stmt = stmt.where(shots.c.session_id == session_id)
+        return await self._fetch(stmt)
+
+    async def count_shots(self, club: str | None = None) -> int:
+        stmt = select(func.count().label("n")).select_from(shots)
+        if club is not None:
+            stmt = stmt.where(shots.c.club == club)
+        rows = await self._fetch(stmt)
+        return rows[0]["n"]
+
+    async def club_counts(self) -> dict[str, int]:
+        """Shots per club, answered from the (club, captured_at) index"""
+        rows = await self._fetch(
+            select(shots.c.club, func.count().label("n")).group_by(shots.c.club)
+        )
+        return {row["club"]: row["n"] for row in rows}
+
+    async def signatures(self, after: int = 0) -> list[tuple[int, str]]:
+        """``(rowid, signature)`` of the shots inserted after rowid ``after``, in order"""
+        rowid = literal_column("rowid", Integer)
+        stmt = select(rowid, shots.c.signature).where(rowid > after).order_by(rowid)
+        rows = await self._fetch(stmt.where(shots.c.signature.is_not(None)))
+        return [(row["rowid"], row["signature"]) for row in rows]
+
+    async def recent_signatures(self, limit: int) -> list[str]:
+        """Signatures of the last ``limit`` shots inserted, oldest first"""
+        rowid = literal_column("rowid", Integer)
+        stmt = select(shots.c.signature).where(shots.c.signature.is_not(None))
+        rows = await self._fetch(stmt.order_by(rowid.desc()).limit(limit))
+        return [row["signature"] for row in reversed(rows)]
+
+    async def get_rollups(self, club: str) -> list[dict[str, Any]]:
+        return await self._fetch(select(rollups).where(rollups.c.club == club))
+
+    async def list_insights(
+        self, club: str | None = None, limit: int = 100
+    ) -> list[dict[str, Any]]:
+        stmt = select(insights).order_by(insights.c.created_at.desc()).limit(limit)
+        if club is not None:
+            stmt = stmt.where(insights.c.club == club)
+        return await self._fetch(stmt)
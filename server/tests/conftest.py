@@ -1,9 +1,36 @@
 """Pytest fixtures for server tests."""
 
-# Placeholder fixture - uncomment when main.py is implemented
-# @pytest.fixture
-# def client() -> TestClient:
-#     """Create a test client for the FastAPI app."""
-#     from fastapi.testclient import TestClient
-#     from server.main import app
-#     return TestClient(app)
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+if TYPE_CHECKING:
+    from server.storage import ShotStore
+
+
+@pytest.fixture
+def app_store(tmp_path: Path) -> "ShotStore":
+    """The store of the app under test, on a fresh database."""
+    from server.storage import ShotStore
+
+    return ShotStore(tmp_path / "shots.db")
+
+
+@pytest.fixture
+def client(app_store: "ShotStore") -> Iterator[TestClient]:
+    """Create a test client for the FastAPI app on ``app_store``, running its lifespan."""
+    from server.main import create_app
+
+    with TestClient(create_app(store=app_store)) as client:
+        yield client
+
+
+@pytest.fixture
+def http(client: TestClient) -> httpx.Client:
+    """The test client as the ``httpx.Client`` it is, so that responses are typed."""
+    return client
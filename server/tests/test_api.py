@@ -0,0 +1,133 @@
+"""REST API tests."""
+
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastapi.testclient import TestClient
+
+from server.storage import ShotStore
+from tests.test_storage import make_shot
+
+
+Row = dict[str, Any]
+
+
+def _add(
+    client: TestClient, write: Callable[[list[Row]], Awaitable[object]], rows: list[Row]
+) -> None:
+    assert client.portal is not None
+    client.portal.call(write, rows)
+
+
+def _rollup(club: str, window: str, metric: str, mean: float) -> Row:
+    return {
+        "club": club,
+        "window": window,
+        "metric": metric,
+        "mean": mean,
+        "sd": 3.0,
+        "median": mean,
+        "iqr": 4.0,
+        "n": 25,
+        "updated_at": 1_700_000_000_000_000,
+    }
+
+
+def test_shots_keyset_pages(client: TestClient, http: httpx.Client, app_store: ShotStore) -> None:
+    """Test that following next_cursor walks every shot once, newest first, ties by id."""
+    rows = [make_shot(i, club="7i" if i % 3 else "Dr") for i in range(30)]
+    rows += [{**make_shot(i), "id": f"tie-{i}", "signature": None} for i in range(5)]
+    for row in rows[30:]:
+        row["captured_at"] = rows[10]["captured_at"]
+    _add(client, app_store.add_shots, rows)
+
+    seen: list[str] = []
+    cursor: str | None = None
+    while True:
+        params: dict[str, Any] = {"limit": 4, "club": "7i"}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = http.get("/api/shots", params=params).json()
+        seen += [s["id"] for s in page["shots"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    expected = sorted(
+        ((r["captured_at"], r["id"]) for r in rows if r["club"] == "7i"), reverse=True
+    )
+    assert seen == [shot_id for _, shot_id in expected]
+
+    assert http.get("/api/shots", params={"cursor": "%%%"}).status_code == 400
+    assert http.get("/api/shots", params={"limit": 0}).status_code == 422
+
+
+def test_etags_follow_club_versions(
+    client: TestClient, http: httpx.Client, app_store: ShotStore
+) -> None:
+    """Test 304s for unchanged listings and stats, and new tags once a club changes."""
+    _add(client, app_store.add_shots, [make_shot(1), make_shot(2, club="Dr")])
+    first = http.get("/api/shots", params={"club": "7i"})
+    tag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+    cached = http.get("/api/shots", params={"club": "7i"}, headers={"If-None-Match": tag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # another club's shot leaves the 7i listing as it was, but not the full one
+    everything = http.get("/api/shots").headers["etag"]
+    _add(client, app_store.add_shots, [make_shot(3, club="Dr")])
+    assert (
+        http.get("/api/shots", params={"club": "7i"}, headers={"If-None-Match": tag}).status_code
+        == 304
+    )
+    assert http.get("/api/shots", headers={"If-None-Match": everything}).status_code == 200
+
+    _add(client, app_store.add_shots, [make_shot(4)])
+    response = http.get(
+        "/api/shots", params={"club": "7i"}, headers={"If-None-Match": f'W/{tag}, "x"'}
+    )
+    assert response.status_code == 200
+    assert [s["id"] for s in response.json()["shots"]] == ["shot-4", "shot-1"]
+
+
+def test_club_stats_from_memory(
+    client: TestClient, http: httpx.Client, app_store: ShotStore
+) -> None:
+    """Test that club stats and counts reflect committed shots and rollups."""
+    _add(client, app_store.add_shots, [make_shot(i) for i in range(3)] + [make_shot(9, club="Dr")])
+    assert http.get("/api/clubs").json() == [
+        {"club": "7i", "shots": 3},
+        {"club": "Dr", "shots": 1},
+    ]
+    assert http.get("/api/clubs/LW/stats").status_code == 404
+
+    stats = http.get("/api/clubs/7i/stats")
+    assert stats.json()["shots"] == 3
+    assert stats.json()["windows"] == {}
+    _add(client, app_store.put_rollups, [_rollup("7i", "last_25", "carry", 151.0)])
+    _add(client, app_store.put_rollups, [_rollup("7i", "last_25", "carry", 152.5)])
+    response = http.get("/api/clubs/7i/stats", headers={"If-None-Match": stats.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["windows"]["last_25"]["carry"] == {
+        "mean": 152.5,
+        "sd": 3.0,
+        "median": 152.5,
+        "iqr": 4.0,
+        "n": 25,
+    }
+    tag = response.headers["etag"]
+    assert http.get("/api/clubs/7i/stats", headers={"If-None-Match": tag}).status_code == 304
+
+
+async def test_state_is_loaded_on_open(tmp_path: Path) -> None:
+    """Test that counts and rollups already stored are known to a reopened store."""
+    async with ShotStore(tmp_path / "shots.db") as store:
+        await store.add_shots([make_shot(1), make_shot(2), make_shot(2)])
+        await store.put_rollups([_rollup("7i", "all_time", "carry", 150.0)])
+        assert store.version("7i") == 2
+    async with ShotStore(tmp_path / "shots.db") as store:
+        assert store.shot_counts() == {"7i": 2}
+        assert store.club_rollups("7i")[0]["mean"] == 150.0
+        assert store.version("7i") == 0
@@ -0,0 +1,124 @@
+"""Async GSPro Connect session tests against a local stand-in GSPro server."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from benchmarks.gspro_stub import GSProStub
+from models.constants import DEVICE_ID
+from models.models import BallData, GSProMessage, Shot
+from server.async_socket import AsyncGSProSession
+
+
+def _shot(number: int) -> Shot:
+    return Shot(
+        ShotNumber=number,
+        BallData=BallData(Speed=140.0, SpinAxis=2.0, TotalSpin=2600.0, HLA=1.0, VLA=12.0),
+    )
+
+
+async def _until(condition, timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+async def gspro() -> AsyncIterator[GSProStub]:
+    async with GSProStub() as stub:
+        yield stub
+
+
+async def test_shots_are_sent_and_responses_delivered(gspro: GSProStub) -> None:
+    """Test that queued shots reach GSPro in order and responses reach subscribers."""
+    received: list[GSProMessage] = []
+    async with AsyncGSProSession(gspro.host, gspro.port) as session:
+        session.subscribe(received.append)
+        for i in range(1, 6):
+            await session.send_shot(_shot(i))
+        await _until(lambda: sum(m.Code == 200 for m in received) == 5)
+
+    assert [s["ShotNumber"] for s in gspro.shots] == [1, 2, 3, 4, 5]
+    assert [m.Code for m in received[:2]] == [201, 202]
+    assert received[0].Player == {"Handed": "RH", "Club": "DR", "DistanceToTarget": 380.0}
+
+
+async def test_shots_queued_before_connecting_are_coalesced(gspro: GSProStub) -> None:
+    """Test that a backlog queued while disconnected goes out once connected."""
+    session = AsyncGSProSession(gspro.host, gspro.port)
+    for i in range(1, 51):
+        session.send_shot_nowait(_shot(i))
+    async with session:
+        await _until(lambda: len(gspro.shots) == 50)
+    assert [s["ShotNumber"] for s in gspro.shots] == list(range(1, 51))
+
+
+async def test_queue_is_bounded() -> None:
+    """Test that the outbound queue rejects shots once full."""
+    session = AsyncGSProSession(queue_size=2)
+    session.send_shot_nowait(_shot(1))
+    session.send_shot_nowait(_shot(2))
+    with pytest.raises(asyncio.QueueFull):
+        session.send_shot_nowait(_shot(3))
+
+
+async def test_heartbeat_when_idle(gspro: GSProStub) -> None:
+    """Test that heartbeats are sent while no shots are, from the session's device."""
+    async with AsyncGSProSession(gspro.host, gspro.port, heartbeat_interval=0.02):
+        await _until(lambda: gspro.heartbeats >= 2)
+    async with AsyncGSProSession(
+        gspro.host, gspro.port, device_id="GC3 7", heartbeat_interval=0.02
+    ):
+        await _until(lambda: len(gspro.heartbeat_devices) == 2)
+    assert gspro.shots == []
+    assert gspro.heartbeat_devices == {DEVICE_ID, "GC3 7"}
+
+
+async def test_reconnects_after_gspro_restart(gspro: GSProStub) -> None:
+    """Test that the session reconnects with backoff when GSPro drops the connection."""
+    async with AsyncGSProSession(gspro.host, gspro.port, reconnect_min=0.01) as session:
+        await session.send_shot(_shot(1))
+        await _until(lambda: len(gspro.shots) == 1)
+
+        gspro.drop_clients()
+        await _until(lambda: gspro.connections == 2)
+        await session.connected.wait()
+        await session.send_shot(_shot(2))
+        await _until(lambda: len(gspro.shots) == 2)
+
+    assert session.reconnects >= 1
+
+
+async def test_unanswered_shots_are_resent_after_reconnect(gspro: GSProStub) -> None:
+    """Test that only the shots GSPro hadn't answered are sent again after a reconnect."""
+    async with AsyncGSProSession(gspro.host, gspro.port, reconnect_min=0.01) as session:
+        await session.send_shot(_shot(1))
+        await _until(lambda: len(gspro.shots) == 1)
+        await _until(lambda: not session._unanswered)  # pyright: ignore[reportPrivateUsage]
+
+        gspro.answer = False
+        await session.send_shot(_shot(2))
+        await _until(lambda: len(gspro.shots) == 2)
+        gspro.answer = True
+        gspro.drop_clients()
+        await _until(lambda: len(gspro.shots) == 3)
+        await session.send_shot(_shot(3))
+        await _until(lambda: len(gspro.shots) == 4)
+
+    assert [s["ShotNumber"] for s in gspro.shots] == [1, 2, 2, 3]
+
+
+async def test_retries_until_gspro_is_up() -> None:
+    """Test that connecting keeps retrying while GSPro isn't listening yet."""
+    stub = GSProStub()
+    await stub.start()
+    port = stub.port
+    await stub.stop()
+
+    async with AsyncGSProSession(stub.host, port, reconnect_min=0.01) as session:
+        await asyncio.sleep(0.05)
+        assert not session.connected.is_set()
+        async with GSProStub(port=port) as gspro:
+            await session.send_shot(_shot(7))
+            await _until(lambda: len(gspro.shots) == 1)
@@ -0,0 +1,123 @@
+"""Checkpoint / resume and historical backfill tests."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic import log_bytes, shot_line
+from parser.backfill import (
+    CheckpointStore,
+    backfill_logs,
+    checkpoint_for,
+    resume_plan,
+)
+from parser.sniffer import sniff_gspro
+
+
+class _Done(Exception):
+    pass
+
+
+def _append_shots(path: Path, *shot_ids: int) -> None:
+    with path.open("ab") as f:
+        for shot_id in shot_ids:
+            f.write(f"noise\n{shot_line(shot_id)}\n".encode())
+
+
+def _sniff_until(log: Path, checkpoint: Path, last_shot: int) -> list[int]:
+    seen: list[int] = []
+
+    def on_shot(shot) -> None:
+        seen.append(shot.ShotNumber)
+        if shot.ShotNumber == last_shot:
+            raise _Done
+
+    with pytest.raises(_Done):
+        sniff_gspro(str(log), str(checkpoint), on_shot)
+    return seen
+
+
+@pytest.fixture
+def log(tmp_path: Path) -> Path:
+    path = tmp_path / "output_log.txt"
+    _append_shots(path, 1, 2)
+    return path
+
+
+def test_checkpoint_store_roundtrip(tmp_path: Path, log: Path) -> None:
+    """Test saving and loading a checkpoint."""
+    store = CheckpointStore(str(tmp_path / "state" / "checkpoint.json"))
+    assert store.load() is None
+    checkpoint = checkpoint_for(str(log), 10)
+    store.save(checkpoint)
+    assert store.load() == checkpoint
+
+
+def test_resume_plan_same_file(log: Path) -> None:
+    """Test that a grown log resumes at the saved offset."""
+    offset = log.stat().st_size
+    checkpoint = checkpoint_for(str(log), offset)
+    _append_shots(log, 3)
+    assert resume_plan(str(log), checkpoint) == [(str(log), offset)]
+    assert resume_plan(str(log), None) == []
+
+
+def test_resume_plan_rewritten(log: Path) -> None:
+    """Test that a rewritten log is read from the top."""
+    checkpoint = checkpoint_for(str(log), log.stat().st_size)
+    log.unlink()
+    log.write_bytes(b"GSPro restarted\n")
+    assert resume_plan(str(log), checkpoint) == [(str(log), 0)]
+
+
+def test_resume_plan_rotated(log: Path) -> None:
+    """Test that a rotated log is drained before the new one is read."""
+    offset = log.stat().st_size
+    checkpoint = checkpoint_for(str(log), offset)
+    rotated = log.with_name("output_log-prev.txt")
+    log.rename(rotated)
+    log.write_bytes(b"GSPro restarted\n")
+    assert resume_plan(str(log), checkpoint) == [(str(rotated), offset), (str(log), 0)]
+
+
+def test_sniffer_resumes_without_loss_or_duplicates(tmp_path: Path, log: Path) -> None:
+    """Test that shots written while the sniffer was down are delivered exactly once."""
+    checkpoint = tmp_path / "checkpoint.json"
+    CheckpointStore(str(checkpoint)).save(checkpoint_for(str(log), log.stat().st_size))
+
+    _append_shots(log, 3, 4)
+    assert _sniff_until(log, checkpoint, last_shot=4) == [3, 4]
+
+
+def test_sniffer_drains_rotated_log(tmp_path: Path, log: Path) -> None:
+    """Test resuming across a GSPro restart that rotated the log."""
+    checkpoint = tmp_path / "checkpoint.json"
+    CheckpointStore(str(checkpoint)).save(checkpoint_for(str(log), log.stat().st_size))
+
+    _append_shots(log, 3)
+    log.rename(log.with_name("output_log-prev.txt"))
+    _append_shots(log, 1)
+    assert _sniff_until(log, checkpoint, last_shot=1) == [3, 1]
+    # saved once the rotated log was drained, before the live one was delivered
+    saved = CheckpointStore(str(checkpoint)).load()
+    assert saved is not None
+    assert (saved.path, saved.offset) == (str(log), 0)
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_backfill_logs(tmp_path: Path, max_workers: int) -> None:
+    """Test parallel backfill splits logs into ranges and returns per-run streams."""
+    first = tmp_path / "a.txt"
+    first.write_bytes(log_bytes(40, noise_per_shot=30) + log_bytes(5, noise_per_shot=30))
+    second = tmp_path / "b.txt"
+    second.write_bytes(log_bytes(10, noise_per_shot=30, seed=1, first_id=100))
+    os.utime(first, (1_000, 1_000))
+
+    streams = backfill_logs([str(second), str(first)], max_workers, split_bytes=4096)
+
+    assert [[s.ShotNumber for s in stream] for stream in streams] == [
+        list(range(1, 41)),
+        list(range(1, 6)),
+        list(range(100, 110)),
+    ]
@@ -0,0 +1,214 @@
+"""Multi-bay ingest tests."""
+
+import asyncio
+import json
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server.bays
+from benchmarks.gspro_stub import GSProStub
+from benchmarks.synthetic import shot_line
+from models.models import Shot
+from parser.backfill import CheckpointStore, checkpoint_for
+from parser.tailer import LogTailer
+from server import main
+from server.bays import Bay, BaySource, BaySupervisor, _read, load_bays
+from server.main import create_app
+from server.storage import ShotStore
+
+
+def _append_shots(path: Path, *shot_ids: int) -> None:
+    with path.open("ab") as f:
+        for shot_id in shot_ids:
+            f.write(f"noise\n{shot_line(shot_id)}\n".encode())
+
+
+async def _until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+def test_load_bays(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test reading a facility config, with variables expanded and bay ids unique."""
+    monkeypatch.setenv("BAYS_DIR", str(tmp_path))
+    config = tmp_path / "bays.json"
+    entries = [
+        {"bay_id": "1", "log_path": "$BAYS_DIR/1.txt", "device_id": "GC3 1"},
+        {"bay_id": "2", "log_path": "$BAYS_DIR/2.txt", "gspro_host": "10.0.0.2"},
+    ]
+    config.write_text(json.dumps(entries))
+    bays = load_bays(config)
+    assert bays[0] == BaySource("1", str(tmp_path / "1.txt"), device_id="GC3 1")
+    assert (bays[1].gspro_host, bays[1].gspro_port) == ("10.0.0.2", 921)
+
+    config.write_text(json.dumps(entries + entries[:1]))
+    with pytest.raises(ValueError, match="duplicate bay ids"):
+        load_bays(config)
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+async def test_bays_are_followed_and_tagged(tmp_path: Path, use_inotify: bool) -> None:
+    """Test that every bay's shots arrive tagged with their bay, device and session."""
+    logs = {bay_id: tmp_path / f"bay-{bay_id}.txt" for bay_id in ("a", "b", "c")}
+    for log in logs.values():
+        log.write_bytes(b"old noise\n")
+    sources = [
+        BaySource(bay_id, str(log), device_id=f"GC3 {bay_id}") for bay_id, log in logs.items()
+    ]
+    seen: list[tuple[str, str, int, str]] = []
+
+    def on_shot(bay: Bay, shot: Shot) -> None:
+        seen.append((bay.bay_id, shot.DeviceID, shot.ShotNumber, bay.session_id))
+
+    async with BaySupervisor(sources, on_shot, workers=2, use_inotify=use_inotify) as bays:
+        await asyncio.sleep(0.05)
+        for shot_id in range(1, 4):
+            for log in logs.values():
+                _append_shots(log, shot_id)
+        await _until(lambda: len(seen) == 9)
+        snapshot = {bay["bay_id"]: bay for bay in bays.snapshot()}
+
+    assert sorted((bay, device, n) for bay, device, n, _ in seen) == [
+        (bay_id, f"GC3 {bay_id}", n) for bay_id in "abc" for n in (1, 2, 3)
+    ]
+    assert len({(bay, session) for bay, _, _, session in seen}) == 3
+    assert snapshot["b"]["shots"] == 3
+    assert snapshot["b"]["lag_bytes"] == 0
+    assert not snapshot["b"]["stalled"]
+
+
+async def test_a_stuck_bay_does_not_stall_the_others(tmp_path: Path) -> None:
+    """Test that a bay blocked downstream, or failing, leaves the other bays running."""
+    stuck, live = tmp_path / "stuck.txt", tmp_path / "live.txt"
+    for log in (stuck, live):
+        log.write_bytes(b"")
+    sources = [
+        BaySource("stuck", str(stuck)),
+        BaySource("missing", str(tmp_path / "missing.txt")),
+        BaySource("live", str(live)),
+    ]
+    never = asyncio.Event()
+    seen: list[int] = []
+
+    async def on_shot(bay: Bay, shot: Shot) -> None:
+        if bay.bay_id == "stuck":
+            await never.wait()
+        seen.append(shot.ShotNumber)
+
+    async with BaySupervisor(sources, on_shot, workers=1) as bays:
+        await asyncio.sleep(0.05)
+        _append_shots(stuck, 1)
+        await asyncio.sleep(0.05)
+        _append_shots(live, 2, 3)
+        await _until(lambda: seen == [2, 3])
+        snapshot = {bay["bay_id"]: bay for bay in bays.snapshot()}
+    assert snapshot["missing"]["errors"] >= 1
+    assert snapshot["live"]["shots"] == 2
+
+
+async def test_hung_reads_do_not_take_the_pool(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that reads hung on every worker leave the other bays reading."""
+    logs = {bay_id: tmp_path / f"{bay_id}.txt" for bay_id in ("hung-1", "hung-2", "live")}
+    for log in logs.values():
+        log.write_bytes(b"")
+    release = threading.Event()
+
+    def read(tailer: LogTailer) -> tuple[int, list[Shot], int, float, float]:
+        if Path(tailer.path).stem.startswith("hung"):
+            release.wait()
+        return _read(tailer)
+
+    monkeypatch.setattr(server.bays, "_read", read)
+    seen: list[int] = []
+    sources = [BaySource(bay_id, str(log)) for bay_id, log in logs.items()]
+    bays = BaySupervisor(
+        sources, lambda _, shot: seen.append(shot.ShotNumber), workers=2, stall_after=0.05
+    )
+    try:
+        async with bays:
+
+            def stalled() -> set[str]:
+                return {bay["bay_id"] for bay in bays.snapshot() if bay["stalled"]}
+
+            await _until(lambda: stalled() == {"hung-1", "hung-2"})
+            await asyncio.sleep(0.05)
+            _append_shots(logs["live"], 1, 2)
+            await _until(lambda: seen == [1, 2])
+            assert stalled() == {"hung-1", "hung-2"}
+    finally:
+        release.set()
+
+
+async def test_shots_are_forwarded_to_their_bays_gspro(tmp_path: Path) -> None:
+    """Test that each bay sends its shots to its own GSPro, with its own device id."""
+    async with GSProStub() as gspro_1, GSProStub() as gspro_2:
+        sources = []
+        for bay_id, gspro in (("1", gspro_1), ("2", gspro_2)):
+            log = tmp_path / f"bay-{bay_id}.txt"
+            log.write_bytes(b"")
+            sources.append(
+                BaySource(
+                    bay_id, str(log), f"GC3 {bay_id}", gspro_host=gspro.host, gspro_port=gspro.port
+                )
+            )
+        async with BaySupervisor(sources) as bays:
+            await asyncio.sleep(0.05)
+            _append_shots(tmp_path / "bay-1.txt", 1, 2)
+            _append_shots(tmp_path / "bay-2.txt", 7)
+            await _until(lambda: len(gspro_1.shots) == 2 and len(gspro_2.shots) == 1)
+            assert all(bay["gspro_connected"] for bay in bays.snapshot())
+    assert [(s["DeviceID"], s["ShotNumber"]) for s in gspro_1.shots] == [("GC3 1", 1), ("GC3 1", 2)]
+    assert [(s["DeviceID"], s["ShotNumber"]) for s in gspro_2.shots] == [("GC3 2", 7)]
+
+
+async def test_bay_checkpoints_after_draining_rotated_log(tmp_path: Path) -> None:
+    """Test that a bay resuming across a rotated log checkpoints once it is drained."""
+    log, checkpoint = tmp_path / "output_log.txt", tmp_path / "1.json"
+    _append_shots(log, 1)
+    CheckpointStore(str(checkpoint)).save(checkpoint_for(str(log), log.stat().st_size))
+    _append_shots(log, 2)
+    log.rename(tmp_path / "output_log-prev.txt")
+    _append_shots(log, 3)
+    saved: dict[int, tuple[str, int]] = {}
+
+    def on_shot(_: Bay, shot: Shot) -> None:
+        current = CheckpointStore(str(checkpoint)).load()
+        assert current is not None
+        saved[shot.ShotNumber] = (current.path, current.offset)
+
+    source = BaySource("1", str(log), checkpoint_path=str(checkpoint))
+    async with BaySupervisor([source], on_shot):
+        await _until(lambda: 3 in saved)
+    # saved once the rotated log was drained, before the live one was delivered
+    assert saved[3] == (str(log), 0)
+
+
+def test_bays_endpoint(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the app runs its bays, resuming from their checkpoints, at /api/bays."""
+    log = tmp_path / "bay-1.txt"
+    _append_shots(log, 1)
+    CheckpointStore(str(tmp_path / "1.json")).save(checkpoint_for(str(log), log.stat().st_size))
+    bays = BaySupervisor([BaySource("1", str(log), checkpoint_path=str(tmp_path / "1.json"))])
+    app = create_app(store=ShotStore(tmp_path / "shots.db"), bays=bays)
+    with TestClient(app) as client:
+        _append_shots(log, 2)
+        assert client.portal is not None
+        client.portal.call(_until, lambda: bays.bays["1"].stats.shots == 1)
+        [bay] = client.get("/api/bays").json()
+        assert (bay["bay_id"], bay["shots"], bay["gspro_connected"]) == ("1", 1, False)
+    assert json.loads((tmp_path / "1.json").read_text())["offset"] == log.stat().st_size
+
+    # the default app follows no bays, the server follows those BAYS_PATH lists
+    assert main.app.state.bays is None
+    assert main.server_app() is main.app
+    config = tmp_path / "bays.json"
+    config.write_text(json.dumps([{"bay_id": "1", "log_path": str(log)}]))
+    monkeypatch.setattr(main, "BAYS_PATH", str(config))
+    assert list(main.server_app().state.bays.bays) == ["1"]
@@ -0,0 +1,170 @@
+"""WebSocket broadcast hub tests."""
+
+import asyncio
+import json
+from typing import Any, cast
+
+from fastapi.testclient import TestClient
+
+from server.broadcast import BroadcastHub, Message, Topics
+from tests.test_storage import make_shot
+
+
+class _Recorder:
+    """A client ``send`` that records frames, optionally blocking until released"""
+
+    def __init__(self, blocked: bool = False) -> None:
+        self.frames: list[Message] = []
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def __call__(self, message: Message) -> None:
+        await self.release.wait()
+        self.frames.append(message)
+
+    def payloads(self) -> list[dict[str, Any]]:
+        return [json.loads(m["text"]) for m in self.frames]
+
+
+async def _drain() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _shot(i: int, club: str = "7i", session_id: str | None = "s1") -> dict[str, Any]:
+    return {**make_shot(i, club, session_id), "id": str(i)}
+
+
+async def test_events_are_serialized_once_and_filtered() -> None:
+    """Test that matching clients share one frame per event and others get none."""
+    async with BroadcastHub(clock=lambda: 12.5) as hub:
+        everyone, seven_iron, other_session = _Recorder(), _Recorder(), _Recorder()
+        hub.connect(everyone)
+        hub.connect(seven_iron, Topics.parse(["7i"]))
+        hub.connect(other_session, Topics.parse(None, "s2"))
+
+        assert hub.publish_shot(_shot(1)) == 2
+        assert hub.publish_shot(_shot(2, club="DR")) == 1
+        await _drain()
+
+    assert everyone.frames[0] is seven_iron.frames[0]
+    first, second = everyone.payloads()
+    # the client's Shot, as the REST listing serializes it
+    assert first == {
+        "type": "shot",
+        "ts": 12500,
+        "shot": {
+            "id": "1",
+            "captured_at": "2023-11-14T22:14:20Z",
+            "club": "7i",
+            "metrics": {
+                "carry": 151.0,
+                "offline": -2.0,
+                "ball_speed": 110.0,
+                "spin": 6001,
+                "launch_angle": 18.0,
+                "launch_direction": None,
+            },
+            "session_id": "s1",
+            "is_outlier": False,
+        },
+    }
+    assert (second["shot"]["id"], second["shot"]["club"]) == ("2", "DR")
+    assert len(seven_iron.frames) == 1
+    assert other_session.frames == []
+
+
+async def test_insights_are_batched_per_client() -> None:
+    """Test that insights published together arrive as one frame per client."""
+    async with BroadcastHub() as hub:
+        everyone, driver, nobody = _Recorder(), _Recorder(), _Recorder()
+        hub.connect(everyone)
+        hub.connect(driver, Topics.parse(["DR"]))
+        hub.connect(nobody, Topics.parse(["PW"]))
+        insights = [{"id": "a", "club": "7i"}, {"id": "b", "club": "DR"}]
+        assert hub.publish_insights(insights) == 2
+        assert hub.publish_insights([]) == 0
+        await _drain()
+
+    (frame,) = everyone.payloads()
+    assert frame["type"] == "insights"
+    assert [i["id"] for i in frame["insights"]] == ["a", "b"]
+    assert [i["id"] for i in driver.payloads()[0]["insights"]] == ["b"]
+    assert nobody.frames == []
+
+
+async def test_slow_client_coalesces_shots_without_blocking() -> None:
+    """Test that a stalled client keeps only its latest shots and never blocks others."""
+    async with BroadcastHub(max_pending_shots=3) as hub:
+        slow, fast = _Recorder(blocked=True), _Recorder()
+        slow_client = hub.connect(slow)
+        hub.connect(fast)
+        for i in range(100):
+            hub.publish_shot(_shot(i))
+            if i == 50:
+                hub.publish_insights([{"id": "kept", "club": "7i"}])
+            await asyncio.sleep(0)
+        assert len(fast.frames) == 101
+
+        slow.release.set()
+        await _drain()
+
+    ids = [
+        p["shot"]["id"] if p["type"] == "shot" else p["insights"][0]["id"] for p in slow.payloads()
+    ]
+    # the first shot was already being sent when the client stalled
+    assert ids == ["0", "kept", "97", "98", "99"]
+    assert slow_client.dropped == 96
+
+
+async def test_client_that_cannot_keep_up_is_dropped() -> None:
+    """Test that a client whose queue overflows with insights is disconnected."""
+    async with BroadcastHub(queue_size=4) as hub:
+        stuck = _Recorder(blocked=True)
+        client = hub.connect(stuck)
+        for i in range(6):
+            hub.publish_insights([{"id": str(i), "club": "7i"}])
+            await asyncio.sleep(0)
+        assert client not in hub.clients
+        assert hub.disconnected_slow == 1
+        await asyncio.wait_for(client.closed.wait(), 1)
+
+
+async def test_heartbeat_pings() -> None:
+    """Test that every client is pinged every heartbeat interval."""
+    async with BroadcastHub(heartbeat_interval=0.01) as hub:
+        recorder = _Recorder()
+        hub.connect(recorder)
+        await asyncio.sleep(0.05)
+    assert len(recorder.frames) >= 2
+    assert {p["type"] for p in recorder.payloads()} == {"ping"}
+
+
+async def test_failed_send_closes_client() -> None:
+    """Test that a client whose connection is gone stops its sender."""
+
+    async def broken(_: Message) -> None:
+        raise ConnectionResetError
+
+    async with BroadcastHub() as hub:
+        client = hub.connect(broken)
+        hub.publish_shot(_shot(1))
+        await asyncio.wait_for(client.closed.wait(), 1)
+
+
+def test_websocket_endpoint(client: TestClient) -> None:
+    """Test that /ws clients receive the events of their topics and can change them."""
+    hub = cast("BroadcastHub", client.app.state.hub)  # type: ignore[attr-defined]
+    with client.websocket_connect("/ws?club=7i") as ws:
+        client.portal.call(lambda: asyncio.sleep(0.01))  # type: ignore[union-attr]
+        assert len(hub.clients) == 1
+        client.portal.call(hub.publish_shot, _shot(1, club="DR"))  # type: ignore[union-attr]
+        client.portal.call(hub.publish_shot, _shot(2))  # type: ignore[union-attr]
+        assert ws.receive_json()["shot"]["id"] == "2"
+
+        ws.send_text("not json")
+        ws.send_json({"clubs": ["DR"]})
+        client.portal.call(lambda: asyncio.sleep(0.01))  # type: ignore[union-attr]
+        client.portal.call(hub.publish_shot, _shot(3, club="DR"))  # type: ignore[union-attr]
+        assert ws.receive_json()["shot"]["id"] == "3"
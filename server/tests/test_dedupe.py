@@ -0,0 +1,163 @@
+"""Shot de-duplication tests."""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from models.models import BallData, Shot
+from server.dedupe import BloomFilter, DedupeIndex, Verdict, signature
+from server.ingest import ShotIngest, shot_row
+from server.storage import ShotStore
+
+
+def _ball(i: int) -> BallData:
+    return BallData(Speed=100.0 + i / 10, SpinAxis=-2.5, TotalSpin=6000 + i, HLA=1.25, VLA=18.0)
+
+
+def _row(i: int) -> dict[str, Any]:
+    return shot_row(Shot(BallData=_ball(i)), club="7i", carry=150.0, offline=-2.0)
+
+
+def test_signature_is_canonical() -> None:
+    """Test that a signature only depends on ball data at the log's 2 decimals."""
+    ball = BallData(Speed=145.2, SpinAxis=0.0, TotalSpin=2650, HLA=1.2, VLA=12.3)
+    same = BallData(Speed=145.2049, SpinAxis=-0.001, TotalSpin=2650.0, HLA=1.20, VLA=12.3)
+    assert signature(ball) == signature(same)
+    assert signature(ball) != signature(BallData(145.21, 0.0, 2650, 1.2, 12.3))
+    assert signature(ball) != signature(BallData(145.2, 0.0, 2650, 12.3, 1.2))
+    assert len(signature(ball)) == 32
+
+
+def test_bloom_filter_round_trip(tmp_path: Path) -> None:
+    """Test no false negatives, a bounded false positive rate and save/load."""
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"in-{i}")
+    assert all(f"in-{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"out-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+    bloom.save(tmp_path / "shots.bloom", watermark=42)
+    loaded = BloomFilter.load(tmp_path / "shots.bloom")
+    assert loaded is not None
+    assert loaded[1] == 42
+    assert loaded[0].bits == bloom.bits
+    assert BloomFilter.load(tmp_path / "missing.bloom") is None
+    (tmp_path / "bad.bloom").write_bytes(b"DSB1")
+    assert BloomFilter.load(tmp_path / "bad.bloom") is None
+
+
+async def test_index_warms_from_store_and_filter(tmp_path: Path) -> None:
+    """Test verdicts, and that a saved filter only catches up from its watermark."""
+    path = tmp_path / "shots.bloom"
+    async with ShotStore(tmp_path / "shots.db") as store:
+        await store.add_shots([_row(i) for i in range(10)])
+        index = DedupeIndex(path, recent=4)
+        await index.warm(store)
+        assert index.watermark == 10
+        assert len(index) == 4
+        assert index.check(_row(9)["signature"]) is Verdict.DUPLICATE
+        assert index.check(_row(0)["signature"]) is Verdict.MAYBE
+        assert index.check(_row(10)["signature"]) is Verdict.NEW
+        await index.save(store)
+
+        await store.add_shots([_row(10)])
+        reopened = DedupeIndex(path, recent=4)
+        await reopened.warm(store)
+        assert reopened.watermark == 11
+        assert await reopened.sync(store) == 0
+        assert reopened.check(_row(10)["signature"]) is Verdict.DUPLICATE
+
+
+async def test_replay_inserts_nothing_twice(tmp_path: Path) -> None:
+    """Test that replaying shots, live or as a backfill, stores each once."""
+    async with (
+        ShotStore(tmp_path / "shots.db") as store,
+        ShotIngest(store, DedupeIndex(recent=5)) as ingest,
+    ):
+        assert await ingest.add(_row(1))
+        assert not await ingest.add(_row(1))
+        # an old shot, out of the recent set, is still found by the database
+        assert await ingest.backfill((_row(i) for i in range(20)), chunk_size=7) == 19
+        assert not await ingest.add(_row(3))
+        assert await ingest.backfill(_row(i) for i in range(25)) == 5
+        assert store.shot_counts() == {"7i": 25}
+        assert (ingest.accepted, ingest.duplicates) == (25, 23)
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.sent: list[Shot] = []
+        self.full = False
+
+    def send_shot_nowait(self, shot: Shot) -> None:
+        if self.full:
+            raise asyncio.QueueFull
+        self.sent.append(shot)
+
+
+async def test_only_new_shots_are_forwarded(tmp_path: Path) -> None:
+    """Test that shots are forwarded to GSPro once, old ones only after their insert."""
+    session = _Session()
+    async with ShotStore(tmp_path / "shots.db") as store:
+        await store.add_shots([_row(1)])
+        ingest = ShotIngest(store, DedupeIndex(recent=0), session=session)  # type: ignore[arg-type]
+        async with ingest:
+            results = [await ingest.add(_row(i), Shot(BallData=_ball(i))) for i in (1, 2, 2)]
+    assert results == [False, True, False]
+    assert session.sent == [Shot(BallData=_ball(2))]
+
+
+async def test_failed_shots_are_not_claimed(tmp_path: Path) -> None:
+    """Test that a shot that fails to be forwarded or stored can be ingested again."""
+    session = _Session()
+    async with ShotStore(tmp_path / "shots.db") as store:
+        ingest = ShotIngest(store, DedupeIndex(), session=session)  # type: ignore[arg-type]
+        async with ingest:
+            session.full = True
+            with pytest.raises(asyncio.QueueFull):
+                await ingest.add(_row(1), Shot(BallData=_ball(1)))
+            session.full = False
+            assert await ingest.add(_row(1), Shot(BallData=_ball(1)))
+
+            add_shots = store.add_shots
+            store.add_shots = AsyncMock(side_effect=sqlite3.OperationalError("disk I/O error"))
+            with pytest.raises(sqlite3.OperationalError):
+                await ingest.backfill(_row(i) for i in range(2, 5))
+            store.add_shots = add_shots
+            assert await ingest.backfill(_row(i) for i in range(1, 5)) == 3
+        assert store.shot_counts() == {"7i": 4}
+
+
+def test_post_shot(http: httpx.Client) -> None:
+    """Test that a posted shot is stored once, then answered with a 409."""
+    body = {
+        "club": "Dr",
+        "carry": 250.0,
+        "offline": 4.0,
+        "ball": {"Speed": 160.0, "SpinAxis": 1.5, "TotalSpin": 2400, "HLA": 0.5, "VLA": 11.0},
+    }
+    response = http.post("/api/shots", json=body)
+    assert response.status_code == 201
+    assert response.json()["signature"] == signature(BallData(160.0, 1.5, 2400, 0.5, 11.0))
+    assert http.post("/api/shots", json={**body, "club": "3w"}).status_code == 409
+    assert http.get("/api/clubs").json() == [{"club": "Dr", "shots": 1}]
+
+
+def test_post_shot_naive_time_is_utc(http: httpx.Client) -> None:
+    """Test that a posted shot's naive captured_at is taken as UTC."""
+    body = {
+        "club": "7i",
+        "carry": 150.0,
+        "offline": -1.0,
+        "ball": {"Speed": 110.0, "SpinAxis": 0.5, "TotalSpin": 6500, "HLA": 0.0, "VLA": 18.0},
+        "captured_at": "2026-01-01T10:00:00",
+    }
+    assert http.post("/api/shots", json=body).status_code == 201
+    [shot] = http.get("/api/shots").json()["shots"]
+    assert shot["captured_at"] == "2026-01-01T10:00:00Z"
@@ -0,0 +1,147 @@
+"""Shot/response history tests."""
+
+import asyncio
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from benchmarks.gspro_stub import GSProStub
+from models.models import BallData, GSProMessage, Shot
+from server.async_socket import AsyncGSProSession
+from server.history import RECEIVED, SENT, SENT_HEARTBEAT, SENT_SHOT, ShotHistory, read_spilled
+from server.socket import GSProSession
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _shot(number: int) -> Shot:
+    return Shot(
+        ShotNumber=number,
+        BallData=BallData(Speed=140.0, SpinAxis=2.0, TotalSpin=2600.0, HLA=1.0, VLA=12.0),
+    )
+
+
+def test_ring_buffer_keeps_most_recent() -> None:
+    """Test that the history never grows past its capacity."""
+    history = ShotHistory(capacity=3)
+    for i in range(5):
+        history.record_sent(_shot(i))
+    history.record_sent(Shot.heartbeat())
+
+    assert len(history) == 3
+    assert history.count == 6
+    assert [(r.direction, r.code, r.shot_number) for r in history.records()] == [
+        (SENT, SENT_SHOT, 3),
+        (SENT, SENT_SHOT, 4),
+        (SENT, SENT_HEARTBEAT, -1),
+    ]
+    with pytest.raises(ValueError):
+        ShotHistory(capacity=0)
+
+
+def test_overflow_spills_to_disk(tmp_path: Path) -> None:
+    """Test that overwritten records are appended to the spill file."""
+    spill = tmp_path / "history.bin"
+    history = ShotHistory(capacity=2, spill_path=str(spill))
+    for i in range(5):
+        history.record_sent(_shot(i))
+    history.close()
+
+    assert [r.shot_number for r in read_spilled(str(spill))] == [0, 1, 2]
+    assert [r.shot_number for r in history.records()] == [3, 4]
+
+
+def test_round_trip_latency() -> None:
+    """Test pairing shots with Code 200 responses, ignoring heartbeats and other codes."""
+    clock = _Clock()
+    history = ShotHistory(capacity=8, clock=clock)
+    history.record_sent(_shot(1))
+    history.record_sent(Shot.heartbeat())
+    clock.now = 0.010
+    history.record_sent(_shot(2))
+    clock.now = 0.015
+    history.record_received(GSProMessage(Code=200))
+    clock.now = 0.030
+    history.record_received(GSProMessage(Code=202))
+    history.record_received(GSProMessage(Code=200))
+
+    assert history.latencies() == pytest.approx([0.015, 0.020])
+    assert history.latencies(last=1) == pytest.approx([0.020])
+    summary = history.latency_summary()
+    assert summary["count"] == 2
+    assert summary["max"] == pytest.approx(0.020)
+    assert ShotHistory().latency_summary() == {"count": 0}
+    assert [r.direction for r in history.records()][-1] == RECEIVED
+
+
+def test_latency_pairing_survives_lost_answers() -> None:
+    """Test that failures, reconnects and resends keep later shots paired with their answer."""
+    clock = _Clock()
+    history = ShotHistory(capacity=8, clock=clock)
+    history.record_sent(_shot(1))
+    clock.now = 0.010
+    history.record_received(GSProMessage(Code=501))  # shot 1 failed, no latency
+    history.record_sent(_shot(2))
+    history.record_sent(_shot(3))
+    history.clear_pending()  # connection lost, neither answered
+
+    clock.now = 1.0
+    history.record_sent(_shot(3), resent=True)
+    clock.now = 1.5
+    history.record_sent(_shot(4))
+    clock.now = 1.6
+    history.record_received(GSProMessage(Code=200))
+    history.record_received(GSProMessage(Code=200))
+
+    assert history.latencies() == pytest.approx([0.6, 0.1])
+    assert [r.shot_number for r in history.records() if r.direction == SENT] == [1, 2, 3, 4]
+
+
+async def test_async_session_records_latency() -> None:
+    """Test that the async session records traffic and round trips."""
+    async with GSProStub() as gspro, AsyncGSProSession(gspro.host, gspro.port) as session:
+        await session.send_shot(_shot(1))
+        async with asyncio.timeout(2):
+            while not session.history.latencies():
+                await asyncio.sleep(0.005)
+    assert session.history.latency_summary()["count"] == 1
+
+
+async def test_async_session_closes_its_history(tmp_path: Path) -> None:
+    """Test that closing the session closes the history's spill file."""
+    history = ShotHistory(capacity=1, spill_path=str(tmp_path / "spill.bin"))
+    async with GSProStub() as gspro, AsyncGSProSession(gspro.host, gspro.port, history=history):
+        pass
+    assert history._spill is None  # pyright: ignore[reportPrivateUsage]
+
+
+@pytest.fixture
+def threaded_gspro() -> Iterator[GSProStub]:
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    stub = asyncio.run_coroutine_threadsafe(GSProStub(greeting=False).start(), loop).result()
+    yield stub
+    asyncio.run_coroutine_threadsafe(stub.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_blocking_session_records_history(threaded_gspro: GSProStub) -> None:
+    """Test the blocking session against the stand-in server."""
+    session = GSProSession(threaded_gspro.host, threaded_gspro.port)
+    session.send_shot(_shot(1))
+    session.send_heartbeat()
+    session.recv_data()
+    session.close()
+
+    assert [r.direction for r in session.history.records()] == [SENT, SENT, RECEIVED]
+    assert session.history.latency_summary()["count"] == 1
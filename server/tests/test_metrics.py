@@ -0,0 +1,79 @@
+"""Pipeline metrics tests."""
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server.broadcast import BroadcastHub
+from server.main import create_app
+from server.metrics import STAGES, Histogram, Metrics, metrics
+from server.storage import ShotStore
+
+
+def test_histogram_buckets_and_quantiles() -> None:
+    """Test bucketing at the bounds and quantiles interpolated within buckets."""
+    h = Histogram((0.001, 0.01, 0.1))
+    for value in (0.0005, 0.001, 0.002, 0.004, 0.5):
+        h.observe(value)
+    assert h.counts == [2, 2, 0, 1]
+    assert (h.count, h.sum) == (5, pytest.approx(0.5075))
+    assert h.quantile(0.2) == pytest.approx(0.0005)
+    assert h.quantile(0.6) == pytest.approx(0.001 + 0.009 / 2)
+    assert h.quantile(0.99) == 0.1
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_spans_and_counters() -> None:
+    """Test that spans land in their stage and counters add up."""
+    registry = Metrics()
+    assert tuple(registry.stages) == STAGES
+    with registry.span("parse"):
+        pass
+    registry.observe("gspro", 0.002)
+    registry.inc("shots_parsed", 3)
+    registry.inc("shots_parsed")
+
+    snapshot = registry.snapshot()
+    assert snapshot["stages"]["parse"]["count"] == 1
+    assert snapshot["stages"]["parse"]["p50_ms"] < 0.05
+    assert snapshot["stages"]["gspro"]["mean_ms"] == pytest.approx(2.0)
+    assert snapshot["counters"] == {"shots_parsed": 4}
+    registry.reset()
+    assert registry.snapshot()["stages"]["gspro"]["count"] == 0
+
+
+def test_prometheus_endpoint(tmp_path: Path) -> None:
+    """Test the text exposition of histograms and counters, and the JSON snapshot."""
+    registry = Metrics(stages=("persist",), bounds=(0.001, 0.01))
+    registry.observe("persist", 0.005)
+    registry.inc("db_commits", 2)
+    app = create_app(registry=registry, store=ShotStore(tmp_path / "shots.db"))
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert response.text.splitlines()[2:] == [
+            'double_sight_stage_seconds_bucket{stage="persist",le="0.001"} 0',
+            'double_sight_stage_seconds_bucket{stage="persist",le="0.01"} 1',
+            'double_sight_stage_seconds_bucket{stage="persist",le="+Inf"} 1',
+            'double_sight_stage_seconds_sum{stage="persist"} 0.005',
+            'double_sight_stage_seconds_count{stage="persist"} 1',
+            "# TYPE double_sight_db_commits_total counter",
+            "double_sight_db_commits_total 2",
+        ]
+        snapshot = client.get("/metrics.json").json()
+        assert snapshot["stages"]["persist"]["count"] == 1
+        assert snapshot["counters"] == {"db_commits": 2}
+
+
+async def test_pipeline_records_stages(tmp_path: Path) -> None:
+    """Test that persisting and broadcasting a shot are recorded."""
+    metrics.reset()
+    async with ShotStore(tmp_path / "shots.db") as store, BroadcastHub() as hub:
+        row = {"id": "1", "captured_at": 1, "club": "7i", "carry": 150.0, "offline": 1.0}
+        await store.add_shots([{**row, "ball_speed": 118.0, "spin": 6500}])
+        hub.publish_shot(row)
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["persist"]["count"] == 1
+    assert snapshot["stages"]["broadcast"]["count"] == 1
+    assert snapshot["counters"]["db_rows_written"] == 1
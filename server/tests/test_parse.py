@@ -0,0 +1,60 @@
+"""Shot log parser tests."""
+
+import logging
+from pathlib import Path
+
+from benchmarks.synthetic import log_bytes, log_lines, replay_log
+from parser.parse import parse_shot_buffer, parse_shot_file, parse_shot_lines
+from utils.Logging import Logger
+
+
+LINE = "12:01:02 LaunchExt Vars: sp 145.20, el 12.30, az 1.20, ts 2650.00, sa 3.10, cy 1, id 12"
+
+
+def test_parse_shot_file() -> None:
+    """Test parsing a single LaunchExt line."""
+    shot = parse_shot_file(LINE)
+    assert shot is not None
+    assert shot.ShotNumber == 12
+    assert shot.BallData is not None
+    assert shot.BallData.Speed == 145.2
+    assert shot.BallData.VLA == 12.3
+    assert shot.BallData.HLA == 1.2
+    assert shot.BallData.TotalSpin == 2650.0
+    assert shot.BallData.SpinAxis == 3.1
+    assert parse_shot_file("UnloadTime: 0.812300 ms") is None
+
+
+def test_parse_shot_buffer_matches_per_line() -> None:
+    """Test that the batch scan finds exactly what the per-line parser finds."""
+    lines = log_lines(50, noise_per_shot=20, seed=3)
+    expected = [s for s in (parse_shot_file(line) for line in lines) if s]
+
+    assert list(parse_shot_buffer(log_bytes(50, noise_per_shot=20, seed=3))) == expected
+    assert list(parse_shot_lines(lines)) == expected
+    assert list(parse_shot_lines(line.encode() for line in lines)) == expected
+    assert list(parse_shot_lines(lines, chunk_size=200)) == expected
+
+
+def test_parse_shot_buffer_edges() -> None:
+    """Test a marker without values, a final line without newline and empty input."""
+    buf = b"LaunchExt Vars: garbage\n" + LINE.encode()
+    assert [s.ShotNumber for s in parse_shot_buffer(buf)] == [12]
+    assert list(parse_shot_buffer(b"")) == []
+    assert list(parse_shot_lines([])) == []
+
+
+def test_replayed_log_parses(tmp_path: Path) -> None:
+    """Test that every shot line of a replayed session is parsed, in order."""
+    path = tmp_path / "output_log.txt"
+    written = replay_log(path, 5, shots_per_second=0, noise_per_second=40, first_id=7)
+    shots = list(parse_shot_buffer(path.read_bytes()))
+    assert [s.ShotNumber for s in shots] == list(written) == [7, 8, 9, 10, 11]
+    assert path.read_bytes().count(b"\r\n") == 5 * (40 + 1)
+
+
+def test_logger_handlers_do_not_pile_up() -> None:
+    """Test that repeated Logger construction attaches a single handler."""
+    for _ in range(3):
+        Logger("double_sight.test")
+    assert len(logging.getLogger("double_sight.test").handlers) == 1
@@ -0,0 +1,79 @@
+"""Socket model serialization tests."""
+
+import json
+import math
+import random
+from dataclasses import dataclass, field
+
+import pytest
+
+from models import serialize
+from models.models import (
+    HEARTBEAT_MSG,
+    BallData,
+    GSProPlayer,
+    Shot,
+    ShotDataOptions,
+    asdict_ignore_none,
+)
+
+
+def _reference(obj) -> bytes:
+    return json.dumps(asdict_ignore_none(obj)).encode()
+
+
+def _random_shot(rng: random.Random) -> Shot:
+    return Shot(
+        DeviceID=rng.choice(["GC3 1040287", 'bay "7"', "café ⛳", "tab\there"]),
+        ShotNumber=rng.randint(-1, 10**6),
+        BallData=rng.choice(
+            [
+                None,
+                BallData(
+                    Speed=rng.uniform(0, 200),
+                    SpinAxis=rng.uniform(-30, 30),
+                    TotalSpin=rng.choice([0.0, 1e20, 2500.5, rng.uniform(0, 1e4)]),
+                    HLA=rng.uniform(-10, 10),
+                    VLA=rng.choice([12, 12.0, -0.0, 1e-7]),
+                ),
+            ]
+        ),
+        ShotDataOptions=ShotDataOptions(
+            ContainsBallData=rng.random() < 0.5,
+            LaunchMonitorIsReady=rng.choice([None, True, False]),
+            IsHeartbeat=rng.choice([None, False]),
+        ),
+    )
+
+
+def test_encode_matches_asdict_json() -> None:
+    """Test that encoded shots are byte-identical to asdict_ignore_none + json.dumps."""
+    rng = random.Random(0)
+    for _ in range(500):
+        shot = _random_shot(rng)
+        assert serialize.encode(shot) == _reference(shot)
+        assert shot.as_msg() == _reference(shot)
+
+
+def test_encode_heartbeat() -> None:
+    """Test the pre-rendered heartbeat message."""
+    assert _reference(Shot.heartbeat()) == HEARTBEAT_MSG
+    assert b'"BallData"' not in HEARTBEAT_MSG
+
+
+def test_encode_special_values() -> None:
+    """Test non-finite floats, None-only objects and values of other types."""
+
+    @dataclass
+    class Everything:
+        nan: float = math.nan
+        inf: float = -math.inf
+        missing: None = None
+        items: list = field(default_factory=lambda: [1, "a", None])
+        extra: dict = field(default_factory=lambda: {"k": 1.5})
+        player: GSProPlayer = field(default_factory=GSProPlayer)
+
+    assert serialize.encode(Everything()) == _reference(Everything())
+    assert serialize.encode(GSProPlayer()) == b"{}"
+    with pytest.raises(TypeError, match="not a dataclass"):
+        serialize.encode({"Code": 200})
@@ -0,0 +1,93 @@
+"""GSPro Connect socket protocol tests."""
+
+import json
+import random
+
+import pytest
+
+from server.socket import GSProStreamDecoder, parse_gspro_data
+
+
+MESSAGES = [
+    {"Code": 200, "Message": "Ball Data received", "Player": None},
+    {
+        "Code": 201,
+        "Message": "GSPro Player Information",
+        "Player": {"Handed": "RH", "Club": "DR", "DistanceToTarget": 380.0},
+    },
+    {"Code": 202, "Message": "GSPro ready", "Player": None},
+    {"Code": 203, "Message": "GSPro round ended", "Player": None},
+]
+STREAM = "".join(json.dumps(m, separators=(",", ":")) for m in MESSAGES).encode()
+
+
+def test_parse_gspro_data() -> None:
+    """Test parsing concatenated messages in one chunk."""
+    assert parse_gspro_data(STREAM) == MESSAGES
+    with pytest.raises(ValueError, match="incomplete"):
+        parse_gspro_data(STREAM[:-3])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decoder_handles_arbitrary_fragmentation(seed: int) -> None:
+    """Test that messages split at random points across feeds decode identically."""
+    rng = random.Random(seed)
+    decoder = GSProStreamDecoder()
+    received = []
+    pos = 0
+    while pos < len(STREAM):
+        size = rng.randint(1, 40)
+        received.extend(decoder.feed(STREAM[pos : pos + size]))
+        pos += size
+
+    assert [m.Code for m in received] == [200, 201, 202, 203]
+    assert received[1].Player == MESSAGES[1]["Player"]
+    assert decoder.pending == 0
+
+
+def test_decoder_emits_each_message_when_complete() -> None:
+    """Test that a message is emitted by the feed that completes it."""
+    decoder = GSProStreamDecoder()
+    first = json.dumps(MESSAGES[0]).encode()
+    assert decoder.feed(first[:-1]) == []
+    assert decoder.pending == len(first) - 1
+    assert [m.Code for m in decoder.feed(first[-1:] + b"{")] == [200]
+
+
+def test_decoder_strings_escapes_and_utf8() -> None:
+    """Test braces and escaped quotes inside strings and multi-byte characters split across feeds."""
+    msg = {"Code": 204, "Message": 'odd } { "quoted" \\ text — ok', "Player": None}
+    data = b"  " + json.dumps(msg, ensure_ascii=False).encode() + b"\r\n"
+    decoder = GSProStreamDecoder()
+    received = [m for i in range(len(data)) for m in decoder.feed(data[i : i + 1])]
+    assert len(received) == 1
+    assert received[0].Message == msg["Message"]
+
+
+def test_decoder_skips_garbage() -> None:
+    """Test that unexpected bytes between messages are skipped."""
+    decoder = GSProStreamDecoder()
+    assert [m.Code for m in decoder.feed(b'junk{"Code":200}')] == [200]
+
+
+def test_decoder_drops_malformed_message() -> None:
+    """Test that a malformed object is skipped at once and later messages aren't held back."""
+    decoder = GSProStreamDecoder()
+    assert decoder.feed(b'{"Code": oops}') == []
+    assert decoder.pending == 0
+    for _ in range(5):
+        assert [m.Code for m in decoder.feed(b'{"Code":200,"Message":"Ball Data received"}')] == [
+            200
+        ]
+        assert decoder.pending == 0
+    assert [m.Code for m in decoder.feed(b'{"Code":200 "Message":1}{"Code":202}')] == [202]
+
+
+def test_decoder_waits_at_every_split_point() -> None:
+    """Test that a stream cut anywhere, inside numbers, literals and escapes, is waited for."""
+    msg = {"Code": 201, "Message": 'caf\u00e9 \\ "x"', "Player": {"DistanceToTarget": -380.5}}
+    data = (json.dumps(msg) + json.dumps({"Code": 200, "Player": None, "Ok": True})).encode()
+    for cut in range(1, len(data)):
+        decoder = GSProStreamDecoder()
+        received = decoder.feed(data[:cut]) + decoder.feed(data[cut:])
+        assert [m.Code for m in received] == [201, 200], cut
@@ -0,0 +1,164 @@
+"""SQLite storage tests against a local database file."""
+
+import asyncio
+import sqlite3
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from server.storage import ShotStore, now_micros
+
+
+def make_shot(i: int, club: str = "7i", session_id: str | None = "s1") -> dict[str, Any]:
+    return {
+        "id": f"shot-{i}",
+        "captured_at": 1_700_000_000_000_000 + i * 60_000_000,
+        "club": club,
+        "carry": 150.0 + i % 20,
+        "offline": -3.0 + i % 7,
+        "ball_speed": 110.0,
+        "spin": 6000 + i,
+        "launch_angle": 18.0,
+        "launch_direction": None,
+        "session_id": session_id,
+        "is_outlier": False,
+        "outlier_reason": None,
+        "raw_json": {"ShotNumber": i},
+        "signature": f"sig-{i}",
+        "created_at": now_micros(),
+    }
+
+
+@pytest.fixture
+async def store(tmp_path: Path) -> AsyncIterator[ShotStore]:
+    async with ShotStore(tmp_path / "shots.db") as store:
+        yield store
+
+
+async def test_schema_pragmas_and_indexes(store: ShotStore) -> None:
+    """Test that the database is in WAL mode with the planned indexes."""
+    await store.add_shots([make_shot(1)])
+    conn = sqlite3.connect(store.path)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    indexes = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(shots)")}
+    assert {"ix_shots_club_captured_at", "ix_shots_session_id", "ux_shots_signature"} <= set(
+        indexes
+    )
+    assert indexes["ux_shots_signature"] == 1
+    plan = " ".join(
+        row[3]
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT captured_at, carry FROM shots "
+            "WHERE club = '7i' ORDER BY captured_at DESC"
+        )
+    )
+    assert "COVERING INDEX ix_shots_club_captured_at" in plan
+    conn.close()
+
+
+async def test_writes_are_grouped_and_read_back(store: ShotStore) -> None:
+    """Test that concurrent writes share transactions and duplicates are skipped."""
+    await asyncio.gather(*(store.add_shots([make_shot(i)]) for i in range(50)))
+    assert store.commits < 50
+    # same signature under another id, and a repeated id
+    inserted = await store.add_shots(
+        [{**make_shot(0), "id": "other"}, make_shot(1), make_shot(50, club="Dr")]
+    )
+    assert inserted == ["shot-50"]
+
+    assert await store.count_shots() == 51
+    assert await store.club_counts() == {"7i": 50, "Dr": 1}
+    recent = await store.list_shots(club="7i", limit=3)
+    assert [r["id"] for r in recent] == ["shot-49", "shot-48", "shot-47"]
+    assert recent[0]["raw_json"] == {"ShotNumber": 49}
+    assert len(await store.list_shots(session_id="s1")) == 51
+    assert (await store.get_shot("shot-3"))["spin"] == 6003  # type: ignore[index]
+    assert await store.get_shot("missing") is None
+
+
+async def test_backfill_and_upserts(store: ShotStore) -> None:
+    """Test that backfills are chunked and rollups / insights are replaced by key."""
+    sent = await store.backfill_shots((make_shot(i) for i in range(2500)), chunk_size=1000)
+    assert sent == 2500
+    assert await store.count_shots("7i") == 2500
+
+    rollup = {
+        "club": "7i",
+        "window": "last_25",
+        "metric": "carry",
+        "mean": 160.0,
+        "sd": 5.0,
+        "median": 161.0,
+        "iqr": 6.0,
+        "n": 25,
+        "updated_at": now_micros(),
+    }
+    await store.put_rollups([rollup])
+    await store.put_rollups([{**rollup, "mean": 162.0}])
+    assert [r["mean"] for r in await store.get_rollups("7i")] == [162.0]
+
+    insight = {
+        "id": "i1",
+        "club": "7i",
+        "metric": "carry",
+        "kind": "step_change",
+        "window": "last_25",
+        "baseline": "prev_25",
+        "delta": 4.2,
+        "slope": None,
+        "ci_low": 1.1,
+        "ci_high": 7.3,
+        "p_value": 0.01,
+        "effect_size": 0.6,
+        "text": "7i carry is up +4.2y vs your previous 25 shots (95% CI +1.1 to +7.3).",
+        "created_at": now_micros(),
+    }
+    await store.add_insights([insight, {**insight, "id": "i2", "club": "Dr"}])
+    await store.add_insights([{**insight, "delta": 5.0}])
+    assert [(i["id"], i["delta"]) for i in await store.list_insights("7i")] == [("i1", 5.0)]
+    await store.put_sessions([{"id": "s1", "started_at": now_micros(), "ended_at": None}])
+
+
+async def test_failed_write_does_not_fail_its_batch(store: ShotStore) -> None:
+    """Test that a bad write fails alone even when grouped with good ones."""
+    bad = {**make_shot(1), "carry": None}
+    results = await asyncio.gather(
+        store.add_shots([make_shot(0)]),
+        store.add_shots([bad]),
+        store.add_shots([make_shot(2)]),
+        return_exceptions=True,
+    )
+    assert results[0] == ["shot-0"] and results[2] == ["shot-2"]
+    assert isinstance(results[1], Exception)
+    assert await store.count_shots() == 2
+
+
+async def test_reads_are_not_blocked_by_a_write(store: ShotStore) -> None:
+    """Test that a reader sees the last commit while a write transaction is open."""
+    await store.add_shots([make_shot(0)])
+    writer = sqlite3.connect(store.path, timeout=0)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute(
+        "INSERT INTO shots (id, captured_at, club, carry, offline, ball_speed, spin, "
+        "is_outlier, created_at) VALUES ('x', 0, '7i', 1, 1, 1, 1, 0, 0)"
+    )
+    async with asyncio.timeout(1):
+        assert await store.count_shots() == 1
+    writer.rollback()
+    writer.close()
+
+
+async def test_closed_store_rejects_use(tmp_path: Path) -> None:
+    """Test that a store must be opened before use and can be closed twice."""
+    store = ShotStore(tmp_path / "shots.db")
+    with pytest.raises(RuntimeError, match="not open"):
+        await store.add_shots([make_shot(0)])
+    with pytest.raises(RuntimeError, match="not open"):
+        await store.count_shots()
+    await store.add_shots([])
+    await store.open()
+    await store.open()
+    await store.close()
+    await store.close()
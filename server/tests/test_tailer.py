@@ -0,0 +1,119 @@
+"""Log tailer tests."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from parser.tailer import LogTailer
+
+
+def _append(path: Path, data: bytes) -> None:
+    with path.open("ab") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def log(tmp_path: Path) -> Path:
+    path = tmp_path / "output_log.txt"
+    path.write_bytes(b"history\n")
+    return path
+
+
+def test_starts_at_end(log: Path) -> None:
+    """Test that existing history is skipped by default."""
+    with LogTailer(str(log), use_inotify=False) as tailer:
+        assert tailer.read_available() == b""
+        _append(log, b"new\n")
+        assert tailer.read_available() == b"new\n"
+
+
+def test_partial_lines_are_held_back(log: Path) -> None:
+    """Test that only complete lines are returned and offset tracks them."""
+    with LogTailer(str(log), from_start=True, use_inotify=False) as tailer:
+        assert tailer.read_available() == b"history\n"
+        _append(log, b"one\ntw")
+        assert tailer.read_available() == b"one\n"
+        assert tailer.offset == len(b"history\none\n")
+        _append(log, b"o\r\n")
+        assert tailer.read_available() == b"two\r\n"
+
+
+def test_iter_lines_strips_line_endings() -> None:
+    """Test splitting a block into views."""
+    lines = [bytes(v) for v in LogTailer.iter_lines(b"a\r\nbb\n\nccc\n")]
+    assert lines == [b"a", b"bb", b"", b"ccc"]
+
+
+def test_truncation_restarts_from_top(log: Path) -> None:
+    """Test that a truncated log is read again from the start."""
+    with LogTailer(str(log), use_inotify=False) as tailer:
+        log.write_bytes(b"")
+        assert tailer.read_available() == b""
+        _append(log, b"fresh\n")
+        assert tailer.read_available() == b"fresh\n"
+
+
+def test_rotation_follows_new_file(log: Path) -> None:
+    """Test that a replaced log is followed after draining the old one."""
+    with LogTailer(str(log), use_inotify=False) as tailer:
+        _append(log, b"last old line\n")
+        replacement = log.with_suffix(".new")
+        replacement.write_bytes(b"first new line\n")
+        replacement.replace(log)
+        assert tailer.read_available() == b"last old line\n"
+        assert tailer.read_available() == b"first new line\n"
+
+
+def test_resume_from_offset(log: Path) -> None:
+    """Test starting from an explicit byte offset."""
+    _append(log, b"more\n")
+    with LogTailer(str(log), start_offset=len(b"history\n"), use_inotify=False) as tailer:
+        assert tailer.read_available() == b"more\n"
+
+
+def test_polling_backoff(log: Path) -> None:
+    """Test that idle polling backs off and activity resets it."""
+    with LogTailer(str(log), min_poll=0.001, max_poll=0.004, use_inotify=False) as tailer:
+        for _ in range(5):
+            tailer.wait()
+        assert tailer.fileno() is None
+        assert tailer._watcher.delay == 0.004  # pyright: ignore[reportPrivateUsage]
+        _append(log, b"x\n")
+        tailer.read_available()
+        assert tailer._watcher.delay == 0.001  # pyright: ignore[reportPrivateUsage]
+
+
+@pytest.mark.parametrize(
+    "use_inotify",
+    [
+        False,
+        pytest.param(True, marks=pytest.mark.skipif(sys.platform != "linux", reason="inotify")),
+    ],
+)
+def test_lines_follow_writes(log: Path, use_inotify: bool) -> None:
+    """Test that lines written from another thread arrive promptly and stop() ends iteration."""
+    with LogTailer(str(log), use_inotify=use_inotify) as tailer:
+        assert tailer.uses_inotify == use_inotify
+        received: list[bytes] = []
+
+        def consume() -> None:
+            for line in tailer.lines():
+                received.append(bytes(line))
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for i in range(3):
+            _append(log, f"line {i}\n".encode())
+            time.sleep(0.01)
+
+        deadline = time.monotonic() + 2
+        while len(received) < 3 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        tailer.stop()
+        consumer.join(timeout=2)
+
+        assert not consumer.is_alive()
+        assert received == [b"line 0", b"line 1", b"line 2"]
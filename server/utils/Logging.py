@@ -1,18 +1,23 @@
+import os
 from logging import Formatter, StreamHandler, getLogger
 
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s:%(lineno)d - %(message)s"
+# e.g. DOUBLE_SIGHT_LOG_LEVEL=DEBUG for sampled payload logging
+LOG_LEVEL = os.environ.get("DOUBLE_SIGHT_LOG_LEVEL", "INFO")
 
 class Logger:
-    def __init__(self, name: str, level: str = "INFO"):
+    def __init__(self, name: str, level: str = LOG_LEVEL):
         self.logger = getLogger(name)
         self.logger.setLevel(level)
 
-        handler = StreamHandler()
-        handler.setFormatter(Formatter(LOG_FORMAT))
-        handler.setLevel(level)
+        # getLogger hands back the same logger for a name, only attach our handler once
+        if not self.logger.handlers:
+            handler = StreamHandler()
+            handler.setFormatter(Formatter(LOG_FORMAT))
+            handler.setLevel(level)
 
-        self.logger.addHandler(handler)
+            self.logger.addHandler(handler)
         self.logger.propagate = False
 
     def get_logger(self):
-        return self.logger
\ No newline at end of file
+        return self.logger